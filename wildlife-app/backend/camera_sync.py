@@ -1,6 +1,6 @@
 import asyncio
 import logging
-from typing import Any, Dict, List, Optional, Set, Type
+from typing import Any, Callable, Dict, List, Optional, Set, Type
 
 from sqlalchemy.orm import Session, sessionmaker
 
@@ -111,12 +111,14 @@ class CameraSyncService:
     def __init__(
         self,
         session_factory: sessionmaker,
-        motioneye_client,
+        motioneye_client_factory: Callable[[], Any],
         camera_model: Type,
         poll_interval_seconds: int = 60,
     ) -> None:
+        # The client is resolved on each sync, so building the service at
+        # import time doesn't create the MotionEye session and pools
         self._session_factory = session_factory
-        self._motioneye_client = motioneye_client
+        self._motioneye_client_factory = motioneye_client_factory
         self._camera_model = camera_model
         self._poll_interval = poll_interval_seconds
         self._task: Optional[asyncio.Task] = None
@@ -156,7 +158,7 @@ class CameraSyncService:
     def _sync_blocking(self) -> Dict[str, Any]:
         session = self._session_factory()
         try:
-            return sync_motioneye_cameras(session, self._motioneye_client, self._camera_model)
+            return sync_motioneye_cameras(session, self._motioneye_client_factory(), self._camera_model)
         finally:
             session.close()
 
@@ -42,12 +42,28 @@ else:
 # Service URLs
 MOTIONEYE_URL = os.getenv("MOTIONEYE_URL", "http://localhost:8765")
 SPECIESNET_URL = os.getenv("SPECIESNET_URL", "http://localhost:8000")
+# Send only the changed keys on motion settings updates (MotionEye builds that accept partial configs)
+MOTIONEYE_PARTIAL_UPDATES = os.getenv("MOTIONEYE_PARTIAL_UPDATES", "false").lower() == "true"
+# Gzip large config uploads (MotionEye builds that decode Content-Encoding: gzip request bodies)
+MOTIONEYE_GZIP_REQUESTS = os.getenv("MOTIONEYE_GZIP_REQUESTS", "false").lower() == "true"
+# Override the per-endpoint MotionEye connect/read timeouts in seconds (unset keeps the defaults)
+MOTIONEYE_CONNECT_TIMEOUT = float(os.getenv("MOTIONEYE_CONNECT_TIMEOUT")) if os.getenv("MOTIONEYE_CONNECT_TIMEOUT") else None
+MOTIONEYE_READ_TIMEOUT = float(os.getenv("MOTIONEYE_READ_TIMEOUT")) if os.getenv("MOTIONEYE_READ_TIMEOUT") else None
+# Host/port the browser uses for camera stream URLs (MotionEye may be proxied or on another machine)
+MOTIONEYE_STREAM_HOST = os.getenv("MOTIONEYE_STREAM_HOST", "localhost")
+MOTIONEYE_STREAM_PORT = int(os.getenv("MOTIONEYE_STREAM_PORT", "8765"))
+
+# Shared store for chat conversation context across workers (optional, e.g. redis://localhost:6379/0)
+REDIS_URL = os.getenv("REDIS_URL", "")
 
 # AI Backend Configuration
 AI_BACKEND = os.getenv("AI_BACKEND", "ensemble")  # Options: speciesnet, yolov11, yolov8, clip, ensemble
 YOLOV11_MODEL_PATH = os.getenv("YOLOV11_MODEL_PATH", "yolo11n.pt")
 YOLOV8_MODEL_PATH = os.getenv("YOLOV8_MODEL_PATH", "yolov8n.pt")
 VIT_MODEL_NAME = os.getenv("VIT_MODEL_NAME", "google/vit-base-patch16-224")
+# Coalesce webhook images arriving within this window into one batched inference call
+AI_BATCH_WINDOW_MS = float(os.getenv("AI_BATCH_WINDOW_MS", "25"))
+AI_MAX_BATCH = int(os.getenv("AI_MAX_BATCH", "8"))  # 1 disables batching
 
 # Camera authentication credentials
 THINGINO_CAMERA_USERNAME = os.getenv("THINGINO_CAMERA_USERNAME", "root")
@@ -1,10 +1,13 @@
 """Database setup and models"""
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, Index, event, DDL
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, LargeBinary, Index, event, DDL
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 from config import DATABASE_URL, DB_SCHEMA, ENVIRONMENT
 from sqlalchemy.pool import QueuePool
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -38,6 +41,33 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+class JSONText(TypeDecorator):
+    """JSON string column stored as JSONB on PostgreSQL and TEXT elsewhere.
+    
+    Application code keeps reading and writing JSON strings; JSONB only
+    changes the storage so the column can be GIN-indexed and queried by path.
+    """
+    impl = Text
+    cache_ok = True
+    
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(Text())
+    
+    def process_bind_param(self, value, dialect):
+        if value is not None and dialect.name == 'postgresql' and isinstance(value, str):
+            # JSONB binds expect a Python object, not pre-serialized text
+            return json.loads(value)
+        return value
+    
+    def process_result_value(self, value, dialect):
+        # The PostgreSQL driver decodes JSONB; hand callers a JSON string as before
+        if value is not None and not isinstance(value, str):
+            return json.dumps(value)
+        return value
+
+
 def get_db():
     """Database session dependency for FastAPI"""
     db = SessionLocal()
@@ -102,7 +132,7 @@ class Detection(Base):
     image_quality = Column(Integer, nullable=True)
     # SpeciesNet specific fields
     prediction_score = Column(Float, nullable=True)
-    detections_json = Column(Text, nullable=True)  # Store full detection data as JSON
+    detections_json = Column(JSONText, nullable=True)  # Store full detection data as JSON (JSONB on PostgreSQL)
     file_hash = Column(String, nullable=True, index=True)  # SHA256 hash of file for deduplication
     # Audio support
     audio_path = Column(String, nullable=True)  # Path to audio file if available
@@ -299,7 +329,7 @@ class KnownFace(Base):
     )
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)  # Person's name
-    face_encoding = Column(Text, nullable=False)  # Face encoding (JSON array of floats)
+    face_encoding = Column(LargeBinary, nullable=False)  # Face encoding (128 float32 values as raw bytes)
     image_path = Column(String, nullable=True)  # Path to reference image
     is_active = Column(Boolean, default=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -319,7 +349,7 @@ class FaceDetection(Base):
     known_face_id = Column(Integer, ForeignKey("known_faces.id"), nullable=True, index=True)  # null if unknown
     confidence = Column(Float, nullable=False)  # Confidence score (0.0-1.0)
     face_location = Column(Text, nullable=True)  # Face bounding box (JSON: [top, right, bottom, left])
-    face_encoding = Column(Text, nullable=True)  # Detected face encoding (JSON array)
+    face_encoding = Column(LargeBinary, nullable=True)  # Detected face encoding (128 float32 values as raw bytes)
     created_at = Column(DateTime, default=datetime.utcnow)  # JSON string for custom headers
     retry_count = Column(Integer, default=3)  # Number of retry attempts
     retry_delay = Column(Integer, default=5)  # Delay between retries in seconds
@@ -13,14 +13,14 @@ import logging
 try:
     from config import MOTIONEYE_URL, SPECIESNET_URL, ALLOWED_ORIGINS, DATABASE_URL
     from database import engine, SessionLocal, Base, Camera, Detection, Webhook
-    from services.motioneye import motioneye_client
+    from services.motioneye import get_motioneye_client
     from services.speciesnet import speciesnet_processor
     from services.notifications import notification_service
 except ImportError:
     # Fallback for direct execution
     from config import MOTIONEYE_URL, SPECIESNET_URL, ALLOWED_ORIGINS, DATABASE_URL
     from database import engine, SessionLocal, Base, Camera, Detection, Webhook
-    from services.motioneye import motioneye_client
+    from services.motioneye import get_motioneye_client
     from services.speciesnet import speciesnet_processor
     from services.notifications import notification_service
 
@@ -245,7 +245,7 @@ def _get_sync_interval() -> int:
 
 camera_sync_service = CameraSyncService(
     SessionLocal,
-    motioneye_client,
+    get_motioneye_client,
     Camera,
     poll_interval_seconds=_get_sync_interval(),
 )
@@ -330,8 +330,8 @@ async def lifespan(app: FastAPI):
         speciesnet_online = False
         
         try:
-            from services.motioneye import motioneye_client
-            motioneye_status = motioneye_client.get_status()
+            from services.motioneye import get_motioneye_client
+            motioneye_status = await get_motioneye_client().a_get_status()
             if motioneye_status == "running":
                 logging.info("[OK] MotionEye is running")
                 motioneye_online = True
@@ -417,6 +417,12 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     await camera_sync_service.stop()
+    event_manager.close()
+    try:
+        from services.face_recognition import face_recognition_service
+        face_recognition_service.close()
+    except Exception as e:
+        logging.warning(f"Face recognition shutdown failed: {e}")
 
 # Assign lifespan to the existing app instance (defined at top of file)
 # This preserves the middleware setup while enabling startup/shutdown events
@@ -528,9 +534,8 @@ async def sync_cameras_background_task():
         
         # Try to get cameras from MotionEye
         try:
-            loop = asyncio.get_event_loop()
             cameras = await asyncio.wait_for(
-                loop.run_in_executor(None, motioneye_client.get_cameras),
+                get_motioneye_client().a_get_cameras(),
                 timeout=5.0
             )
             if cameras:
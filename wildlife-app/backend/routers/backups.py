@@ -27,6 +27,9 @@ def setup_backups_router(limiter: Limiter, get_db) -> APIRouter:
             backup_path = backup_service.create_backup()
             
             if backup_path:
+                info = backup_service.get_backup_info(backup_path)
+                size_mb = info["size_mb"] if info else 0
+                
                 # Log backup creation
                 log_audit_event(
                     db=db,
@@ -35,14 +38,14 @@ def setup_backups_router(limiter: Limiter, get_db) -> APIRouter:
                     resource_type="database",
                     details={
                         "backup_path": str(backup_path),
-                        "size_mb": round(backup_path.stat().st_size / (1024 * 1024), 2)
+                        "size_mb": size_mb
                     }
                 )
                 
                 return {
                     "success": True,
                     "backup_path": str(backup_path),
-                    "size_mb": round(backup_path.stat().st_size / (1024 * 1024), 2),
+                    "size_mb": size_mb,
                     "message": "Backup created successfully"
                 }
             else:
@@ -62,15 +65,16 @@ def setup_backups_router(limiter: Limiter, get_db) -> APIRouter:
             backups = backup_service.list_backups()
             backup_info = []
             
-            for backup in backups:
-                info = backup_service.get_backup_info(backup)
+            for backup, stat in backups:
+                info = backup_service.get_backup_info(backup, stat)
                 if info:
                     backup_info.append({
                         "filename": info["filename"],
                         "path": info["path"],
                         "size_mb": info["size_mb"],
                         "created_at": info["created"],
-                        "modified_at": info["modified"]
+                        "modified_at": info["modified"],
+                        "sha256": info["sha256"]
                     })
             
             return {
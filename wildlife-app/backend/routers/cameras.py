@@ -13,7 +13,7 @@ from datetime import datetime
 try:
     from ..database import SessionLocal, Camera, Detection
     from ..models import CameraResponse, CameraCreate
-    from ..services.motioneye import motioneye_client
+    from ..services.motioneye import get_motioneye_client
     from ..camera_sync import sync_motioneye_cameras
     from ..utils.caching import get_cached, set_cached, clear_cache
     from ..utils.audit import log_audit_event
@@ -21,7 +21,7 @@ try:
 except ImportError:
     from database import SessionLocal, Camera, Detection
     from models import CameraResponse, CameraCreate
-    from services.motioneye import motioneye_client
+    from services.motioneye import get_motioneye_client
     from camera_sync import sync_motioneye_cameras
     from utils.caching import get_cached, set_cached, clear_cache
     from utils.audit import log_audit_event
@@ -164,8 +164,8 @@ def setup_cameras_router(limiter: Limiter, get_db) -> APIRouter:
                         "snapshot_interval": snapshot_interval_val,
                         "target_dir": target_dir_val,
                         "created_at": camera.created_at if camera.created_at else datetime.utcnow(),
-                        "stream_url": motioneye_client.get_camera_stream_url(camera.id) if camera.id else None,
-                        "mjpeg_url": motioneye_client.get_camera_mjpeg_url(camera.id) if camera.id else None,
+                        "stream_url": get_motioneye_client().get_camera_stream_url(camera.id) if camera.id else None,
+                        "mjpeg_url": get_motioneye_client().get_camera_mjpeg_url(camera.id) if camera.id else None,
                         "detection_count": detection_count,
                         "last_detection": last_detection_time,
                         "status": status,
@@ -307,7 +307,7 @@ def setup_cameras_router(limiter: Limiter, get_db) -> APIRouter:
             except Exception as e:
                 logger.warning(f"MotionEye connectivity check failed: {e}")
             
-            result = sync_motioneye_cameras(db, motioneye_client, Camera)
+            result = sync_motioneye_cameras(db, get_motioneye_client(), Camera)
             
             # Clear cameras cache after sync to ensure fresh data on next request
             try:
@@ -375,7 +375,7 @@ def setup_cameras_router(limiter: Limiter, get_db) -> APIRouter:
             "target_dir": camera.target_dir
         }
         
-        success = motioneye_client.add_camera(motioneye_config)
+        success = get_motioneye_client().add_camera(motioneye_config)
         if not success:
             db.delete(db_camera)
             db.commit()
@@ -390,8 +390,8 @@ def setup_cameras_router(limiter: Limiter, get_db) -> APIRouter:
             )
             raise HTTPException(status_code=500, detail="Failed to add camera to MotionEye")
         
-        db_camera.stream_url = motioneye_client.get_camera_stream_url(db_camera.id)
-        db_camera.mjpeg_url = motioneye_client.get_camera_mjpeg_url(db_camera.id)
+        db_camera.stream_url = get_motioneye_client().get_camera_stream_url(db_camera.id)
+        db_camera.mjpeg_url = get_motioneye_client().get_camera_mjpeg_url(db_camera.id)
         
         log_audit_event(
             db=db,
@@ -416,7 +416,7 @@ def setup_cameras_router(limiter: Limiter, get_db) -> APIRouter:
     def get_motion_settings(camera_id: int):
         """Get motion detection settings for a camera"""
         try:
-            settings = motioneye_client.get_camera_config(camera_id)
+            settings = get_motioneye_client().get_camera_config(camera_id)
             return {
                 "camera_id": camera_id,
                 "motion_detection": settings.get("motion_detection", True),
@@ -437,7 +437,7 @@ def setup_cameras_router(limiter: Limiter, get_db) -> APIRouter:
                 "motion_threshold": settings.detection_threshold,
                 "motion_smart_mask_speed": settings.detection_smart_mask_speed
             }
-            success = motioneye_client.update_camera_config(camera_id, motioneye_config)
+            success = get_motioneye_client().update_camera_config(camera_id, motioneye_config)
             if not success:
                 raise HTTPException(status_code=500, detail="Failed to update motion settings")
             
@@ -589,8 +589,8 @@ def setup_cameras_router(limiter: Limiter, get_db) -> APIRouter:
             "camera_id": camera_id,
             "camera_name": camera.name,
             "rtsp_url": camera.url,
-            "stream_url": motioneye_client.get_camera_stream_url(camera_id),
-            "mjpeg_url": motioneye_client.get_camera_mjpeg_url(camera_id),
+            "stream_url": get_motioneye_client().get_camera_stream_url(camera_id),
+            "mjpeg_url": get_motioneye_client().get_camera_mjpeg_url(camera_id),
             "motioneye_url": MOTIONEYE_URL,
             "camera_type": "motioneye"
         }
@@ -603,7 +603,7 @@ def setup_cameras_router(limiter: Limiter, get_db) -> APIRouter:
             from ..services.speciesnet import speciesnet_processor
             from ..services.notifications import notification_service
             from ..services.webhooks import WebhookService
-            from ..services.events import get_event_manager
+            from ..services.events import get_event_manager, DetectionEvent
             from ..database import Detection
             import requests
             import tempfile
@@ -614,7 +614,7 @@ def setup_cameras_router(limiter: Limiter, get_db) -> APIRouter:
             from services.speciesnet import speciesnet_processor
             from services.notifications import notification_service
             from services.webhooks import WebhookService
-            from services.events import get_event_manager
+            from services.events import get_event_manager, DetectionEvent
             from database import Detection
             import requests
             import tempfile
@@ -747,16 +747,16 @@ def setup_cameras_router(limiter: Limiter, get_db) -> APIRouter:
                 
                 # Broadcast the new detection to connected clients
                 event_manager = get_event_manager()
-                detection_event = {
-                    "id": db_detection.id,
-                    "camera_id": camera_id,
-                    "camera_name": camera.name,
-                    "species": species,
-                    "confidence": confidence,
-                    "image_path": temp_path,
-                    "timestamp": db_detection.timestamp.isoformat(),
-                    "media_url": f"/api/thingino/image/{db_detection.id}"
-                }
+                detection_event = DetectionEvent(
+                    id=db_detection.id,
+                    camera_id=camera_id,
+                    camera_name=camera.name,
+                    species=species,
+                    confidence=confidence,
+                    image_path=temp_path,
+                    timestamp=db_detection.timestamp.isoformat(),
+                    media_url=f"/api/thingino/image/{db_detection.id}"
+                )
                 await event_manager.broadcast_detection(detection_event)
                 
                 return {
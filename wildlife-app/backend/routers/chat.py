@@ -202,7 +202,11 @@ def setup_chat_router(limiter, get_db) -> APIRouter:
                 session_id = str(uuid.uuid4())
             
             # Get conversation context
-            conversation_context = chat_nlp_service.get_conversation_context(session_id)
+            conversation_context = await chat_nlp_service.get_conversation_context(session_id)
+            
+            # Load NLP models off the event loop on first use
+            if use_nlp:
+                await chat_nlp_service.ensure_loaded()
             
             # Parse query (enhanced with NLP if available)
             if use_nlp and chat_nlp_service.is_available():
@@ -228,12 +232,12 @@ def setup_chat_router(limiter, get_db) -> APIRouter:
             
             # Generate natural language response
             if use_nlp and chat_nlp_service.is_available():
-                nl_response = chat_nlp_service.generate_response(query, parsed, result)
+                nl_response = await chat_nlp_service.generate_response(query, parsed, result)
             else:
                 nl_response = result.get('message', 'Query executed successfully')
             
             # Update conversation context
-            chat_nlp_service.update_conversation_context(session_id, query, result)
+            await chat_nlp_service.update_conversation_context(session_id, query, result)
             
             # Get query suggestions
             conversation_history = conversation_context.get('queries', []) if conversation_context else []
@@ -352,7 +356,7 @@ def setup_chat_router(limiter, get_db) -> APIRouter:
         # Get conversation context
         conversation_context = {}
         if session_id:
-            conversation_context = chat_nlp_service.get_conversation_context(session_id)
+            conversation_context = await chat_nlp_service.get_conversation_context(session_id)
         
         conversation_history = conversation_context.get('queries', []) if conversation_context else []
         
@@ -371,7 +375,7 @@ def setup_chat_router(limiter, get_db) -> APIRouter:
         session_id: str = Header(..., alias="X-Session-ID")
     ):
         """Get conversation context for a session"""
-        context = chat_nlp_service.get_conversation_context(session_id)
+        context = await chat_nlp_service.get_conversation_context(session_id)
         return {
             "session_id": session_id,
             "context": context,
@@ -388,8 +392,7 @@ def setup_chat_router(limiter, get_db) -> APIRouter:
         """Clear chat history (optionally for a specific session)"""
         if session_id:
             # Clear conversation context for this session
-            if session_id in chat_nlp_service.conversation_context:
-                del chat_nlp_service.conversation_context[session_id]
+            await chat_nlp_service.clear_conversation_context(session_id)
             return {"deleted": "session_context", "session_id": session_id}
         else:
             # Clear all chat history from database
@@ -397,7 +400,7 @@ def setup_chat_router(limiter, get_db) -> APIRouter:
             db.commit()
             
             # Clear all conversation contexts
-            chat_nlp_service.conversation_context.clear()
+            await chat_nlp_service.clear_conversation_context()
             
             log_audit_event(
                 db=db,
@@ -410,7 +413,7 @@ def setup_chat_router(limiter, get_db) -> APIRouter:
     
     @router.get("/api/chat/nlp-status")
     async def get_nlp_status():
-        """Get NLP service status"""
+        """Get NLP service status (reports current state without loading models)"""
         return {
             "available": chat_nlp_service.is_available(),
             "transformers_available": TRANSFORMERS_AVAILABLE if 'TRANSFORMERS_AVAILABLE' in globals() else False,
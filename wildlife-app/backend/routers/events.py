@@ -1,15 +1,13 @@
 """Server-Sent Events (SSE) endpoints for real-time updates"""
 from fastapi import APIRouter
 from fastapi.responses import StreamingResponse
-from datetime import datetime
 import asyncio
-import json
 import logging
 
 try:
-    from ..services.events import get_event_manager
+    from ..services.events import get_event_manager, format_sse, utc_now_iso
 except ImportError:
-    from services.events import get_event_manager
+    from services.events import get_event_manager, format_sse, utc_now_iso
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -35,12 +33,12 @@ def setup_events_router() -> APIRouter:
                         
                         event = await asyncio.wait_for(client_queue.get(), timeout=30.0)
                         
-                        # Format as SSE
-                        yield f"data: {json.dumps(event)}\n\n"
+                        # Already framed as SSE by the event manager
+                        yield event
                         
                     except asyncio.TimeoutError:
                         # Send keepalive
-                        yield f"data: {json.dumps({'type': 'keepalive', 'timestamp': datetime.utcnow().isoformat()})}\n\n"
+                        yield format_sse({'type': 'keepalive', 'timestamp': utc_now_iso()})
                     except Exception as e:
                         logging.error(f"Error in detection stream: {e}")
                         break
@@ -73,12 +71,12 @@ def setup_events_router() -> APIRouter:
                         
                         event = await asyncio.wait_for(client_queue.get(), timeout=30.0)
                         
-                        # Format as SSE
-                        yield f"data: {json.dumps(event)}\n\n"
+                        # Already framed as SSE by the event manager
+                        yield event
                         
                     except asyncio.TimeoutError:
                         # Send keepalive
-                        yield f"data: {json.dumps({'type': 'keepalive', 'timestamp': datetime.utcnow().isoformat()})}\n\n"
+                        yield format_sse({'type': 'keepalive', 'timestamp': utc_now_iso()})
                     except Exception as e:
                         logging.error(f"Error in system stream: {e}")
                         break
@@ -11,10 +11,10 @@ import numpy as np
 
 try:
     from ..database import get_db, KnownFace, FaceDetection, Detection
-    from ..services.face_recognition import face_recognition_service
+    from ..services.face_recognition import face_recognition_service, encode_face_encoding, decode_face_encoding, face_encoding_to_json
 except (ImportError, ValueError):
     from database import get_db, KnownFace, FaceDetection, Detection
-    from services.face_recognition import face_recognition_service
+    from services.face_recognition import face_recognition_service, encode_face_encoding, decode_face_encoding, face_encoding_to_json
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -181,10 +181,7 @@ async def delete_known_face(face_id: int, db: Session = Depends(get_db)) -> Dict
     db.commit()
     
     # Remove from cache
-    if face_id in face_recognition_service.known_faces:
-        del face_recognition_service.known_faces[face_id]
-    if face_id in face_recognition_service.known_face_names:
-        del face_recognition_service.known_face_names[face_id]
+    face_recognition_service.remove_cached_face(face_id)
     
     return {"message": f"Face '{face.name}' deactivated successfully"}
 
@@ -205,8 +202,7 @@ async def update_known_face(
     if name:
         face.name = name
         # Update cache
-        if face_id in face_recognition_service.known_face_names:
-            face_recognition_service.known_face_names[face_id] = name
+        face_recognition_service.update_cached_face(face_id, name=name)
     
     if notes is not None:
         face.notes = notes
@@ -216,8 +212,7 @@ async def update_known_face(
             raise HTTPException(status_code=400, detail="Tolerance must be between 0.0 and 1.0")
         face.tolerance = tolerance
         # Update cache
-        if face_id in face_recognition_service.known_face_tolerance:
-            face_recognition_service.known_face_tolerance[face_id] = tolerance
+        face_recognition_service.update_cached_face(face_id, tolerance=tolerance)
     
     db.commit()
     db.refresh(face)
@@ -350,12 +345,7 @@ async def bulk_delete_faces(
         if face:
             face.is_active = False
             # Remove from cache
-            if face_id in face_recognition_service.known_faces:
-                del face_recognition_service.known_faces[face_id]
-            if face_id in face_recognition_service.known_face_names:
-                del face_recognition_service.known_face_names[face_id]
-            if face_id in face_recognition_service.known_face_tolerance:
-                del face_recognition_service.known_face_tolerance[face_id]
+            face_recognition_service.remove_cached_face(face_id)
             deleted_count += 1
     
     db.commit()
@@ -380,7 +370,8 @@ async def export_faces(db: Session = Depends(get_db)) -> Dict[str, Any]:
         face_data = {
             "id": face.id,
             "name": face.name,
-            "face_encoding": face.face_encoding,
+            # Exported as a JSON array string so backups stay portable
+            "face_encoding": face_encoding_to_json(decode_face_encoding(face.face_encoding)),
             "image_path": face.image_path,
             "notes": face.notes,
             "tolerance": face.tolerance if face.tolerance is not None else 0.6,
@@ -418,10 +409,12 @@ async def import_faces(
                 skipped_count += 1
                 continue
             
+            encoding = decode_face_encoding(face_data.get("face_encoding"))
+            
             # Create new face
             new_face = KnownFace(
                 name=face_data.get("name"),
-                face_encoding=face_data.get("face_encoding"),
+                face_encoding=encode_face_encoding(encoding),
                 image_path=face_data.get("image_path"),
                 notes=face_data.get("notes"),
                 tolerance=face_data.get("tolerance", 0.6),
@@ -432,11 +425,9 @@ async def import_faces(
             
             # Update cache
             try:
-                encoding = json.loads(new_face.face_encoding)
-                import numpy as np
-                face_recognition_service.known_faces[new_face.id] = np.array(encoding)
-                face_recognition_service.known_face_names[new_face.id] = new_face.name
-                face_recognition_service.known_face_tolerance[new_face.id] = new_face.tolerance if new_face.tolerance else 0.6
+                face_recognition_service.cache_known_face(
+                    new_face.id, encoding, new_face.name, new_face.tolerance or None
+                )
             except Exception as e:
                 logger.warning(f"Could not add face {new_face.name} to cache: {e}")
             
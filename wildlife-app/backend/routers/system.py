@@ -14,13 +14,13 @@ from fastapi.responses import JSONResponse
 from sqlalchemy import func, text
 
 try:
-    from ..services.motioneye import motioneye_client
+    from ..services.motioneye import get_motioneye_client
     from ..services.speciesnet import speciesnet_processor
     from ..utils.caching import get_cached, set_cached
     from ..database import Detection, Camera
     from ..services.notifications import notification_service
 except ImportError:
-    from services.motioneye import motioneye_client
+    from services.motioneye import get_motioneye_client
     from services.speciesnet import speciesnet_processor
     from utils.caching import get_cached, set_cached
     from database import Detection, Camera
@@ -162,8 +162,7 @@ def setup_system_router(limiter: Limiter, get_db) -> APIRouter:
                 # Create tasks with reasonable timeouts
                 motioneye_task = asyncio.create_task(
                     asyncio.wait_for(
-                        asyncio.to_thread(motioneye_client.get_cameras) if hasattr(asyncio, 'to_thread')
-                        else asyncio.get_event_loop().run_in_executor(None, motioneye_client.get_cameras),
+                        get_motioneye_client().a_get_cameras(),
                         timeout=1.5  # Faster timeout - fail fast if offline
                     )
                 )
@@ -180,7 +179,7 @@ def setup_system_router(limiter: Limiter, get_db) -> APIRouter:
                 loop = asyncio.get_event_loop()
                 motioneye_task = asyncio.create_task(
                     asyncio.wait_for(
-                        loop.run_in_executor(None, motioneye_client.get_cameras),
+                        get_motioneye_client().a_get_cameras(),
                         timeout=1.5  # Faster timeout - fail fast if offline
                     )
                 )
@@ -402,9 +401,8 @@ def setup_system_router(limiter: Limiter, get_db) -> APIRouter:
             motioneye_response_time = None
             motioneye_error = None
             try:
-                loop = asyncio.get_event_loop()
                 motioneye_status = await asyncio.wait_for(
-                    loop.run_in_executor(None, motioneye_client.get_status),
+                    get_motioneye_client().a_get_status(),
                     timeout=30.0  # Increased from 3s to 30s to handle slow MotionEye responses
                 )
                 motioneye_response_time = (time.time() - motioneye_start) * 1000
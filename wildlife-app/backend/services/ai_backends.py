@@ -2,7 +2,7 @@ import os
 import time
 import logging
 import tempfile
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from abc import ABC, abstractmethod
 from pathlib import Path
 
@@ -115,6 +115,15 @@ class AIBackend(ABC):
         """
         pass
     
+    def predict_batch(self, image_paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        Predict species for several images, one result per image (in order)
+        
+        Backends that can run a batch through the model in one call override
+        this; the default predicts the images one by one.
+        """
+        return [self.predict(image_path) for image_path in image_paths]
+    
     @abstractmethod
     def get_name(self) -> str:
         """Get backend name"""
@@ -281,30 +290,7 @@ class YOLOv8Backend(AIBackend):
             }
         
         try:
-            results = self.model(image_path)
-            
-            # YOLO returns detections with class names and confidence
-            predictions = []
-            for result in results:
-                boxes = result.boxes
-                for box in boxes:
-                    class_id = int(box.cls[0])
-                    confidence = float(box.conf[0])
-                    class_name = result.names[class_id]
-                    
-                    predictions.append({
-                        "prediction": class_name,
-                        "prediction_score": confidence
-                    })
-            
-            # Sort by confidence
-            predictions.sort(key=lambda x: x["prediction_score"], reverse=True)
-            
-            return {
-                "predictions": predictions[:5],  # Top 5
-                "model": f"yolov{self.version}",
-                "confidence": predictions[0]["prediction_score"] if predictions else 0.0
-            }
+            return self._format_results(self.model(image_path))
         except Exception as e:
             logger.error(f"YOLOv{self.version} prediction error: {e}")
             return {
@@ -313,6 +299,44 @@ class YOLOv8Backend(AIBackend):
                 "error": str(e)
             }
     
+    def predict_batch(self, image_paths: List[str]) -> List[Dict[str, Any]]:
+        """Predict several still images in one batched model call"""
+        # Videos yield one result per frame, so they can't share a batch
+        if not self.is_available() or len(image_paths) < 2 or any(is_video_file(p) for p in image_paths):
+            return super().predict_batch(image_paths)
+        
+        try:
+            results = self.model(image_paths, batch=len(image_paths))
+        except Exception as e:
+            logger.warning(f"YOLOv{self.version} batch prediction failed, predicting images one by one: {e}")
+            return super().predict_batch(image_paths)
+        return [self._format_results([result]) for result in results]
+    
+    def _format_results(self, results) -> Dict[str, Any]:
+        """Convert YOLO results for one image (or video) to the prediction dict"""
+        # YOLO returns detections with class names and confidence
+        predictions = []
+        for result in results:
+            boxes = result.boxes
+            for box in boxes:
+                class_id = int(box.cls[0])
+                confidence = float(box.conf[0])
+                class_name = result.names[class_id]
+                
+                predictions.append({
+                    "prediction": class_name,
+                    "prediction_score": confidence
+                })
+        
+        # Sort by confidence
+        predictions.sort(key=lambda x: x["prediction_score"], reverse=True)
+        
+        return {
+            "predictions": predictions[:5],  # Top 5
+            "model": f"yolov{self.version}",
+            "confidence": predictions[0]["prediction_score"] if predictions else 0.0
+        }
+    
     def get_name(self) -> str:
         return f"YOLOv{self.version}"
 
@@ -631,34 +655,48 @@ class EnsembleBackend(AIBackend):
     
     def predict(self, image_path: str, db_session=None) -> Dict[str, Any]:
         """Predict using ensemble of models - only uses enabled backends"""
+        return self.predict_batch([image_path], db_session=db_session)[0]
+    
+    def predict_batch(self, image_paths: List[str], db_session=None) -> List[Dict[str, Any]]:
+        """Predict several images, handing each enabled backend the whole batch"""
         enabled_backends = self._get_enabled_backends(db_session)
         
         if not enabled_backends:
-            return {
+            return [{
                 "predictions": [],
                 "model": "ensemble",
                 "error": "No enabled backends available"
-            }
+            } for _ in image_paths]
         
         # Get predictions from all enabled backends
-        all_predictions = {}
-        model_names = []
-        
+        backend_results = []
         for backend in enabled_backends:
             try:
-                result = backend.predict(image_path)
-                if "error" not in result:
-                    model_names.append(backend.get_name())
-                    for pred in result.get("predictions", []):
-                        species = pred["prediction"]
-                        score = pred["prediction_score"]
-                        
-                        if species not in all_predictions:
-                            all_predictions[species] = []
-                        all_predictions[species].append(score)
+                backend_results.append((backend, backend.predict_batch(image_paths)))
             except Exception as e:
                 logger.warning(f"Backend {backend.get_name()} failed: {e}")
         
+        return [
+            self._combine([(backend, results[i]) for backend, results in backend_results], enabled_backends, db_session)
+            for i in range(len(image_paths))
+        ]
+    
+    def _combine(self, results: List[Tuple[AIBackend, Dict[str, Any]]], enabled_backends: List[AIBackend], db_session=None) -> Dict[str, Any]:
+        """Combine one image's (backend, result) pairs into the ensemble result"""
+        all_predictions = {}
+        model_names = []
+        
+        for backend, result in results:
+            if "error" not in result:
+                model_names.append(backend.get_name())
+                for pred in result.get("predictions", []):
+                    species = pred["prediction"]
+                    score = pred["prediction_score"]
+                    
+                    if species not in all_predictions:
+                        all_predictions[species] = []
+                    all_predictions[species].append(score)
+        
         # Combine predictions (weighted average)
         combined = []
         for species, scores in all_predictions.items():
@@ -1056,6 +1094,60 @@ class AIBackendManager:
                 "error": str(e)
             }
 
+    
+    def predict_batch(self, image_paths: List[str], backend_name: Optional[str] = None, db_session=None) -> List[Dict[str, Any]]:
+        """
+        Predict several images with one backend call where the backend supports it
+        
+        Args:
+            image_paths: Images to classify
+            backend_name: Backend to use (default backend if None)
+            db_session: Session for the enabled-model settings
+            
+        Returns:
+            One result per image, in order, shaped like predict()'s
+        """
+        if len(image_paths) == 1:
+            return [self.predict(image_paths[0], backend_name=backend_name, db_session=db_session)]
+        
+        backend_to_use = backend_name or self.default_backend
+        backend = self.get_backend(backend_name, db_session=db_session)
+        if not backend:
+            logger.warning(f"Backend '{backend_to_use}' not available. Available backends: {list(self.backends.keys())}")
+            return [{
+                "predictions": [],
+                "error": f"Backend '{backend_to_use}' not available"
+            } for _ in image_paths]
+        
+        start_time = time.time()
+        try:
+            if isinstance(backend, EnsembleBackend):
+                results = backend.predict_batch(image_paths, db_session=db_session)
+            else:
+                results = backend.predict_batch(image_paths)
+        except Exception as e:
+            logger.error(f"Batch prediction exception ({len(image_paths)} images): {e}")
+            results = [{"predictions": [], "error": str(e)} for _ in image_paths]
+        duration = time.time() - start_time
+        logger.debug(f"Batch of {len(image_paths)} predicted in {duration*1000:.2f}ms")
+        
+        # Record metrics per image, sharing the batch time between them
+        try:
+            from .ai_metrics import ai_metrics_tracker
+            for result in results:
+                success = "error" not in result
+                ai_metrics_tracker.record_prediction(
+                    backend_name=backend_to_use,
+                    inference_time=duration / len(image_paths),
+                    success=success,
+                    confidence=result.get("confidence", 0.0) if success else None,
+                    error=result.get("error") if not success else None
+                )
+        except ImportError:
+            pass
+        
+        return results
+
 
 # Global manager instance
 ai_backend_manager = AIBackendManager()
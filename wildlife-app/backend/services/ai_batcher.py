@@ -0,0 +1,129 @@
+"""Micro-batching of AI predictions across concurrent webhooks"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    from ..config import AI_BATCH_WINDOW_MS, AI_MAX_BATCH
+    from ..database import SessionLocal
+    from ..services.ai_backends import ai_backend_manager
+except (ImportError, ValueError):
+    from config import AI_BATCH_WINDOW_MS, AI_MAX_BATCH
+    from database import SessionLocal
+    from services.ai_backends import ai_backend_manager
+
+logger = logging.getLogger(__name__)
+
+# Model inference runs here, off the event loop. A single worker: the backends
+# share model instances (ultralytics predictors, torch, ONNX sessions) that
+# aren't thread-safe, so batches run one at a time, as predict calls did on
+# the loop; batching is what provides the throughput
+_ai_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-predict")
+
+
+def _predict_batch(file_paths: List[str], backend_name: Optional[str]) -> List[Dict[str, Any]]:
+    """Predict a batch in a worker thread with its own session
+    
+    Sessions aren't thread-safe and a request's session may be closed
+    while its batch is still running, so the enabled-model settings are
+    read through a session owned by this call.
+    """
+    db = SessionLocal()
+    try:
+        return ai_backend_manager.predict_batch(file_paths, backend_name=backend_name, db_session=db)
+    finally:
+        db.close()
+
+
+class AIBatcher:
+    """Coalesce predictions requested close together into predict_batch calls
+    
+    The first request opens a short window; everything queued before it
+    closes (or until max_batch is reached) is predicted in one backend call,
+    so GPU backends amortize their per-call overhead over the whole burst.
+    """
+    
+    def __init__(self, max_batch: int = AI_MAX_BATCH, window_ms: float = AI_BATCH_WINDOW_MS):
+        self.max_batch = max(1, max_batch)
+        self.window = max(0.0, window_ms) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def predict(self, file_path: str, backend_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Predict one image, batched with other images submitted meanwhile
+        
+        Args:
+            file_path: Image to classify
+            backend_name: Backend to use (default backend if None)
+            
+        Returns:
+            The same result ai_backend_manager.predict would return
+        """
+        loop = asyncio.get_running_loop()
+        if self.max_batch == 1 or self.window == 0:
+            results = await loop.run_in_executor(_ai_executor, partial(_predict_batch, [file_path], backend_name))
+            return results[0]
+        
+        future = loop.create_future()
+        await self.submit(file_path, future, backend_name=backend_name)
+        return await future
+    
+    async def submit(self, file_path: str, future: asyncio.Future, backend_name: Optional[str] = None):
+        """Queue an image; its result (or exception) is set on future"""
+        loop = asyncio.get_running_loop()
+        # Queues and tasks belong to one event loop; start over if it changed
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._collect())
+        await self._queue.put((file_path, backend_name, future))
+    
+    async def _collect(self):
+        """Gather queued requests into batches and dispatch them"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Requests for different backends can't share a model call
+            by_backend: Dict[Optional[str], List[Tuple[str, asyncio.Future]]] = {}
+            for file_path, backend_name, future in batch:
+                by_backend.setdefault(backend_name, []).append((file_path, future))
+            # Don't wait for inference; the single-worker executor runs batches in turn
+            for backend_name, items in by_backend.items():
+                loop.create_task(self._run_batch(backend_name, items))
+    
+    async def _run_batch(self, backend_name: Optional[str], items: List[Tuple[str, asyncio.Future]]):
+        """Predict one batch in the executor and resolve its futures"""
+        file_paths = [file_path for file_path, _ in items]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                _ai_executor, partial(_predict_batch, file_paths, backend_name)
+            )
+        except Exception as e:
+            logger.error(f"AI batch of {len(items)} failed: {e}")
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), result in zip(items, results):
+            # The waiting request may have been cancelled meanwhile
+            if not future.done():
+                future.set_result(result)
+
+
+# Global batcher instance
+ai_batcher = AIBatcher()
@@ -1,10 +1,13 @@
 """Auto-zip service for compressing old images"""
+import io
 import os
 import logging
 import zipfile
 import shutil
+import time
+from itertools import groupby
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 
@@ -17,6 +20,32 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Zstandard entries (Python 3.14+) compress several times faster than DEFLATE
+# at a similar ratio; older interpreters fall back to DEFLATE.
+ZIP_COMPRESSION = getattr(zipfile, "ZIP_ZSTANDARD", zipfile.ZIP_DEFLATED)
+
+# Media formats that are already entropy-coded; compressing them again costs
+# CPU for no meaningful size reduction, so they are stored as-is.
+PRECOMPRESSED_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".webp", ".gif", ".mp4", ".avi", ".mkv"})
+
+# Buffer size for archive I/O (1 MiB instead of the 8 KiB default)
+ZIP_IO_BUFFER_SIZE = 1 << 20
+
+# Months whose images total less than this are zipped in memory first
+IN_MEMORY_ZIP_LIMIT = 64 * 1024 * 1024
+
+# Seconds a computed retention cutoff stays valid
+CUTOFF_CACHE_TTL = 60
+
+
+def _zip_info_from_stat(arcname: str, st: os.stat_result, compress_type: int) -> zipfile.ZipInfo:
+    """Build a ZipInfo from an existing stat result (ZipInfo.from_file would stat again)"""
+    zip_info = zipfile.ZipInfo(arcname, time.localtime(st.st_mtime)[:6])
+    zip_info.external_attr = (st.st_mode & 0xFFFF) << 16
+    zip_info.file_size = st.st_size
+    zip_info.compress_type = compress_type
+    return zip_info
+
 
 class AutoZipService:
     """Service for automatically zipping old images"""
@@ -24,6 +53,24 @@ class AutoZipService:
     def __init__(self):
         self.archive_root = "./archived_photos"
         self.zip_root = "./archived_photos/zipped"
+        # (retention_months, cutoff_date, expires_at) for get_cutoff_date
+        self._cutoff_cache: Optional[Tuple[int, datetime, float]] = None
+    
+    def get_cutoff_date(self, retention_months: int) -> datetime:
+        """
+        Get the zip cutoff date for a retention period
+        
+        The value is cached for CUTOFF_CACHE_TTL seconds so repeated checks
+        (and the status/zip calls made together) share one consistent cutoff.
+        """
+        now = time.monotonic()
+        cached = self._cutoff_cache
+        if cached and cached[0] == retention_months and cached[2] > now:
+            return cached[1]
+        
+        cutoff_date = datetime.utcnow() - timedelta(days=retention_months * 30)
+        self._cutoff_cache = (retention_months, cutoff_date, now + CUTOFF_CACHE_TTL)
+        return cutoff_date
     
     def get_config(self, db: Session) -> Dict[str, Any]:
         """Get auto-zip configuration from settings"""
@@ -39,7 +86,7 @@ class AutoZipService:
         if not detection.timestamp:
             return False
         
-        cutoff_date = datetime.utcnow() - timedelta(days=retention_months * 30)
+        cutoff_date = self.get_cutoff_date(retention_months)
         return detection.timestamp < cutoff_date
     
     def zip_images(
@@ -59,80 +106,101 @@ class AutoZipService:
         Returns:
             Dictionary with zip operation results
         """
-        cutoff_date = datetime.utcnow() - timedelta(days=retention_months * 30)
+        cutoff_date = self.get_cutoff_date(retention_months)
         
-        # Find detections older than cutoff
-        old_detections = db.query(Detection).filter(
+        # Stream old detections in timestamp order so each month arrives as a
+        # contiguous run; only one month's batch is held in memory at a time.
+        old_detections = db.query(Detection.image_path, Detection.timestamp).filter(
             Detection.timestamp < cutoff_date,
             Detection.image_path.isnot(None)
-        ).all()
-        
-        if not old_detections:
-            return {
-                "zipped": 0,
-                "skipped": 0,
-                "errors": 0,
-                "message": "No images to zip"
-            }
+        ).order_by(Detection.timestamp).yield_per(1000)
         
         # Group by month for organized zipping
         zipped_count = 0
         skipped_count = 0
         error_count = 0
         zip_files_created = []
+        found_any = False
         
         # Create zip root directory
         zip_root = Path(self.zip_root)
         if not dry_run:
             zip_root.mkdir(parents=True, exist_ok=True)
         
-        # Group detections by year-month
-        detections_by_month = {}
-        for det in old_detections:
-            if not det.image_path or not os.path.exists(det.image_path):
-                skipped_count += 1
+        for year_month, rows in groupby(old_detections, key=lambda row: row.timestamp.strftime("%Y-%m")):
+            found_any = True
+            
+            # Collect this month's images, stat'ing each file exactly once
+            stat_cache: Dict[str, os.stat_result] = {}
+            for row in rows:
+                try:
+                    stat_cache[row.image_path] = os.stat(row.image_path)
+                except OSError:
+                    skipped_count += 1
+            
+            if not stat_cache:
                 continue
             
-            # Get year-month key
-            year_month = det.timestamp.strftime("%Y-%m")
-            if year_month not in detections_by_month:
-                detections_by_month[year_month] = []
-            detections_by_month[year_month].append(det)
-        
-        # Create zip files for each month
-        for year_month, detections in detections_by_month.items():
             zip_filename = f"detections_{year_month}.zip"
             zip_path = zip_root / zip_filename
             
             if not dry_run:
                 try:
-                    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                        for det in detections:
-                            try:
-                                image_path = Path(det.image_path)
-                                if image_path.exists():
+                    # Small months are assembled in memory and written with a
+                    # single write(); larger ones stream through a big buffer
+                    month_bytes = sum(st.st_size for st in stat_cache.values())
+                    in_memory = month_bytes < IN_MEMORY_ZIP_LIMIT
+                    if in_memory:
+                        zip_fp = io.BytesIO()
+                    else:
+                        zip_fp = open(zip_path, 'wb', buffering=ZIP_IO_BUFFER_SIZE)
+                    try:
+                        with zipfile.ZipFile(zip_fp, 'w', ZIP_COMPRESSION) as zip_file:
+                            for image_path in stat_cache:
+                                try:
                                     # Add to zip with relative path
-                                    zip_file.write(image_path, image_path.name)
+                                    if os.path.splitext(image_path)[1].lower() in PRECOMPRESSED_EXTENSIONS:
+                                        compress_type = zipfile.ZIP_STORED
+                                    else:
+                                        compress_type = ZIP_COMPRESSION
+                                    zip_info = _zip_info_from_stat(
+                                        os.path.basename(image_path), stat_cache[image_path], compress_type
+                                    )
+                                    with open(image_path, 'rb', buffering=ZIP_IO_BUFFER_SIZE) as src, \
+                                            zip_file.open(zip_info, 'w') as dst:
+                                        shutil.copyfileobj(src, dst, ZIP_IO_BUFFER_SIZE)
                                     zipped_count += 1
                                     
                                     # Optionally delete original after zipping
                                     # Uncomment if you want to delete originals:
-                                    # image_path.unlink()
-                                else:
-                                    skipped_count += 1
-                            except Exception as e:
-                                logger.error(f"Error adding {det.image_path} to zip: {e}")
-                                error_count += 1
+                                    # os.remove(image_path)
+                                except Exception as e:
+                                    logger.error(f"Error adding {image_path} to zip: {e}")
+                                    error_count += 1
+                        
+                        if in_memory:
+                            with open(zip_path, 'wb') as f, zip_fp.getbuffer() as view:
+                                f.write(view)
+                    finally:
+                        zip_fp.close()
                     
                     zip_files_created.append(str(zip_path))
-                    logger.info(f"Created zip file: {zip_path} with {len(detections)} images")
+                    logger.info(f"Created zip file: {zip_path} with {len(stat_cache)} images")
                     
                 except Exception as e:
                     logger.error(f"Error creating zip file {zip_path}: {e}")
-                    error_count += len(detections)
+                    error_count += len(stat_cache)
             else:
                 # Dry run - just count
-                zipped_count += len(detections)
+                zipped_count += len(stat_cache)
+        
+        if not found_any:
+            return {
+                "zipped": 0,
+                "skipped": 0,
+                "errors": 0,
+                "message": "No images to zip"
+            }
         
         return {
             "zipped": zipped_count,
@@ -149,7 +217,7 @@ class AutoZipService:
         
         # Count images that would be zipped
         if config["enabled"]:
-            cutoff_date = datetime.utcnow() - timedelta(days=config["retention_months"] * 30)
+            cutoff_date = self.get_cutoff_date(config["retention_months"])
             count = db.query(Detection).filter(
                 Detection.timestamp < cutoff_date,
                 Detection.image_path.isnot(None)
@@ -158,19 +226,30 @@ class AutoZipService:
             count = 0
         
         # Get zip files info
-        zip_root = Path(self.zip_root)
-        zip_files = []
+        zip_entries = []
         total_zip_size = 0
         
-        if zip_root.exists():
-            for zip_file in zip_root.glob("*.zip"):
-                size = zip_file.stat().st_size
-                total_zip_size += size
-                zip_files.append({
-                    "filename": zip_file.name,
-                    "size_mb": round(size / (1024 * 1024), 2),
-                    "modified": datetime.fromtimestamp(zip_file.stat().st_mtime).isoformat()
-                })
+        try:
+            with os.scandir(self.zip_root) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".zip") or not entry.is_file():
+                        continue
+                    st = entry.stat()
+                    total_zip_size += st.st_size
+                    zip_entries.append((entry.name, st))
+        except FileNotFoundError:
+            pass
+        
+        # Newest archives first
+        zip_entries.sort(key=lambda item: item[1].st_mtime, reverse=True)
+        zip_files = [
+            {
+                "filename": name,
+                "size_mb": round(st.st_size / (1024 * 1024), 2),
+                "modified": datetime.fromtimestamp(st.st_mtime).isoformat()
+            }
+            for name, st in zip_entries
+        ]
         
         return {
             "enabled": config["enabled"],
@@ -1,10 +1,14 @@
 """Automated database backup service"""
 import os
+import hashlib
+import shutil
 import subprocess
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from stat import S_ISDIR
+from typing import Dict, Optional
 
 try:
     from ..config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD, DATABASE_URL
@@ -13,6 +17,34 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Suffix of the sha256sum-style manifest written next to each backup
+CHECKSUM_SUFFIX = ".sha256"
+
+
+def _backup_size(backup_path: Path, stat: Optional[os.stat_result] = None) -> int:
+    """Total size in bytes of a backup file or directory-format dump"""
+    if stat is None:
+        stat = backup_path.stat()
+    if not S_ISDIR(stat.st_mode):
+        return stat.st_size
+    total = 0
+    with os.scandir(backup_path) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False):
+                total += entry.stat(follow_symlinks=False).st_size
+    return total
+
+
+def _checksum_path(backup_path: Path) -> Path:
+    """Sibling file holding the SHA-256 manifest for a backup"""
+    return backup_path.with_name(backup_path.name + CHECKSUM_SUFFIX)
+
+
+def _file_sha256(file_path: Path) -> str:
+    """SHA-256 of a file via hashlib.file_digest (OpenSSL, releases the GIL)"""
+    with open(file_path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
 
 class BackupService:
     """Service for automated database backups"""
@@ -39,22 +71,27 @@ class BackupService:
         self.db_name = DB_NAME
         self.db_user = DB_USER
         self.db_password = DB_PASSWORD
+        # Parallel pg_dump/pg_restore workers (directory format only)
+        self.jobs = os.cpu_count() or 4
     
     def create_backup(self, filename: Optional[str] = None) -> Optional[Path]:
         """
         Create a database backup using pg_dump
         
+        Uses pg_dump's directory format so tables are dumped (and compressed)
+        by parallel worker processes instead of a single stream.
+        
         Args:
-            filename: Optional custom filename (defaults to timestamp-based name)
+            filename: Optional custom directory name (defaults to timestamp-based name)
         
         Returns:
-            Path to backup file if successful, None otherwise
+            Path to backup directory if successful, None otherwise
         """
         try:
             # Generate filename if not provided
             if not filename:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"wildlife_backup_{timestamp}.sql"
+                filename = f"wildlife_backup_{timestamp}"
             
             backup_path = self.backup_dir / filename
             
@@ -69,11 +106,12 @@ class BackupService:
                 '-p', str(self.db_port),
                 '-U', self.db_user,
                 '-d', self.db_name,
-                '-F', 'c',  # Custom format (compressed)
+                '-F', 'd',  # Directory format (one compressed file per table)
+                '-j', str(self.jobs),
                 '-f', str(backup_path)
             ]
             
-            logger.info(f"Creating database backup: {backup_path}")
+            logger.info(f"Creating database backup: {backup_path} ({self.jobs} jobs)")
             
             # Run pg_dump
             result = subprocess.run(
@@ -84,16 +122,18 @@ class BackupService:
                 check=True
             )
             
-            if backup_path.exists() and backup_path.stat().st_size > 0:
-                file_size_mb = backup_path.stat().st_size / (1024 * 1024)
+            size_bytes = _backup_size(backup_path) if backup_path.exists() else 0
+            if size_bytes > 0:
+                file_size_mb = size_bytes / (1024 * 1024)
                 logger.info(f"Backup created successfully: {backup_path} ({file_size_mb:.2f} MB)")
+                self.write_checksums(backup_path)
                 return backup_path
             else:
-                logger.error(f"Backup file was not created or is empty: {backup_path}")
+                logger.error(f"Backup was not created or is empty: {backup_path}")
                 return None
                 
         except subprocess.CalledProcessError as e:
-            logger.error(f"pg_dump failed: {e.stderr}", exc_info=True)
+            logger.error(f"pg_dump failed: {e.stderr}")
             return None
         except Exception as e:
             logger.error(f"Failed to create backup: {e}", exc_info=True)
@@ -129,36 +169,109 @@ class BackupService:
                 '-d', self.db_name,
                 '--clean',  # Clean before restore
                 '--if-exists',  # Don't error if objects don't exist
-                str(backup_path)
             ]
             
-            result = subprocess.run(
-                cmd,
-                env=env,
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            if backup_path.is_dir():
+                # Directory-format dumps can be restored in parallel
+                result = subprocess.run(
+                    cmd + ['-F', 'd', '-j', str(self.jobs), str(backup_path)],
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    check=True
+                )
+            elif backup_path.suffix == '.zst':
+                # Decompress on the fly and feed the archive to pg_restore via stdin
+                decompress_proc = subprocess.Popen(
+                    ['zstd', '-q', '-d', '-c', str(backup_path)],
+                    stdout=subprocess.PIPE
+                )
+                try:
+                    result = subprocess.run(
+                        cmd,
+                        env=env,
+                        stdin=decompress_proc.stdout,
+                        capture_output=True,
+                        text=True,
+                        check=True
+                    )
+                finally:
+                    decompress_proc.stdout.close()
+                    decompress_proc.wait()
+                if decompress_proc.returncode != 0:
+                    logger.error(f"zstd failed to decompress backup: {backup_path}")
+                    return False
+            else:
+                result = subprocess.run(
+                    cmd + [str(backup_path)],
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    check=True
+                )
             
             logger.info("Database restored successfully")
             return True
             
         except subprocess.CalledProcessError as e:
-            logger.error(f"pg_restore failed: {e.stderr}", exc_info=True)
+            logger.error(f"pg_restore failed: {e.stderr}")
             return False
         except Exception as e:
             logger.error(f"Failed to restore backup: {e}", exc_info=True)
             return False
     
-    def list_backups(self) -> list[Path]:
+    def write_checksums(self, backup_path: Path) -> Optional[Dict[str, str]]:
         """
-        List all backup files in backup directory
+        Compute SHA-256 digests for a backup and store them next to it
+        
+        Files of a directory-format dump are hashed concurrently; hashlib
+        releases the GIL while digesting, so the workers run in parallel.
+        
+        Args:
+            backup_path: Path to backup file or directory
         
         Returns:
-            List of backup file paths, sorted by modification time (newest first)
+            Mapping of relative file name to hex digest, or None on failure
         """
-        backups = list(self.backup_dir.glob("wildlife_backup_*.sql"))
-        backups.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+        try:
+            if backup_path.is_dir():
+                files = sorted(f for f in backup_path.iterdir() if f.is_file())
+            else:
+                files = [backup_path]
+            
+            with ThreadPoolExecutor(max_workers=max(1, min(len(files), self.jobs))) as executor:
+                digests = list(executor.map(_file_sha256, files))
+            
+            # Directory-format dumps are flat, so file names are unique
+            checksums = {f.name: digest for f, digest in zip(files, digests)}
+            _checksum_path(backup_path).write_text(
+                "".join(f"{digest}  {name}\n" for name, digest in checksums.items())
+            )
+            return checksums
+        except Exception as e:
+            logger.error(f"Failed to write checksums for {backup_path}: {e}", exc_info=True)
+            return None
+    
+    def list_backups(self) -> list[tuple[Path, os.stat_result]]:
+        """
+        List all backups in backup directory
+        
+        Returns:
+            List of (path, stat_result) tuples for backup directories (or legacy
+            .sql/.sql.zst files), sorted by modification time (newest first).
+            The stat result comes from a single scandir pass and can be passed
+            on to get_backup_info to avoid re-statting.
+        """
+        backups = []
+        with os.scandir(self.backup_dir) as entries:
+            for entry in entries:
+                if not entry.name.startswith("wildlife_backup_") or entry.name.endswith(CHECKSUM_SUFFIX):
+                    continue
+                try:
+                    backups.append((Path(entry.path), entry.stat(follow_symlinks=False)))
+                except OSError:
+                    continue
+        backups.sort(key=lambda item: item[1].st_mtime, reverse=True)
         return backups
     
     def cleanup_old_backups(self, keep_count: int = 10) -> int:
@@ -180,37 +293,55 @@ class BackupService:
         to_delete = backups[keep_count:]
         deleted_count = 0
         
-        for backup in to_delete:
+        for backup, stat in to_delete:
             try:
-                backup.unlink()
+                if S_ISDIR(stat.st_mode):
+                    shutil.rmtree(backup)
+                else:
+                    # Already gone counts as deleted; no need to re-check existence
+                    backup.unlink(missing_ok=True)
+                _checksum_path(backup).unlink(missing_ok=True)
                 deleted_count += 1
                 logger.info(f"Deleted old backup: {backup}")
-            except Exception as e:
+            except OSError as e:
                 logger.error(f"Failed to delete backup {backup}: {e}")
         
         return deleted_count
     
-    def get_backup_info(self, backup_path: Path) -> Optional[dict]:
+    def get_backup_info(self, backup_path: Path, stat: Optional[os.stat_result] = None) -> Optional[dict]:
         """
         Get information about a backup file
         
         Args:
             backup_path: Path to backup file
+            stat: Optional stat result from list_backups (skips a stat call)
         
         Returns:
             Dictionary with backup info or None if file doesn't exist
         """
-        if not backup_path.exists():
-            return None
+        if stat is None:
+            try:
+                stat = backup_path.stat()
+            except FileNotFoundError:
+                return None
+        
+        size_bytes = _backup_size(backup_path, stat)
+        modified = datetime.fromtimestamp(stat.st_mtime).isoformat()
+        
+        try:
+            manifest = _checksum_path(backup_path).read_text()
+            checksums = dict(reversed(line.split("  ", 1)) for line in manifest.splitlines() if line)
+        except FileNotFoundError:
+            checksums = None
         
-        stat = backup_path.stat()
         return {
             "filename": backup_path.name,
             "path": str(backup_path),
-            "size_bytes": stat.st_size,
-            "size_mb": round(stat.st_size / (1024 * 1024), 2),
-            "created": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-            "modified": datetime.fromtimestamp(stat.st_mtime).isoformat()
+            "size_bytes": size_bytes,
+            "size_mb": round(size_bytes / (1024 * 1024), 2),
+            "created": modified,
+            "modified": modified,
+            "sha256": checksums
         }
 
 
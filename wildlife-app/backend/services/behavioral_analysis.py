@@ -1,10 +1,20 @@
 """Behavioral analysis from AI predictions"""
 import logging
-from typing import Dict, Any, List, Optional, Set
+import re
+from typing import Dict, Any, FrozenSet, List, Optional, Set
 from collections import Counter
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+# Try to import pyahocorasick for single-pass multi-keyword matching
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+    logger.info("pyahocorasick not available. Install with: pip install pyahocorasick (optional, faster behavior matching)")
+
 # Behavioral keywords that might appear in predictions
 BEHAVIORAL_KEYWORDS = {
     "eating": ["eating", "feed", "feeding", "food", "foraging", "grazing", "consuming"],
@@ -27,6 +37,56 @@ BEHAVIORAL_OBJECTS = {
     "playing": ["toy", "ball"],
 }
 
+
+# Reverse index over both tables: keyword/object -> behavior
+KEYWORD_TO_BEHAVIOR: Dict[str, str] = {
+    keyword: behavior
+    for table in (BEHAVIORAL_KEYWORDS, BEHAVIORAL_OBJECTS)
+    for behavior, keywords in table.items()
+    for keyword in keywords
+}
+
+# Zero-width lookahead so overlapping keywords are all found, matching the
+# semantics of plain substring checks
+KEYWORDS_RE = re.compile(
+    "(?=(" + "|".join(map(re.escape, sorted(KEYWORD_TO_BEHAVIOR, key=len, reverse=True))) + "))"
+)
+
+if AHOCORASICK_AVAILABLE:
+    KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _keyword, _behavior in KEYWORD_TO_BEHAVIOR.items():
+        KEYWORD_AUTOMATON.add_word(_keyword, _behavior)
+    KEYWORD_AUTOMATON.make_automaton()
+
+
+@lru_cache(maxsize=1024)
+def _behaviors_in_text(pred_text: str) -> FrozenSet[str]:
+    """
+    Return the behaviors whose keywords or objects occur in a lowercased prediction text
+    
+    Models emit the same labels over and over, so results are cached per text.
+    """
+    if AHOCORASICK_AVAILABLE:
+        return frozenset(behavior for _, behavior in KEYWORD_AUTOMATON.iter(pred_text))
+    return frozenset(KEYWORD_TO_BEHAVIOR[keyword] for keyword in KEYWORDS_RE.findall(pred_text))
+
+
+def _match_behaviors(predictions: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+    """
+    Scan predictions once, mapping each detected behavior to the scores of
+    the predictions that triggered it
+    """
+    behavior_scores: Dict[str, List[float]] = {}
+    for pred in predictions:
+        matched = _behaviors_in_text(pred.get("prediction", "").lower())
+        if not matched:
+            continue
+        pred_score = pred.get("prediction_score", 0.0)
+        for behavior in matched:
+            behavior_scores.setdefault(behavior, []).append(pred_score)
+    return behavior_scores
+
+
 def extract_behavioral_info(predictions: List[Dict[str, Any]], model_name: str) -> List[str]:
     """
     Extract behavioral information from predictions
@@ -38,26 +98,7 @@ def extract_behavioral_info(predictions: List[Dict[str, Any]], model_name: str)
     Returns:
         List of detected behaviors
     """
-    behaviors = []
-    prediction_texts = [p.get("prediction", "").lower() for p in predictions]
-    
-    # Check for behavioral keywords in predictions
-    for behavior, keywords in BEHAVIORAL_KEYWORDS.items():
-        for keyword in keywords:
-            for pred_text in prediction_texts:
-                if keyword in pred_text:
-                    behaviors.append(behavior)
-                    break
-    
-    # Check for behavioral objects
-    for behavior, objects in BEHAVIORAL_OBJECTS.items():
-        for obj in objects:
-            for pred_text in prediction_texts:
-                if obj in pred_text:
-                    behaviors.append(behavior)
-                    break
-    
-    return list(set(behaviors))  # Remove duplicates
+    return list(_match_behaviors(predictions))
 
 
 def analyze_behavioral_consensus(all_results: Dict[str, Any]) -> Dict[str, Any]:
@@ -76,7 +117,7 @@ def analyze_behavioral_consensus(all_results: Dict[str, Any]) -> Dict[str, Any]:
             "confidence": {"eating": 0.8}  # Confidence scores for behaviors
         }
     """
-    all_behaviors = []
+    behavior_counts = Counter()
     behavior_by_model = {}
     behavior_scores = {}
     
@@ -85,30 +126,17 @@ def analyze_behavioral_consensus(all_results: Dict[str, Any]) -> Dict[str, Any]:
         if "error" in result or "predictions" not in result:
             continue
         
-        predictions = result.get("predictions", [])
-        behaviors = extract_behavioral_info(predictions, model_name)
+        # Behaviors and the scores of the predictions that triggered them,
+        # gathered in the same scan
+        matches = _match_behaviors(result.get("predictions", []))
         
-        if behaviors:
+        if matches:
+            behaviors = list(matches)
             behavior_by_model[model_name] = behaviors
-            all_behaviors.extend(behaviors)
+            behavior_counts.update(behaviors)
             
-            # Calculate confidence for behaviors based on prediction scores
-            for behavior in behaviors:
-                # Find the prediction that triggered this behavior
-                for pred in predictions:
-                    pred_text = pred.get("prediction", "").lower()
-                    behavior_keywords = BEHAVIORAL_KEYWORDS.get(behavior, []) + BEHAVIORAL_OBJECTS.get(behavior, [])
-                    
-                    for keyword in behavior_keywords:
-                        if keyword in pred_text:
-                            pred_score = pred.get("prediction_score", 0.0)
-                            if behavior not in behavior_scores:
-                                behavior_scores[behavior] = []
-                            behavior_scores[behavior].append(pred_score)
-                            break
-    
-    # Count behavior occurrences
-    behavior_counts = Counter(all_behaviors)
+            for behavior, scores in matches.items():
+                behavior_scores.setdefault(behavior, []).extend(scores)
     
     # Consensus behaviors (detected by 2+ models)
     consensus_behaviors = [
@@ -130,8 +158,10 @@ def analyze_behavioral_consensus(all_results: Dict[str, Any]) -> Dict[str, Any]:
             behavior_confidence[behavior] = sum(scores) / len(scores)
     
     return {
-        "behaviors": list(set(all_behaviors)),
+        "behaviors": list(behavior_counts),
         "consensus_behaviors": consensus_behaviors,
+        # Built once here so per-model enhance calls can reuse it
+        "consensus_behaviors_set": frozenset(consensus_behaviors),
         "unique_behaviors": unique_behaviors,
         "confidence": behavior_confidence,
         "by_model": behavior_by_model
@@ -155,7 +185,9 @@ def enhance_predictions_with_behavior(result: Dict[str, Any], behavioral_analysi
     model_behaviors = behavioral_analysis.get("by_model", {}).get(model_name, [])
     
     # Mark which behaviors are consensus (detected by multiple models)
-    consensus_behaviors = set(behavioral_analysis.get("consensus_behaviors", []))
+    consensus_behaviors = behavioral_analysis.get("consensus_behaviors_set")
+    if consensus_behaviors is None:
+        consensus_behaviors = frozenset(behavioral_analysis.get("consensus_behaviors", []))
     
     enhanced = result.copy()
     enhanced["behaviors"] = model_behaviors
@@ -163,13 +195,12 @@ def enhance_predictions_with_behavior(result: Dict[str, Any], behavioral_analysi
     
     # Add behavioral confidence if available
     if model_behaviors:
-        behavior_confidences = {}
-        for behavior in model_behaviors:
-            if behavior in behavioral_analysis.get("confidence", {}):
-                behavior_confidences[behavior] = behavioral_analysis["confidence"][behavior]
-            else:
-                behavior_confidences[behavior] = result.get("confidence", 0.0)
-        enhanced["behavior_confidence"] = behavior_confidences
+        confidence = behavioral_analysis.get("confidence", {})
+        default_confidence = result.get("confidence", 0.0)
+        enhanced["behavior_confidence"] = {
+            behavior: confidence.get(behavior, default_confidence)
+            for behavior in model_behaviors
+        }
     
     # Mark consensus behaviors
     enhanced["consensus_behaviors"] = [b for b in model_behaviors if b in consensus_behaviors]
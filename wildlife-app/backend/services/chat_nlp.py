@@ -1,5 +1,10 @@
 """NLP service for chat interface using Hugging Face models"""
+import asyncio
+import contextlib
 import logging
+import re
+import threading
+from collections import OrderedDict, deque
 from typing import Dict, Any, Optional, List, Tuple
 import json
 
@@ -14,18 +19,137 @@ except ImportError:
     TRANSFORMERS_AVAILABLE = False
     logger.warning("transformers not available - NLP features will be limited")
 
+# Try to import the asyncio Redis client for shared conversation context
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+try:
+    from ..config import REDIS_URL
+except ImportError:
+    from config import REDIS_URL
+
+# Try to import bitsandbytes for INT8 weights on GPU
+try:
+    import bitsandbytes  # noqa: F401
+    from transformers import BitsAndBytesConfig
+    BITSANDBYTES_AVAILABLE = True
+except ImportError:
+    BITSANDBYTES_AVAILABLE = False
+
+# Total token budget (prompt + reply) for DialoGPT generation
+MAX_RESPONSE_LENGTH = 150
+
+# Most tokens generated per reply; replies normally end earlier at a stop token
+MAX_NEW_TOKENS = 60
+
+# Queries/results remembered per chat session
+CONVERSATION_HISTORY_LENGTH = 10
+
+# Sessions kept in memory before the least recently used is evicted
+MAX_CONVERSATION_SESSIONS = 10000
+
+# Redis key prefix and idle expiry (seconds) for shared conversation context
+CONTEXT_KEY_PREFIX = "nlp:ctx:"
+CONVERSATION_CONTEXT_TTL = 3600
+
+# Prompt lengths that compiled CUDA decode is warmed up (and graph-captured) for
+PROMPT_BUCKETS = (32, 64, 128)
+
+# Concurrent generate requests are collected for up to BATCH_WINDOW_SECONDS
+# and run as a single padded batch of at most MAX_BATCH_SIZE prompts
+BATCH_WINDOW_SECONDS = 0.005
+MAX_BATCH_SIZE = 8
+
+# Structured results whose template answer is used for simple count/list queries
+_TEMPLATABLE_TYPES = frozenset({"count", "list"})
+_FAST_INTENTS = re.compile(r"\b(how many|count|show|list)\b", re.IGNORECASE)
+
+# Query suggestion rules: (trigger keywords, suggestions), applied in order
+_SUGGESTION_RULES = (
+    (("how many", "count"), (
+        "Show me all detections",
+        "What species were detected?",
+        "Show detections from last week"
+    )),
+    (("show", "list"), (
+        "How many total detections?",
+        "What's the most common species?",
+        "Show high confidence detections"
+    )),
+    (("species", "animal"), (
+        "Show all detections",
+        "What cameras have the most detections?",
+        "Show recent detections"
+    )),
+)
+_SUGGESTION_RULE_INDEX = {
+    keyword: index
+    for index, (keywords, _) in enumerate(_SUGGESTION_RULES)
+    for keyword in keywords
+}
+_SUGGESTION_PATTERN = re.compile("|".join(map(re.escape, _SUGGESTION_RULE_INDEX)))
+_TIME_SUGGESTIONS = (
+    "Show detections from last 24 hours",
+    "What was detected this week?",
+    "Show high confidence detections"
+)
+
 
 class ChatNLPService:
     """NLP service for natural language understanding and generation"""
     
-    def __init__(self):
+    def __init__(self, lazy: bool = True):
+        """
+        Initialize NLP service
+        
+        Args:
+            lazy: Defer model loading until the first NLP request (default).
+                  Processes that never serve chat then never load the models.
+        """
         self.qa_pipeline = None
         self.text_generator = None
         self.tokenizer = None
         self.model = None
-        self.conversation_context = {}  # Store conversation context per user/session
+        # Conversation context per user/session, in least-recently-used order.
+        # Shared through Redis when REDIS_URL is set; this local store is the fallback.
+        self.conversation_context: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._redis = aioredis.from_url(REDIS_URL) if REDIS_AVAILABLE and REDIS_URL else None
         self.available = False
-        self._try_load_models()
+        self._compiled_decode = False
+        self._load_lock = threading.Lock()
+        self._load_attempted = False
+        # Token IDs of the fixed prompt scaffolding, encoded once at load time
+        self._prompt_user: List[int] = []
+        self._prompt_context: List[int] = []
+        self._prompt_assistant: List[int] = []
+        # Generation ends at EOS or at the end of the first sentence/line
+        self._stop_token_ids: List[int] = []
+        # Micro-batching queue of ((query, context_text), future), bound to the serving event loop
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+        if not lazy:
+            self._ensure_loaded()
+    
+    def _ensure_loaded(self):
+        """Load models once, on first use; concurrent callers wait for the same load"""
+        if self._load_attempted:
+            return
+        with self._load_lock:
+            if self._load_attempted:
+                return
+            try:
+                self._try_load_models()
+            finally:
+                self._load_attempted = True
+    
+    async def ensure_loaded(self):
+        """Load models on first use in a worker thread, keeping the event loop free"""
+        if not TRANSFORMERS_AVAILABLE or self._load_attempted:
+            return
+        await asyncio.to_thread(self._ensure_loaded)
     
     def _try_load_models(self):
         """Try to load NLP models from Hugging Face"""
@@ -35,6 +159,8 @@ class ChatNLPService:
         
         try:
             device = "cuda" if torch.cuda.is_available() else "cpu"
+            # Half precision on GPU uses Tensor Cores and halves activation/KV-cache traffic
+            dtype = torch.float16 if device == "cuda" else torch.float32
             
             # Load question answering model (lighter, faster)
             try:
@@ -42,7 +168,8 @@ class ChatNLPService:
                 self.qa_pipeline = pipeline(
                     "question-answering",
                     model="distilbert-base-uncased-distilled-squad",
-                    device=0 if device == "cuda" else -1
+                    device=0 if device == "cuda" else -1,
+                    torch_dtype=dtype
                 )
                 logger.info("Question answering model loaded successfully")
             except Exception as e:
@@ -52,10 +179,40 @@ class ChatNLPService:
             try:
                 # Use a smaller conversational model
                 model_name = "microsoft/DialoGPT-small"  # Lighter than medium/large
-                self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-                self.model = AutoModelForCausalLM.from_pretrained(model_name)
-                if device == "cuda":
-                    self.model = self.model.to(device)
+                # Rust-backed tokenizer; the Python BPE implementation is far slower
+                self.tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+                # GPT-2 BPE attaches a leading space to the following word, so the
+                # literals end before the space and the dynamic parts start with it
+                self._prompt_user = self.tokenizer.encode("User:")
+                self._prompt_context = self.tokenizer.encode("\nContext:")
+                self._prompt_assistant = self.tokenizer.encode("\nAssistant:")
+                self._stop_token_ids = [
+                    self.tokenizer.eos_token_id,
+                    self.tokenizer.encode("\n")[0],
+                    self.tokenizer.encode(".")[0]
+                ]
+                if device == "cuda" and BITSANDBYTES_AVAILABLE:
+                    # INT8 weights halve memory and weight bandwidth during decode
+                    self.model = AutoModelForCausalLM.from_pretrained(
+                        model_name,
+                        quantization_config=BitsAndBytesConfig(load_in_8bit=True),
+                        torch_dtype=dtype,
+                        device_map="auto"
+                    )
+                    self.model.eval()
+                else:
+                    self.model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=dtype)
+                    # Inference only: disable dropout before compiling/quantizing
+                    self.model.eval()
+                    if device == "cuda":
+                        self.model = self.model.to(device)
+                        self._enable_compiled_decode()
+                    else:
+                        # Dynamic INT8 quantization of the Linear layers (the
+                        # vocabulary projection dominates decode cost on CPU)
+                        self.model = torch.quantization.quantize_dynamic(
+                            self.model, {torch.nn.Linear}, dtype=torch.qint8
+                        )
                 self.text_generator = None  # Will use model directly
                 logger.info("Text generation model loaded successfully")
             except Exception as e:
@@ -67,9 +224,67 @@ class ChatNLPService:
             logger.warning(f"Failed to load NLP models: {e}")
             self.available = False
     
+    def _enable_compiled_decode(self):
+        """
+        Use a preallocated StaticCache and a torch.compile'd forward for decode
+        
+        Fixed tensor shapes let the compiled graph be reused every step. The
+        warmup generate pays the compile cost at load time instead of on the
+        first user request; if the model or transformers version does not
+        support static caching, the eager path is restored.
+        """
+        original_forward = self.model.forward
+        try:
+            self.model.generation_config.cache_implementation = "static"
+            self.model.forward = torch.compile(original_forward, mode="reduce-overhead", fullgraph=True)
+            
+            # Capture one set of CUDA graphs per prompt bucket, largest first so
+            # the static cache is allocated once at its maximum length. Warm up
+            # under inference_mode, as requests run, so the graphs are reused.
+            with torch.inference_mode():
+                for bucket in sorted(PROMPT_BUCKETS, reverse=True):
+                    warmup_inputs = torch.full(
+                        (1, bucket), self.tokenizer.eos_token_id, dtype=torch.long, device=self.model.device
+                    )
+                    self.model.generate(
+                        warmup_inputs,
+                        attention_mask=torch.ones_like(warmup_inputs),
+                        max_new_tokens=MAX_NEW_TOKENS,
+                        do_sample=False,
+                        pad_token_id=self.tokenizer.eos_token_id
+                    )
+            self._compiled_decode = True
+            logger.info("Compiled static-cache decode enabled for text generation model")
+        except Exception as e:
+            logger.warning(f"Static cache/torch.compile unavailable, using eager decode: {e}")
+            self.model.generation_config.cache_implementation = None
+            self.model.forward = original_forward
+    
+    def _pad_to_bucket(self, input_ids, attention_mask):
+        """
+        Left-pad prompt token IDs to the next PROMPT_BUCKETS size
+        
+        Keeps prefill shapes to a handful of sizes so the CUDA graphs captured
+        during warmup are replayed instead of recaptured for every new length.
+        
+        Returns:
+            Tuple of (input_ids, attention_mask)
+        """
+        prompt_len = input_ids.shape[-1]
+        bucket = next((b for b in PROMPT_BUCKETS if b >= prompt_len), None)
+        if bucket is None or bucket == prompt_len:
+            return input_ids, attention_mask
+        
+        pad = bucket - prompt_len
+        input_ids = torch.nn.functional.pad(input_ids, (pad, 0), value=self.tokenizer.eos_token_id)
+        attention_mask = torch.nn.functional.pad(attention_mask, (pad, 0), value=0)
+        return input_ids, attention_mask
+    
     def is_available(self) -> bool:
-        """Check if NLP models are available"""
-        return self.available and TRANSFORMERS_AVAILABLE
+        """Check if NLP models are loaded (never triggers a load; see ensure_loaded)"""
+        if not TRANSFORMERS_AVAILABLE:
+            return False
+        return self.available
     
     def extract_entities(self, query: str) -> Dict[str, Any]:
         """Extract entities from query using NLP"""
@@ -87,8 +302,17 @@ class ChatNLPService:
         
         return entities
     
-    def generate_response(self, query: str, context: Dict[str, Any], result: Dict[str, Any]) -> str:
-        """Generate natural language response using NLP model"""
+    async def generate_response(self, query: str, context: Dict[str, Any], result: Dict[str, Any],
+                                force_nlp: bool = False) -> str:
+        """
+        Generate natural language response using NLP model
+        
+        Simple count/list questions are answered from the template without
+        running the model unless force_nlp is set.
+        """
+        if not force_nlp and result.get('type') in _TEMPLATABLE_TYPES and _FAST_INTENTS.search(query):
+            return self._generate_template_response(query, result)
+        
         if not self.is_available() or not self.model:
             # Fallback to template-based generation
             return self._generate_template_response(query, result)
@@ -97,36 +321,138 @@ class ChatNLPService:
             # Build context for generation
             context_text = self._build_context_text(context, result)
             
-            # Prepare prompt
-            if context_text:
-                prompt = f"User: {query}\nContext: {context_text}\nAssistant:"
-            else:
-                prompt = f"User: {query}\nAssistant:"
+            # Generate response as part of the next micro-batch
+            self._ensure_batch_loop()
+            future = asyncio.get_running_loop().create_future()
+            self._batch_queue.put_nowait(((query, context_text), future))
+            response = await future
             
-            # Generate response
-            inputs = self.tokenizer.encode(prompt, return_tensors="pt")
-            if torch.cuda.is_available():
-                inputs = inputs.to("cuda")
+            return response or self._generate_template_response(query, result)
             
+        except Exception as e:
+            logger.warning(f"Error generating NLP response: {e}")
+            return self._generate_template_response(query, result)
+    
+    def _ensure_batch_loop(self):
+        """Start the micro-batching task on the running event loop if needed"""
+        if self._batch_task is None or self._batch_task.done():
+            self._batch_queue = asyncio.Queue()
+            self._batch_task = asyncio.get_running_loop().create_task(self._batch_loop())
+    
+    async def _batch_loop(self):
+        """
+        Collect prompts that arrive within BATCH_WINDOW_SECONDS and generate them together
+        
+        One padded generate call amortizes kernel launches and weight reads
+        across concurrent users. Generation runs in a worker thread so the
+        event loop keeps serving requests meanwhile.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._batch_queue.get()]
+            deadline = loop.time() + BATCH_WINDOW_SECONDS
+            while len(batch) < MAX_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._batch_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                responses = await asyncio.to_thread(self._generate_batch, [prompt for prompt, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+    
+    def _encode_prompts(self, prompts: List[Tuple[str, str]]) -> List[List[int]]:
+        """
+        Encode "User: ... Context: ... Assistant:" chat prompts to token IDs
+        
+        Only the query and context text are tokenized (in one batch call); the
+        fixed scaffolding reuses the IDs cached at load time.
+        
+        Args:
+            prompts: (query, context_text) pairs; context_text may be empty
+            
+        Returns:
+            Token IDs per prompt
+        """
+        texts = []
+        for query, context_text in prompts:
+            texts.append(" " + query)
+            if context_text:
+                texts.append(" " + context_text)
+        pieces = iter(self.tokenizer(texts, add_special_tokens=False)["input_ids"])
+        
+        encoded = []
+        for _, context_text in prompts:
+            ids = self._prompt_user + next(pieces)
+            if context_text:
+                ids += self._prompt_context + next(pieces)
+            encoded.append(ids + self._prompt_assistant)
+        return encoded
+    
+    def _generate_batch(self, prompts: List[Tuple[str, str]]) -> List[str]:
+        """
+        Run a single generate call for a batch of prompts
+        
+        Args:
+            prompts: (query, context_text) pairs to complete
+            
+        Returns:
+            Assistant replies, in the same order as prompts
+        """
+        encoded = self._encode_prompts(prompts)
+        # Left-pad with EOS so every reply starts at the same column
+        width = max(len(ids) for ids in encoded)
+        pad_id = self.tokenizer.eos_token_id
+        inputs = torch.tensor(
+            [[pad_id] * (width - len(ids)) + ids for ids in encoded], device=self.model.device
+        )
+        attention_mask = torch.tensor(
+            [[0] * (width - len(ids)) + [1] * len(ids) for ids in encoded], device=self.model.device
+        )
+        # At most MAX_NEW_TOKENS, and within max_length=MAX_RESPONSE_LENGTH regardless of padding
+        budgets = [max(1, min(MAX_NEW_TOKENS, MAX_RESPONSE_LENGTH - len(ids))) for ids in encoded]
+        if self._compiled_decode:
+            inputs, attention_mask = self._pad_to_bucket(inputs, attention_mask)
+        padded_len = inputs.shape[-1]
+        
+        if self.model.device.type == "cuda":
+            precision = torch.autocast(device_type="cuda", dtype=torch.float16)
+        else:
+            precision = contextlib.nullcontext()
+        
+        # No autograd bookkeeping (grad mode is per thread, so set it here in the worker)
+        with torch.inference_mode(), precision:
             outputs = self.model.generate(
                 inputs,
-                max_length=150,
+                attention_mask=attention_mask,
+                max_new_tokens=max(budgets),
                 num_return_sequences=1,
                 temperature=0.7,
                 do_sample=True,
+                # Each row stops (and is then padded) once it emits any stop token
+                eos_token_id=self._stop_token_ids,
                 pad_token_id=self.tokenizer.eos_token_id
             )
-            
-            response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+        
+        responses = []
+        for output, budget in zip(outputs, budgets):
+            response = self.tokenizer.decode(output[:padded_len + budget], skip_special_tokens=True)
             # Extract just the assistant's response
             if "Assistant:" in response:
                 response = response.split("Assistant:")[-1].strip()
-            
-            return response or self._generate_template_response(query, result)
-            
-        except Exception as e:
-            logger.warning(f"Error generating NLP response: {e}")
-            return self._generate_template_response(query, result)
+            responses.append(response)
+        return responses
     
     def _build_context_text(self, context: Dict[str, Any], result: Dict[str, Any]) -> str:
         """Build context text from query context and results"""
@@ -171,65 +497,120 @@ class ChatNLPService:
         """Suggest related queries based on current query and history"""
         suggestions = []
         
-        # Extract common patterns
-        if "how many" in query.lower() or "count" in query.lower():
-            suggestions.extend([
-                "Show me all detections",
-                "What species were detected?",
-                "Show detections from last week"
-            ])
-        
-        if "show" in query.lower() or "list" in query.lower():
-            suggestions.extend([
-                "How many total detections?",
-                "What's the most common species?",
-                "Show high confidence detections"
-            ])
-        
-        if "species" in query.lower() or "animal" in query.lower():
-            suggestions.extend([
-                "Show all detections",
-                "What cameras have the most detections?",
-                "Show recent detections"
-            ])
+        # Single scan for all trigger keywords, then apply rules in order
+        matched = {_SUGGESTION_RULE_INDEX[m] for m in _SUGGESTION_PATTERN.findall(query.lower())}
+        for index, (_, rule_suggestions) in enumerate(_SUGGESTION_RULES):
+            if index in matched:
+                suggestions.extend(rule_suggestions)
         
         # Add time-based suggestions
-        suggestions.extend([
-            "Show detections from last 24 hours",
-            "What was detected this week?",
-            "Show high confidence detections"
-        ])
+        suggestions.extend(_TIME_SUGGESTIONS)
         
         return suggestions[:5]  # Return top 5 suggestions
     
-    def get_conversation_context(self, session_id: str) -> Dict[str, Any]:
-        """Get conversation context for a session"""
-        return self.conversation_context.get(session_id, {})
+    async def get_conversation_context(self, session_id: str) -> Dict[str, Any]:
+        """Get a snapshot of the conversation context for a session"""
+        if self._redis is not None:
+            try:
+                return await self._redis_get_context(session_id)
+            except Exception as e:
+                logger.warning(f"Redis conversation context unavailable, using local store: {e}")
+        
+        context = self.conversation_context.get(session_id)
+        if context is None:
+            return {}
+        self.conversation_context.move_to_end(session_id)
+        return {
+            'queries': list(context['queries']),
+            'results': list(context['results']),
+            'entities': dict(context['entities'])
+        }
     
-    def update_conversation_context(self, session_id: str, query: str, result: Dict[str, Any]):
+    async def update_conversation_context(self, session_id: str, query: str, result: Dict[str, Any]):
         """Update conversation context with new query and result"""
-        if session_id not in self.conversation_context:
-            self.conversation_context[session_id] = {
-                'queries': [],
-                'results': [],
+        entities = {}
+        if result.get('species'):
+            entities['last_species'] = result['species']
+        if result.get('camera_id'):
+            entities['last_camera_id'] = result['camera_id']
+        
+        if self._redis is not None:
+            try:
+                await self._redis_update_context(session_id, query, result, entities)
+                return
+            except Exception as e:
+                logger.warning(f"Redis conversation context unavailable, using local store: {e}")
+        
+        context = self.conversation_context.get(session_id)
+        if context is None:
+            # Keep only the last CONVERSATION_HISTORY_LENGTH queries/results
+            context = {
+                'queries': deque(maxlen=CONVERSATION_HISTORY_LENGTH),
+                'results': deque(maxlen=CONVERSATION_HISTORY_LENGTH),
                 'entities': {}
             }
+            self.conversation_context[session_id] = context
+            # Evict the least recently used session once the cap is reached
+            if len(self.conversation_context) > MAX_CONVERSATION_SESSIONS:
+                self.conversation_context.popitem(last=False)
+        else:
+            self.conversation_context.move_to_end(session_id)
         
-        context = self.conversation_context[session_id]
         context['queries'].append(query)
         context['results'].append(result)
+        context['entities'].update(entities)
+    
+    async def clear_conversation_context(self, session_id: Optional[str] = None):
+        """Clear the conversation context for one session, or for all sessions"""
+        if session_id is None:
+            self.conversation_context.clear()
+        else:
+            self.conversation_context.pop(session_id, None)
         
-        # Update entities from query and result
-        if result.get('species'):
-            context['entities']['last_species'] = result['species']
-        if result.get('camera_id'):
-            context['entities']['last_camera_id'] = result['camera_id']
-        
-        # Keep only last 10 queries/results
-        context['queries'] = context['queries'][-10:]
-        context['results'] = context['results'][-10:]
+        if self._redis is not None:
+            try:
+                if session_id is None:
+                    keys = [key async for key in self._redis.scan_iter(match=f"{CONTEXT_KEY_PREFIX}*")]
+                else:
+                    key = f"{CONTEXT_KEY_PREFIX}{session_id}"
+                    keys = [f"{key}:q", f"{key}:r", f"{key}:e"]
+                if keys:
+                    await self._redis.delete(*keys)
+            except Exception as e:
+                logger.warning(f"Could not clear Redis conversation context: {e}")
+    
+    async def _redis_get_context(self, session_id: str) -> Dict[str, Any]:
+        """Read a session's context from Redis (oldest entries first)"""
+        key = f"{CONTEXT_KEY_PREFIX}{session_id}"
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.lrange(f"{key}:q", 0, -1)
+            pipe.lrange(f"{key}:r", 0, -1)
+            pipe.hgetall(f"{key}:e")
+            queries, results, entities = await pipe.execute()
+        if not queries:
+            return {}
+        return {
+            'queries': [json.loads(q) for q in queries],
+            'results': [json.loads(r) for r in results],
+            'entities': {k.decode(): json.loads(v) for k, v in entities.items()}
+        }
+    
+    async def _redis_update_context(self, session_id: str, query: str, result: Dict[str, Any],
+                                    entities: Dict[str, Any]):
+        """Append to a session's context in Redis, trimming history and refreshing its TTL"""
+        key = f"{CONTEXT_KEY_PREFIX}{session_id}"
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(f"{key}:q", json.dumps(query))
+            pipe.ltrim(f"{key}:q", -CONVERSATION_HISTORY_LENGTH, -1)
+            pipe.rpush(f"{key}:r", json.dumps(result, default=str))
+            pipe.ltrim(f"{key}:r", -CONVERSATION_HISTORY_LENGTH, -1)
+            if entities:
+                pipe.hset(f"{key}:e", mapping={k: json.dumps(v) for k, v in entities.items()})
+            for suffix in (":q", ":r", ":e"):
+                pipe.expire(f"{key}{suffix}", CONVERSATION_CONTEXT_TTL)
+            await pipe.execute()
 
 
-# Global NLP service instance
-chat_nlp_service = ChatNLPService()
+# Global NLP service instance (models load on first NLP request)
+chat_nlp_service = ChatNLPService(lazy=True)
 
@@ -1,29 +1,164 @@
 """Real-time event management for SSE streams"""
 import asyncio
+import concurrent.futures
+import inspect
+import json
 import logging
-from typing import Dict, Any, Optional
-from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple, Union
 import psutil
 import os
+import time
 
 try:
-    from ..services.motioneye import motioneye_client
+    from ..services.motioneye import get_motioneye_client
     from ..services.speciesnet import speciesnet_processor
 except ImportError:
-    from services.motioneye import motioneye_client
+    from services.motioneye import get_motioneye_client
     from services.speciesnet import speciesnet_processor
 
+# Try to import msgspec for compact detection events and fast encoding
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+# Try to import orjson for faster event serialization
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Events buffered per SSE client; a slow client loses its oldest events
+# instead of stalling the broadcast for everyone else
+CLIENT_QUEUE_MAXSIZE = 256
+
+# Most detections drained from the queue into a single "detection_batch" event
+DETECTION_BATCH_SIZE = 32
+
+# Seconds to reuse a successful motioneye/SpeciesNet probe (status, camera list)
+STATUS_CACHE_TTL = 10.0
+CAMERAS_CACHE_TTL = 30.0
+# Seconds to remember a timed-out probe before trying the service again
+PROBE_TIMEOUT_BACKOFF = 60.0
+
+# Threads dedicated to blocking health probes, separate from the default executor
+PROBE_POOL_WORKERS = 4
+
+# Host metric readings are shared by all callers within this many seconds
+HOST_METRICS_TTL = 1.0
+
+_host_metrics_cache: Dict[str, Any] = {"time": 0.0, "value": None}
+_host_metrics_lock: Optional[asyncio.Lock] = None
+
+# Prime psutil's CPU counters so later non-blocking reads measure the
+# interval since the previous call instead of sleeping
+psutil.cpu_percent(interval=None)
+
+# (formatted timestamp, wall-clock second it was formatted for)
+_last_iso_timestamp = ["", -1]
+
+
+def utc_now_iso() -> str:
+    """
+    Current UTC time as an ISO 8601 string, at one-second resolution
+    
+    The formatted string is reused for every call within the same wall-clock
+    second, so event bursts don't pay for a datetime and strftime each.
+    """
+    second = int(time.time())
+    if second != _last_iso_timestamp[1]:
+        _last_iso_timestamp[0] = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        _last_iso_timestamp[1] = second
+    return _last_iso_timestamp[0]
+
+
+def format_sse(event: Dict[str, Any]) -> bytes:
+    """
+    Serialize an event into a complete SSE "data:" frame
+    
+    Args:
+        event: JSON-serializable event payload
+        
+    Returns:
+        UTF-8 encoded frame, ready to write to the response
+    """
+    if MSGSPEC_AVAILABLE:
+        # Handles DetectionEvent structs as well as plain dicts
+        body = msgspec.json.encode(event)
+    elif ORJSON_AVAILABLE:
+        body = orjson.dumps(event)
+    else:
+        body = json.dumps(event).encode("utf-8")
+    return b"data: " + body + b"\n\n"
+
+
+if MSGSPEC_AVAILABLE:
+    class DetectionEvent(msgspec.Struct, omit_defaults=True):
+        """Detection broadcast payload; encodes to the same JSON object as the legacy dict"""
+        id: int
+        camera_id: int
+        camera_name: str
+        species: str
+        confidence: float
+        image_path: Optional[str] = None
+        timestamp: Optional[str] = None
+        media_url: Optional[str] = None
+else:
+    # Without msgspec, detection events stay plain dicts with the same keys
+    DetectionEvent = dict
+
+
+def _read_host_metrics() -> Tuple[float, float, float]:
+    """Read CPU, memory and root disk usage percentages (non-blocking)"""
+    cpu_percent = psutil.cpu_percent(interval=None)
+    memory = psutil.virtual_memory()
+    try:
+        root_path = 'C:\\' if os.name == 'nt' else '/'
+        disk = psutil.disk_usage(root_path)
+    except Exception:
+        disk = psutil.disk_usage('.')
+    return cpu_percent, memory.percent, disk.percent
+
+
+async def get_host_metrics() -> Tuple[float, float, float]:
+    """
+    Get (cpu_percent, memory_percent, disk_percent), cached for HOST_METRICS_TTL
+    
+    Readings run in the default executor so psutil never blocks the event
+    loop; concurrent callers wait for and share the same reading.
+    """
+    global _host_metrics_lock
+    if _host_metrics_lock is None:
+        _host_metrics_lock = asyncio.Lock()
+    
+    async with _host_metrics_lock:
+        now = time.monotonic()
+        if _host_metrics_cache["value"] is None or now - _host_metrics_cache["time"] >= HOST_METRICS_TTL:
+            loop = asyncio.get_running_loop()
+            _host_metrics_cache["value"] = await loop.run_in_executor(None, _read_host_metrics)
+            _host_metrics_cache["time"] = now
+        return _host_metrics_cache["value"]
+
 
 class EventManager:
     """Manages real-time event broadcasting to connected clients"""
     
     def __init__(self):
-        self.clients: Dict[str, asyncio.Queue] = {}
+        # Dense client list for fast broadcast iteration, plus id -> position index
+        self.clients: List[Tuple[str, asyncio.Queue]] = []
+        self._client_index: Dict[str, int] = {}
         self.detection_queue = asyncio.Queue()
         self.system_queue = asyncio.Queue()
         self._background_tasks_started = False
+        # Probe name -> (expires_at, value) for slow external service calls
+        self._probe_cache: Dict[str, Tuple[float, Any]] = {}
+        self._probe_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=PROBE_POOL_WORKERS, thread_name_prefix="health-probe"
+        )
     
     async def start_background_tasks(self):
         """Start background tasks for processing events"""
@@ -41,8 +176,18 @@ class EventManager:
         """Process detection events and broadcast to clients"""
         while True:
             try:
-                event = await self.detection_queue.get()
-                await self._broadcast_event("detection", event)
+                # Coalesce a burst of queued detections into one broadcast
+                batch = [await self.detection_queue.get()]
+                while len(batch) < DETECTION_BATCH_SIZE:
+                    try:
+                        batch.append(self.detection_queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+                
+                if len(batch) == 1:
+                    await self._broadcast_event("detection", batch[0])
+                else:
+                    await self._broadcast_event("detection_batch", batch)
             except Exception as e:
                 logging.error(f"Error processing detection event: {e}")
     
@@ -66,56 +211,80 @@ class EventManager:
                 logging.error(f"Error broadcasting system health: {e}")
                 await asyncio.sleep(60)  # Wait longer on error
     
+    async def _cached_probe(self, name: str, probe, timeout: float, ttl: float, timeout_value: Any) -> Any:
+        """
+        Run a service probe, caching its result
+        
+        Args:
+            name: Cache key for this probe
+            probe: Coroutine function to await, or blocking callable to run
+                in the probe executor
+            timeout: Seconds to wait for the probe
+            ttl: Seconds to reuse a successful result
+            timeout_value: Result reported (and cached for PROBE_TIMEOUT_BACKOFF) on timeout
+            
+        Returns:
+            The probe result, or timeout_value if it timed out. Other
+            exceptions propagate and are not cached.
+        """
+        now = time.monotonic()
+        cached = self._probe_cache.get(name)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        
+        if inspect.iscoroutinefunction(probe):
+            pending = probe()
+        else:
+            pending = asyncio.get_running_loop().run_in_executor(self._probe_pool, probe)
+        try:
+            value = await asyncio.wait_for(pending, timeout=timeout)
+        except asyncio.TimeoutError:
+            # Back off so a degraded service doesn't pin another executor thread every cycle
+            self._probe_cache[name] = (time.monotonic() + PROBE_TIMEOUT_BACKOFF, timeout_value)
+            return timeout_value
+        
+        self._probe_cache[name] = (time.monotonic() + ttl, value)
+        return value
+    
     async def _get_system_health_data(self) -> Dict[str, Any]:
         """Get current system health data"""
         try:
-            cpu_percent = psutil.cpu_percent(interval=0.1)
-            memory = psutil.virtual_memory()
-            try:
-                root_path = 'C:\\' if os.name == 'nt' else '/'
-                disk = psutil.disk_usage(root_path)
-            except Exception:
-                disk = psutil.disk_usage('.')
+            # Probe everything concurrently so a tick takes as long as the slowest probe
+            motioneye_status, cameras, speciesnet_status, host_metrics = await asyncio.gather(
+                self._cached_probe(
+                    "motioneye_status", get_motioneye_client().a_get_status,
+                    timeout=30.0, ttl=STATUS_CACHE_TTL, timeout_value="timeout"
+                ),
+                self._cached_probe(
+                    "motioneye_cameras", get_motioneye_client().a_get_cameras,
+                    timeout=15.0, ttl=CAMERAS_CACHE_TTL, timeout_value=None
+                ),
+                self._cached_probe(
+                    "speciesnet_status", speciesnet_processor.get_status,
+                    timeout=40.0, ttl=STATUS_CACHE_TTL, timeout_value="timeout"
+                ),
+                get_host_metrics(),
+                return_exceptions=True
+            )
+            if isinstance(host_metrics, Exception):
+                raise host_metrics
+            cpu_percent, memory_percent, disk_percent = host_metrics
             
-            motioneye_status = "unknown"
-            cameras_count = 0
-            try:
-                loop = asyncio.get_event_loop()
-                motioneye_status = await asyncio.wait_for(
-                    loop.run_in_executor(None, motioneye_client.get_status),
-                    timeout=30.0
-                )
-                if motioneye_status == "running":
-                    try:
-                        cameras = await asyncio.wait_for(
-                            loop.run_in_executor(None, motioneye_client.get_cameras),
-                            timeout=15.0
-                        )
-                        cameras_count = len(cameras) if cameras else 0
-                    except Exception:
-                        cameras_count = 0
-            except asyncio.TimeoutError:
-                motioneye_status = "timeout"
-            except Exception:
+            if isinstance(motioneye_status, Exception):
                 motioneye_status = "error"
+            cameras_count = 0
+            if motioneye_status == "running" and cameras and not isinstance(cameras, Exception):
+                cameras_count = len(cameras)
             
-            speciesnet_status = "unknown"
-            try:
-                speciesnet_status = await asyncio.wait_for(
-                    loop.run_in_executor(None, speciesnet_processor.get_status),
-                    timeout=40.0
-                )
-            except asyncio.TimeoutError:
-                speciesnet_status = "timeout"
-            except Exception:
+            if isinstance(speciesnet_status, Exception):
                 speciesnet_status = "error"
             
             return {
                 "system": {
                     "cpu_percent": cpu_percent,
-                    "memory_percent": memory.percent,
-                    "disk_percent": disk.percent,
-                    "timestamp": datetime.utcnow().isoformat()
+                    "memory_percent": memory_percent,
+                    "disk_percent": disk_percent,
+                    "timestamp": utc_now_iso()
                 },
                 "motioneye": {
                     "status": motioneye_status,
@@ -129,50 +298,73 @@ class EventManager:
             logging.error(f"Error getting system health: {e}")
             return {
                 "error": str(e),
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": utc_now_iso()
             }
     
     async def _broadcast_event(self, event_type: str, data: Any):
         """Broadcast event to all connected clients"""
-        event_data = {
+        # Serialize and frame once; every client queue gets the same bytes
+        event_data = format_sse({
             "type": event_type,
             "data": data,
-            "timestamp": datetime.utcnow().isoformat()
-        }
+            "timestamp": utc_now_iso()
+        })
         
-        disconnected = []
-        for client_id, client_queue in self.clients.items():
+        i = 0
+        while i < len(self.clients):
+            client_queue = self.clients[i][1]
             try:
-                await client_queue.put(event_data)
+                try:
+                    client_queue.put_nowait(event_data)
+                except asyncio.QueueFull:
+                    # Drop the oldest pending event for this slow client
+                    client_queue.get_nowait()
+                    client_queue.put_nowait(event_data)
             except Exception:
-                disconnected.append(client_id)
-        
-        for client_id in disconnected:
-            del self.clients[client_id]
+                # The last client is swapped into slot i, so re-check the same index
+                self._remove_client_at(i)
+                continue
+            i += 1
+    
+    def _remove_client_at(self, position: int):
+        """Remove the client at a list position by swapping in the last client"""
+        client_id, _ = self.clients[position]
+        last = self.clients.pop()
+        if position < len(self.clients):
+            self.clients[position] = last
+            self._client_index[last[0]] = position
+        del self._client_index[client_id]
     
     async def add_client(self) -> str:
         """Add a new client and return client ID"""
         import uuid
         client_id = str(uuid.uuid4())
-        self.clients[client_id] = asyncio.Queue()
+        self._client_index[client_id] = len(self.clients)
+        self.clients.append((client_id, asyncio.Queue(maxsize=CLIENT_QUEUE_MAXSIZE)))
         return client_id
     
     async def remove_client(self, client_id: str):
         """Remove a client"""
-        if client_id in self.clients:
-            del self.clients[client_id]
+        position = self._client_index.get(client_id)
+        if position is not None:
+            self._remove_client_at(position)
     
     async def get_client_queue(self, client_id: str) -> Optional[asyncio.Queue]:
         """Get client queue by ID"""
-        return self.clients.get(client_id)
+        position = self._client_index.get(client_id)
+        return self.clients[position][1] if position is not None else None
     
-    async def broadcast_detection(self, detection: Dict[str, Any]):
-        """Broadcast a new detection to all clients"""
+    async def broadcast_detection(self, detection: Union[DetectionEvent, Dict[str, Any]]):
+        """Broadcast a new detection (DetectionEvent or legacy dict) to all clients"""
         await self.detection_queue.put(detection)
     
     async def broadcast_system_update(self, system_data: Dict[str, Any]):
         """Broadcast system update to all clients"""
         await self.system_queue.put(system_data)
+    
+    def close(self):
+        """Release the health probe threads (call on application shutdown)"""
+        self._probe_pool.shutdown(wait=False, cancel_futures=True)
 
 
 # Singleton instance
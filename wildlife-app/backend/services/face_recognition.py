@@ -2,7 +2,10 @@
 import logging
 import json
 import os
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator
 import numpy as np
 
 logger = logging.getLogger(__name__)
@@ -31,6 +34,20 @@ except ImportError:
     CV2_AVAILABLE = False
     logger.warning("OpenCV not available. Install with: pip install opencv-python")
 
+# Try to import FAISS for approximate nearest-neighbour search over many known faces
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+# Try to import orjson for faster encoding (de)serialization
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Try to import PIL for image preprocessing
 try:
     from PIL import Image
@@ -39,6 +56,41 @@ except ImportError:
     PIL_AVAILABLE = False
     logger.warning("PIL/Pillow not available. Install with: pip install pillow")
 
+# Known-face count from which recognition uses a FAISS HNSW index instead of brute force
+FAISS_MIN_KNOWN_FACES = 5000
+# Nearest neighbours fetched from the index before applying per-face tolerances
+FAISS_SEARCH_K = 16
+
+
+def encode_face_encoding(encoding) -> bytes:
+    """Serialize a face encoding to the float32 bytes stored in KnownFace/FaceDetection.face_encoding"""
+    return np.asarray(encoding, dtype=np.float32).tobytes()
+
+
+def face_encoding_to_json(encoding) -> str:
+    """Serialize a face encoding to a JSON array string (exports)"""
+    if ORJSON_AVAILABLE:
+        # Serializes the float array directly, without building a Python list
+        return orjson.dumps(np.asarray(encoding), option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(np.asarray(encoding).tolist())
+
+
+def decode_face_encoding(value) -> np.ndarray:
+    """Deserialize a stored face encoding.
+
+    Args:
+        value: float32 bytes as stored in the database, or a legacy JSON
+            array string / list (exports and rows not yet migrated)
+
+    Returns:
+        float32 array of the encoding
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return np.frombuffer(value, dtype=np.float32)
+    if isinstance(value, str):
+        value = orjson.loads(value) if ORJSON_AVAILABLE else json.loads(value)
+    return np.asarray(value, dtype=np.float32)
+
 
 class FaceRecognitionService:
     """Service for face detection and recognition"""
@@ -47,58 +99,77 @@ class FaceRecognitionService:
         self.known_faces = {}  # Cache of known faces: {face_id: encoding}
         self.known_face_names = {}  # Cache of face names: {face_id: name}
         self.known_face_tolerance = {}  # Cache of per-face tolerance: {face_id: tolerance}
+        # Set once loaded from the DB (even if there are none); CRUD keeps the cache current after that
+        self.known_faces_loaded = False
+        # Matrix view of the caches above for vectorized matching, rebuilt lazily when stale
+        self._known_ids: List[int] = []
+        self._known_names: List[str] = []
+        self._known_matrix: Optional[np.ndarray] = None  # (M, 128) float32 encodings
+        self._known_norms_sq: Optional[np.ndarray] = None  # (M,) squared L2 norms of the rows
+        self._known_ann_index = None  # FAISS index over _known_matrix when M is large
+        self._known_tol: Optional[np.ndarray] = None  # (M,) per-face tolerance, NaN if unset
+        self._known_index_stale = True
         self.max_image_dimension = 800  # Maximum width or height for processing (maintains quality while improving speed)
+        # Downscale filter for the PIL path; detectors gain nothing from Lanczos sharpness
+        self.resize_filter = Image.Resampling.BILINEAR if PIL_AVAILABLE else None
+        # dlib upsampling passes before HOG/CNN detection; images are already
+        # downscaled to max_image_dimension, so the default of 1 only costs time
+        self.upsample_times = 0
+        
+        # MediaPipe detector is created on first use and reused; its graph is
+        # not thread-safe, so construction and process() share one lock
+        self._mp_detector = None
+        self._mp_lock = threading.Lock()
         
-        # MediaPipe will be initialized on first use if available
+        # Worker processes for detect_faces_async, started on first use
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+    
+    def _target_size(self, width: int, height: int) -> Optional[Tuple[int, int]]:
+        """Downscaled (width, height) keeping aspect ratio, or None if no resize is needed"""
+        if max(width, height) <= self.max_image_dimension:
+            return None
+        if width > height:
+            return self.max_image_dimension, int(height * (self.max_image_dimension / width))
+        return int(width * (self.max_image_dimension / height)), self.max_image_dimension
     
-    def _preprocess_image(self, image_path: str) -> Optional[str]:
-        """Resize large images to improve processing speed
+    def _preprocess_image(self, image_path: str) -> Optional[np.ndarray]:
+        """Load an image as an RGB array, downscaled in memory to improve processing speed
         
         Returns:
-            Path to preprocessed image (may be original if no resize needed), or None if error
+            RGB uint8 array no larger than max_image_dimension, or None if the image can't be read
         """
-        if not PIL_AVAILABLE:
-            return image_path
-        
         try:
+            if CV2_AVAILABLE:
+                image = cv2.imread(image_path)
+                if image is None:
+                    logger.warning(f"Could not load image: {image_path}")
+                    return None
+                height, width = image.shape[:2]
+                new_size = self._target_size(width, height)
+                if new_size:
+                    # INTER_AREA is the cheap, alias-free choice for downscaling
+                    image = cv2.resize(image, new_size, interpolation=cv2.INTER_AREA)
+                    logger.info(f"Resized image from {width}x{height} to {new_size[0]}x{new_size[1]} for faster processing")
+                # Convert in place: the decoded buffer is ours alone, so no second H x W x 3 allocation
+                return cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+            
             with Image.open(image_path) as img:
                 width, height = img.size
-                
-                # Check if resize is needed
-                max_dim = max(width, height)
-                if max_dim <= self.max_image_dimension:
-                    return image_path  # No resize needed
-                
-                # Calculate new dimensions maintaining aspect ratio
-                if width > height:
-                    new_width = self.max_image_dimension
-                    new_height = int(height * (self.max_image_dimension / width))
-                else:
-                    new_height = self.max_image_dimension
-                    new_width = int(width * (self.max_image_dimension / height))
-                
-                # Resize image
-                resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                
-                # Save to temporary file
-                import tempfile
-                file_ext = os.path.splitext(image_path)[1].lower() or '.jpg'
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_ext)
-                
-                # Convert to RGB if necessary
-                if resized_img.mode != 'RGB':
-                    resized_img = resized_img.convert('RGB')
-                
-                # Save resized image
-                resized_img.save(temp_file.name, quality=95, optimize=True)
-                temp_file.close()
-                
-                logger.info(f"Resized image from {width}x{height} to {new_width}x{new_height} for faster processing")
-                return temp_file.name
-                
+                new_size = self._target_size(width, height)
+                if new_size:
+                    # Let libjpeg decode at 1/2, 1/4 or 1/8 scale (still >= new_size)
+                    # so the resize below runs over far fewer pixels; no-op for non-JPEGs
+                    img.draft('RGB', new_size)
+                if img.mode != 'RGB':
+                    img = img.convert('RGB')
+                if new_size:
+                    img = img.resize(new_size, self.resize_filter)
+                    logger.info(f"Resized image from {width}x{height} to {new_size[0]}x{new_size[1]} for faster processing")
+                return np.asarray(img)
         except Exception as e:
-            logger.warning(f"Failed to preprocess image {image_path}: {e}, using original")
-            return image_path
+            logger.warning(f"Failed to load image {image_path}: {e}")
+            return None
     
     def is_available(self) -> bool:
         """Check if face recognition is available"""
@@ -123,61 +194,173 @@ class FaceRecognitionService:
             
             for face in known_faces_list:
                 try:
-                    encoding = json.loads(face.face_encoding)
-                    self.known_faces[face.id] = np.array(encoding)
+                    self.known_faces[face.id] = decode_face_encoding(face.face_encoding)
                     self.known_face_names[face.id] = face.name
                     # Store per-face tolerance (default 0.6 if not set)
                     self.known_face_tolerance[face.id] = face.tolerance if face.tolerance is not None else 0.6
                 except (json.JSONDecodeError, ValueError) as e:
                     logger.warning(f"Failed to load face encoding for {face.name}: {e}")
             
+            self._rebuild_known_index()
+            self.known_faces_loaded = True
             logger.info(f"Loaded {len(self.known_faces)} known faces")
         except Exception as e:
             logger.error(f"Error loading known faces: {e}")
     
-    def _detect_faces_mediapipe(self, image_path: str) -> List[Dict[str, Any]]:
-        """Detect faces using MediaPipe (more accurate)"""
-        if not MEDIAPIPE_AVAILABLE or not CV2_AVAILABLE:
+    def _rebuild_known_index(self):
+        """Rebuild the known-face matrix and tolerance vector from the caches"""
+        self._known_ids = list(self.known_faces)
+        self._known_names = [self.known_face_names.get(face_id, "Unknown") for face_id in self._known_ids]
+        if self._known_ids:
+            self._known_matrix = np.array(
+                [self.known_faces[face_id] for face_id in self._known_ids], dtype=np.float32
+            )
+        else:
+            self._known_matrix = np.empty((0, 128), dtype=np.float32)
+        self._known_norms_sq = np.einsum('ij,ij->i', self._known_matrix, self._known_matrix)
+        self._known_ann_index = None
+        if FAISS_AVAILABLE and len(self._known_ids) >= FAISS_MIN_KNOWN_FACES:
+            self._known_ann_index = faiss.IndexHNSWFlat(self._known_matrix.shape[1], 32)
+            self._known_ann_index.add(self._known_matrix)
+        self._known_tol = np.array(
+            [self.known_face_tolerance.get(face_id, np.nan) for face_id in self._known_ids],
+            dtype=np.float32
+        )
+        self._known_index_stale = False
+    
+    def cache_known_face(self, face_id: int, encoding, name: str, tolerance: Optional[float] = None):
+        """Add or replace a known face in the in-memory caches"""
+        self.known_faces[face_id] = np.array(encoding)
+        self.known_face_names[face_id] = name
+        self.known_face_tolerance[face_id] = tolerance if tolerance is not None else 0.6
+        self._known_index_stale = True
+    
+    def update_cached_face(self, face_id: int, name: Optional[str] = None, tolerance: Optional[float] = None):
+        """Update the cached name and/or tolerance of a known face, if it is cached"""
+        if face_id not in self.known_faces:
+            return
+        if name:
+            self.known_face_names[face_id] = name
+            self._known_index_stale = True
+        if tolerance is not None:
+            self.known_face_tolerance[face_id] = tolerance
+            self._known_index_stale = True
+    
+    def remove_cached_face(self, face_id: int):
+        """Drop a known face from the in-memory caches"""
+        self.known_faces.pop(face_id, None)
+        self.known_face_names.pop(face_id, None)
+        self.known_face_tolerance.pop(face_id, None)
+        self._known_index_stale = True
+    
+    def _get_mp_detector(self):
+        """Return the shared MediaPipe face detector (caller must hold _mp_lock)"""
+        if self._mp_detector is None:
+            self._mp_detector = mp.solutions.face_detection.FaceDetection(
+                model_selection=1,  # 0 for close-range, 1 for full-range
+                min_detection_confidence=0.5
+            )
+        return self._mp_detector
+    
+    def close(self):
+        """Release the MediaPipe detector and worker processes (call on application shutdown)"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+        with self._mp_lock:
+            if self._mp_detector is not None:
+                self._mp_detector.close()
+                self._mp_detector = None
+    
+    def detect_faces_async(self, image_path: str, model: str = "hog") -> Future:
+        """Run detect_faces in a worker process
+        
+        Detection is spread over one process per CPU core, each with its own
+        MediaPipe detector, so bulk ingestion isn't bound by this process's
+        GIL. Workers are spawned rather than forked: forking after MediaPipe
+        or a CUDA context (dlib CNN) is initialized in the parent is unsafe,
+        and each worker creates its own CUDA context, so size the pool with
+        GPU memory in mind.
+        
+        Args:
+            image_path: Path to the image file
+            model: Detection model to use - "hog" or "cnn"
+            
+        Returns:
+            Future resolving to the detect_faces result; await it from async
+            code with asyncio.wrap_future
+        """
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=os.cpu_count(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker
+                )
+            return self._pool.submit(_detect_faces_worker, image_path, model)
+    
+    def _face_results(self, face_locations, face_encodings, method: str) -> List[Dict[str, Any]]:
+        """Build detection result dicts from face_recognition locations and encodings"""
+        results = []
+        for i, (location, encoding) in enumerate(zip(face_locations, face_encodings)):
+            # Format: (top, right, bottom, left)
+            face_location = {
+                "top": int(location[0]),
+                "right": int(location[1]),
+                "bottom": int(location[2]),
+                "left": int(location[3])
+            }
+            
+            results.append({
+                "face_index": i,
+                "face_location": face_location,
+                # Convert encoding to list for JSON serialization
+                "face_encoding": encoding.tolist(),
+                # The array itself for in-process matching; not JSON-serializable,
+                # so drop this key before returning results over HTTP
+                "face_encoding_np": encoding,
+                "confidence": 1.0,  # face_recognition doesn't provide confidence, assume high
+                "detection_method": method
+            })
+        return results
+    
+    def _detect_faces_mediapipe(self, image_rgb: np.ndarray, image_path: str) -> List[Dict[str, Any]]:
+        """Detect faces using MediaPipe (more accurate)
+        
+        Args:
+            image_rgb: Preprocessed RGB image
+            image_path: Source path, for logging
+        """
+        if not MEDIAPIPE_AVAILABLE:
             return []
         
         try:
-            # Load image with OpenCV
-            image = cv2.imread(image_path)
-            if image is None:
-                logger.warning(f"Could not load image: {image_path}")
-                return []
-            
-            # Convert BGR to RGB
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
             height, width, _ = image_rgb.shape
             
-            # Use MediaPipe face detection
-            mp_face_detection = mp.solutions.face_detection
-            with mp_face_detection.FaceDetection(
-                model_selection=1,  # 0 for close-range, 1 for full-range
-                min_detection_confidence=0.5
-            ) as face_detection:
-                results = face_detection.process(image_rgb)
+            # Use MediaPipe face detection (shared detector, loaded once)
+            with self._mp_lock:
+                results = self._get_mp_detector().process(image_rgb)
+            
+            face_locations = []
+            for detection in results.detections or []:
+                # Get bounding box
+                bbox = detection.location_data.relative_bounding_box
+                
+                # Convert to absolute coordinates (top, right, bottom, left)
+                x = int(bbox.xmin * width)
+                y = int(bbox.ymin * height)
+                w = int(bbox.width * width)
+                h = int(bbox.height * height)
                 
-                face_locations = []
-                for detection in results.detections or []:
-                    # Get bounding box
-                    bbox = detection.location_data.relative_bounding_box
-                    
-                    # Convert to absolute coordinates (top, right, bottom, left)
-                    x = int(bbox.xmin * width)
-                    y = int(bbox.ymin * height)
-                    w = int(bbox.width * width)
-                    h = int(bbox.height * height)
-                    
-                    # MediaPipe format: (ymin, xmin, width, height)
-                    # face_recognition format: (top, right, bottom, left)
-                    top = y
-                    left = x
-                    bottom = y + h
-                    right = x + w
-                    
-                    face_locations.append((top, right, bottom, left))
+                # MediaPipe format: (ymin, xmin, width, height)
+                # face_recognition format: (top, right, bottom, left)
+                top = y
+                left = x
+                bottom = y + h
+                right = x + w
+                
+                face_locations.append((top, right, bottom, left))
             
             if not face_locations:
                 return []
@@ -186,33 +369,14 @@ class FaceRecognitionService:
             if not FACE_RECOGNITION_AVAILABLE:
                 return []
             
-            # Load image for face_recognition
-            image = face_recognition.load_image_file(image_path)
-            face_encodings = face_recognition.face_encodings(image, face_locations)
+            # Encode from the RGB array already decoded for MediaPipe
+            face_encodings = face_recognition.face_encodings(image_rgb, face_locations)
             
             if not face_encodings:
                 logger.warning(f"Could not generate encodings for detected faces in {image_path}")
                 return []
             
-            results = []
-            for i, (location, encoding) in enumerate(zip(face_locations, face_encodings)):
-                encoding_list = encoding.tolist()
-                
-                face_location = {
-                    "top": int(location[0]),
-                    "right": int(location[1]),
-                    "bottom": int(location[2]),
-                    "left": int(location[3])
-                }
-                
-                results.append({
-                    "face_index": i,
-                    "face_location": face_location,
-                    "face_encoding": encoding_list,
-                    "confidence": 1.0,
-                    "detection_method": "mediapipe"
-                })
-            
+            results = self._face_results(face_locations, face_encodings, "mediapipe")
             logger.info(f"Detected {len(results)} faces using MediaPipe in {image_path}")
             return results
             
@@ -235,78 +399,110 @@ class FaceRecognitionService:
             logger.warning(f"Image not found: {image_path}")
             return []
         
-        # Preprocess image (resize if too large)
-        processed_image_path = self._preprocess_image(image_path)
-        temp_file_created = processed_image_path != image_path
+        # Decode once and resize in memory if too large
+        image = self._preprocess_image(image_path)
+        if image is None:
+            return []
+        
+        return self._detect_faces_in_image(image, image_path, model)
+    
+    def _detect_faces_in_image(self, image: np.ndarray, image_path: str, model: str = "hog") -> List[Dict[str, Any]]:
+        """Detect faces in an already decoded RGB image (see detect_faces)
         
+        Args:
+            image: RGB uint8 array
+            image_path: Source of the image, used for logging only
+            model: Detection model to use - "hog" or "cnn"
+        """
         try:
             # Try MediaPipe first (best accuracy)
             if MEDIAPIPE_AVAILABLE:
-                mediapipe_results = self._detect_faces_mediapipe(processed_image_path)
+                mediapipe_results = self._detect_faces_mediapipe(image, image_path)
                 if mediapipe_results:
                     return mediapipe_results
                 logger.info(f"MediaPipe didn't find faces, trying face_recognition library")
         
             # Fall back to face_recognition library
-            # Load image (using preprocessed path)
-            image = face_recognition.load_image_file(processed_image_path)
-            
             # Try HOG model first (faster)
-            face_locations = face_recognition.face_locations(image, model=model)
+            face_locations = face_recognition.face_locations(
+                image, number_of_times_to_upsample=self.upsample_times, model=model
+            )
             
             # If no faces found with HOG, try CNN model (more accurate but slower)
             if not face_locations and model == "hog":
-                logger.info(f"No faces found with HOG model, trying CNN model for {processed_image_path}")
+                logger.info(f"No faces found with HOG model, trying CNN model for {image_path}")
                 try:
-                    face_locations = face_recognition.face_locations(image, model="cnn")
+                    face_locations = face_recognition.face_locations(
+                        image, number_of_times_to_upsample=self.upsample_times, model="cnn"
+                    )
                 except Exception as cnn_error:
                     logger.warning(f"CNN model failed: {cnn_error}, using HOG results")
             
             if not face_locations:
-                logger.warning(f"No faces detected in {processed_image_path} with {model} model")
+                logger.warning(f"No faces detected in {image_path} with {model} model")
                 return []
             
             # Get face encodings
             face_encodings = face_recognition.face_encodings(image, face_locations)
             
             if not face_encodings:
-                logger.warning(f"Could not generate encodings for detected faces in {processed_image_path}")
+                logger.warning(f"Could not generate encodings for detected faces in {image_path}")
                 return []
             
-            results = []
-            for i, (location, encoding) in enumerate(zip(face_locations, face_encodings)):
-                # Convert encoding to list for JSON serialization
-                encoding_list = encoding.tolist()
-                
-                # Format: (top, right, bottom, left)
-                face_location = {
-                    "top": int(location[0]),
-                    "right": int(location[1]),
-                    "bottom": int(location[2]),
-                    "left": int(location[3])
-                }
-                
-                results.append({
-                    "face_index": i,
-                    "face_location": face_location,
-                    "face_encoding": encoding_list,
-                    "confidence": 1.0,  # face_recognition doesn't provide confidence, assume high
-                    "detection_method": model
-                })
-            
-            logger.info(f"Detected {len(results)} faces in {processed_image_path}")
+            results = self._face_results(face_locations, face_encodings, model)
+            logger.info(f"Detected {len(results)} faces in {image_path}")
             return results
             
         except Exception as e:
-            logger.error(f"Error detecting faces in {processed_image_path}: {e}", exc_info=True)
+            logger.error(f"Error detecting faces in {image_path}: {e}", exc_info=True)
             return []
-        finally:
-            # Clean up temporary file if we created one
-            if temp_file_created and processed_image_path and os.path.exists(processed_image_path):
-                try:
-                    os.remove(processed_image_path)
-                except Exception as e:
-                    logger.warning(f"Failed to clean up temporary file {processed_image_path}: {e}")
+    
+    def detect_faces_batch(self, image_paths: List[str], batch_size: int = 64) -> List[List[Dict[str, Any]]]:
+        """Detect faces in many images with batched CNN detection
+        
+        Intended for bulk ingestion: images of the same (preprocessed) size
+        are run through dlib's CNN detector together, which amortizes model
+        and GPU transfer overhead. MediaPipe is not used on this path.
+        
+        Args:
+            image_paths: Image files to process
+            batch_size: Images per CNN batch
+            
+        Returns:
+            One list of face results (same format as detect_faces) per input path
+        """
+        results: List[List[Dict[str, Any]]] = [[] for _ in image_paths]
+        if not self.is_available():
+            return results
+        
+        # batch_face_locations needs equally sized images, so group by shape
+        images: Dict[int, np.ndarray] = {}
+        by_shape: Dict[Tuple[int, ...], List[int]] = {}
+        for i, image_path in enumerate(image_paths):
+            if not os.path.exists(image_path):
+                logger.warning(f"Image not found: {image_path}")
+                continue
+            image = self._preprocess_image(image_path)
+            if image is not None:
+                images[i] = image
+                by_shape.setdefault(image.shape, []).append(i)
+        
+        for indices in by_shape.values():
+            try:
+                batch_locations = face_recognition.batch_face_locations(
+                    [images[i] for i in indices],
+                    number_of_times_to_upsample=self.upsample_times,
+                    batch_size=batch_size
+                )
+                for i, face_locations in zip(indices, batch_locations):
+                    if face_locations:
+                        face_encodings = face_recognition.face_encodings(images[i], face_locations)
+                        results[i] = self._face_results(face_locations, face_encodings, "cnn")
+            except Exception as e:
+                logger.error(f"Error in batched face detection: {e}", exc_info=True)
+        
+        logger.info(f"Detected {sum(map(len, results))} faces in {len(image_paths)} images (batched)")
+        return results
     
     def recognize_faces(
         self,
@@ -320,68 +516,129 @@ class FaceRecognitionService:
         # Detect faces first
         detected_faces = self.detect_faces(image_path)
         
+        return self._match_detected_faces(detected_faces, tolerance)
+    
+    def recognize_faces_stream(
+        self,
+        frames: Iterable[np.ndarray],
+        every_n: int = 3,
+        tolerance: float = 0.6
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Recognize faces across consecutive video frames
+        
+        Targets realtime video: full detection and recognition only run on
+        every Nth frame, and the frames in between reuse the last results.
+        
+        Args:
+            frames: RGB uint8 frames, already at the size to process
+            every_n: Run detection on one frame out of every_n
+            tolerance: Default match tolerance for faces without their own
+            
+        Yields:
+            Recognition results (same format as recognize_faces) per frame
+        """
+        stream = FaceRecognitionStream(self, every_n=every_n, tolerance=tolerance)
+        for frame in frames:
+            yield stream.process(frame)
+    
+    def _match_detected_faces(self, detected_faces: List[Dict[str, Any]], tolerance: float) -> List[Dict[str, Any]]:
+        """Attach the best known-face match (or "Unknown") to each detected face"""
         if not detected_faces:
             return []
         
         if not self.known_faces:
             # No known faces, return detections without recognition
-            return [
-                {
-                    **face,
-                    "known_face_id": None,
-                    "name": "Unknown",
-                    "recognition_confidence": 0.0
-                }
-                for face in detected_faces
-            ]
-        
-            # Try to recognize each face
-            results = []
-            for face in detected_faces:
-                face_encoding = np.array(face["face_encoding"])
-                
-                # Calculate distances to all known faces
-                face_distances = face_recognition.face_distance(
-                    list(self.known_faces.values()),
-                    face_encoding
-                )
-                
-                # Find best match using per-face tolerance
-                best_match_index = None
-                best_match_distance = float('inf')
-                
-                for i, (face_id, known_encoding) in enumerate(self.known_faces.items()):
-                    distance = face_distances[i]
-                    # Use per-face tolerance if available, otherwise use default
-                    face_tolerance = self.known_face_tolerance.get(face_id, tolerance)
-                    # Check if this face matches using its specific tolerance
-                    if distance <= face_tolerance and distance < best_match_distance:
-                        best_match_index = i
-                        best_match_distance = distance
-            
-            if best_match_index is not None:
-                # Found a match
-                face_id = list(self.known_faces.keys())[best_match_index]
-                name = self.known_face_names.get(face_id, "Unknown")
-                confidence = 1.0 - best_match_distance  # Convert distance to confidence
-                
-                results.append({
-                    **face,
-                    "known_face_id": face_id,
-                    "name": name,
-                    "recognition_confidence": float(confidence)
-                })
-            else:
-                # No match found
+            return self._unknown_faces(detected_faces)
+        
+        if self._known_index_stale:
+            self._rebuild_known_index()
+        
+        detected = np.stack([face["face_encoding_np"] for face in detected_faces]).astype(np.float32, copy=False)
+        tolerances = np.where(np.isnan(self._known_tol), tolerance, self._known_tol)
+        best_indices, best_distances = self._best_known_matches(detected, tolerances)
+        
+        matched = np.isfinite(best_distances)
+        if not matched.any():
+            # Common case on wildlife cameras: nobody known in frame
+            return self._unknown_faces(detected_faces)
+        
+        results = []
+        for face, is_match, best_index, best_distance in zip(detected_faces, matched, best_indices, best_distances):
+            if not is_match:
                 results.append({
                     **face,
                     "known_face_id": None,
                     "name": "Unknown",
                     "recognition_confidence": 0.0
                 })
+                continue
+            
+            # Found a match
+            face_id = self._known_ids[best_index]
+            name = self._known_names[best_index]
+            confidence = 1.0 - best_distance  # Convert distance to confidence
+            
+            results.append({
+                **face,
+                "known_face_id": face_id,
+                "name": name,
+                "recognition_confidence": float(confidence)
+            })
         
         return results
     
+    @staticmethod
+    def _unknown_faces(detected_faces: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Mark every detected face as unrecognized"""
+        return [
+            {
+                **face,
+                "known_face_id": None,
+                "name": "Unknown",
+                "recognition_confidence": 0.0
+            }
+            for face in detected_faces
+        ]
+    
+    def _best_known_matches(self, detected: np.ndarray, tolerances: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Find the closest known face within its own tolerance for each detected encoding
+        
+        Args:
+            detected: (N, 128) float32 encodings
+            tolerances: (M,) per-known-face distance tolerance
+        
+        Returns:
+            (best_indices, best_distances) into the known-face index; the
+            distance is inf where no known face is within tolerance
+        """
+        rows = np.arange(len(detected))
+        
+        if self._known_ann_index is not None:
+            # Approximate: only the FAISS_SEARCH_K nearest neighbours are considered
+            distances_sq, neighbours = self._known_ann_index.search(
+                detected, min(FAISS_SEARCH_K, len(self._known_ids))
+            )
+            distances = np.sqrt(np.maximum(distances_sq, 0.0))
+            found = neighbours >= 0
+            neighbour_tolerances = tolerances[np.where(found, neighbours, 0)]
+            candidates = np.where(found & (distances <= neighbour_tolerances), distances, np.inf)
+            best = np.argmin(candidates, axis=1)
+            return neighbours[rows, best], candidates[rows, best]
+        
+        # Exact: distances from every detected face to every known face, (N, M). Uses
+        # ||q - k||^2 = ||q||^2 + ||k||^2 - 2 q.k so the bulk is one BLAS matmul
+        detected_norms_sq = np.einsum('ij,ij->i', detected, detected)
+        distances_sq = detected_norms_sq[:, None] + self._known_norms_sq[None, :] - 2.0 * (detected @ self._known_matrix.T)
+        distances = np.sqrt(np.maximum(distances_sq, 0.0))
+        
+        if distances.min() > tolerances.max():
+            # Cheapest reject: no pair is within even the loosest tolerance
+            return np.zeros(len(detected), dtype=np.intp), np.full(len(detected), np.inf)
+        
+        candidates = np.where(distances <= tolerances, distances, np.inf)
+        best = np.argmin(candidates, axis=1)
+        return best, candidates[rows, best]
+    
     def add_known_face(
         self,
         db_session,
@@ -414,7 +671,7 @@ class FaceRecognitionService:
                 logger.warning(f"Multiple faces detected in {image_path}, using first face")
             
             # Use the first face
-            face_encoding = faces[0]["face_encoding"]
+            face_encoding = faces[0]["face_encoding_np"]
             
             # Copy image to a permanent location (optional - you can store in a faces directory)
             # For now, we'll keep the original path or copy it
@@ -423,7 +680,7 @@ class FaceRecognitionService:
             # Save to database
             known_face = KnownFace(
                 name=name,
-                face_encoding=json.dumps(face_encoding),
+                face_encoding=encode_face_encoding(face_encoding),
                 image_path=permanent_path,
                 notes=notes,
                 tolerance=tolerance,
@@ -435,9 +692,7 @@ class FaceRecognitionService:
             db_session.refresh(known_face)
             
             # Update cache
-            self.known_faces[known_face.id] = np.array(face_encoding)
-            self.known_face_names[known_face.id] = name
-            self.known_face_tolerance[known_face.id] = tolerance
+            self.cache_known_face(known_face.id, face_encoding, name, tolerance)
             
             logger.info(f"Added known face: {name} (ID: {known_face.id})")
             return known_face.id
@@ -448,5 +703,41 @@ class FaceRecognitionService:
             return None
 
 
+class FaceRecognitionStream:
+    """Frame-skipping recognizer state for one video stream
+    
+    Detection and recognition run on every Nth frame; skipped frames return
+    the last results, so face locations lag by at most every_n - 1 frames.
+    """
+    
+    def __init__(self, service: FaceRecognitionService, every_n: int = 3, tolerance: float = 0.6):
+        self.service = service
+        self.every_n = max(1, every_n)
+        self.tolerance = tolerance
+        self.frame_ix = 0
+        self.last_results: List[Dict[str, Any]] = []
+    
+    def process(self, frame: np.ndarray) -> List[Dict[str, Any]]:
+        """Recognize faces in the next frame, or reuse the last results on skipped frames"""
+        if self.frame_ix % self.every_n == 0:
+            source = f"stream frame {self.frame_ix}"
+            detected = self.service._detect_faces_in_image(frame, source) if self.service.is_available() else []
+            self.last_results = self.service._match_detected_faces(detected, self.tolerance)
+        self.frame_ix += 1
+        return self.last_results
+
+
 # Global instance
 face_recognition_service = FaceRecognitionService()
+
+
+def _init_worker():
+    """Create the detector of a detect_faces_async worker process up front"""
+    if MEDIAPIPE_AVAILABLE:
+        with face_recognition_service._mp_lock:
+            face_recognition_service._get_mp_detector()
+
+
+def _detect_faces_worker(image_path: str, model: str) -> List[Dict[str, Any]]:
+    """detect_faces on the worker process's own service instance"""
+    return face_recognition_service.detect_faces(image_path, model)
@@ -1,8 +1,187 @@
+import ast
+import json
 import logging
-from sqlalchemy import text, inspect, Engine
+import math
+import numpy as np
+from sqlalchemy import text, inspect, bindparam, Engine, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
+
+# Try to import orjson for faster parsing of legacy JSON face encodings
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Rows read and rewritten per transaction when normalizing legacy detections_json
+DETECTIONS_JSON_BATCH_SIZE = 1000
+
+
+def _add_missing_columns(conn, table: str, existing_columns: set, columns: list):
+    """
+    Add the columns of a table that don't exist yet.
+    
+    On PostgreSQL all missing columns go into a single ALTER TABLE so the table
+    lock is taken once and the change applies atomically. If that statement
+    fails, each column is retried in its own ALTER (inside a savepoint, so one
+    bad column doesn't abort the transaction) and failures are logged per
+    column. SQLite only accepts one ADD COLUMN per statement, so it always
+    gets one ALTER per column.
+    
+    Args:
+        conn: Open connection; the caller commits
+        table: Table name
+        existing_columns: Column names already on the table
+        columns: (name, definition) pairs the table should have
+    """
+    missing = [(name, definition) for name, definition in columns if name not in existing_columns]
+    if not missing:
+        return
+    
+    if conn.dialect.name == 'sqlite':
+        for name, definition in missing:
+            try:
+                conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {definition}'))
+                logger.info(f'[OK] Added {name} column to {table} table')
+            except Exception as e:
+                logger.warning(f'Error adding {name} column to {table} table: {e}')
+        return
+    
+    add_clauses = ', '.join(f'ADD COLUMN {name} {definition}' for name, definition in missing)
+    try:
+        with conn.begin_nested():
+            conn.execute(text(f'ALTER TABLE {table} {add_clauses}'))
+    except Exception as e:
+        logger.warning(f'Error adding {len(missing)} columns to {table} table at once, adding them one by one: {e}')
+        for name, definition in missing:
+            try:
+                with conn.begin_nested():
+                    conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {definition}'))
+                logger.info(f'[OK] Added {name} column to {table} table')
+            except Exception as e:
+                logger.warning(f'Error adding {name} column to {table} table: {e}')
+        return
+    
+    for name, _ in missing:
+        logger.info(f'[OK] Added {name} column to {table} table')
+
+
+def _reject_constant(name: str):
+    """json.loads hook: NaN/Infinity are valid for Python but not for PostgreSQL JSON"""
+    raise ValueError(f'non-standard JSON constant {name}')
+
+
+def _jsonb_safe(value):
+    """Copy of a parsed JSON value without what JSONB rejects: NaN/Infinity become None, NUL characters are dropped"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, str):
+        return value.replace('\x00', '')
+    if isinstance(value, dict):
+        return {_jsonb_safe(key): _jsonb_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonb_safe(item) for item in value]
+    return value
+
+
+def _strict_json(value: str):
+    """
+    Return value as strict JSON text.
+    
+    Valid JSON is returned unchanged. JSON with NaN/Infinity or NUL
+    characters and the Python dict reprs older versions stored (see
+    routers/detections.py) are re-serialized; anything else can't be
+    recovered and yields None.
+    """
+    if '\\u0000' not in value:
+        try:
+            json.loads(value, parse_constant=_reject_constant)
+            return value
+        except ValueError:
+            pass
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        try:
+            parsed = ast.literal_eval(value)
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+            return None
+    try:
+        return json.dumps(_jsonb_safe(parsed), default=str, allow_nan=False)
+    except (TypeError, ValueError):
+        return None
+
+
+def _normalize_detections_json(conn, batch_size: int = DETECTIONS_JSON_BATCH_SIZE) -> int:
+    """
+    Rewrite detections_json values that aren't strict JSON, in batches.
+    
+    Each batch is committed on its own, so rows stay locked only briefly and
+    progress survives a later failure.
+    
+    Args:
+        conn: Open connection
+        batch_size: Rows read per batch
+        
+    Returns:
+        Number of rows rewritten (unrecoverable values are set to NULL)
+    """
+    last_id = 0
+    rewritten = unrecoverable = 0
+    while True:
+        rows = conn.execute(
+            text(
+                'SELECT id, detections_json FROM detections '
+                'WHERE detections_json IS NOT NULL AND id > :last_id ORDER BY id LIMIT :limit'
+            ),
+            {'last_id': last_id, 'limit': batch_size}
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        params = []
+        for row_id, value in rows:
+            normalized = _strict_json(value)
+            if normalized != value:
+                params.append({'value': normalized, 'id': row_id})
+                unrecoverable += normalized is None
+        if params:
+            conn.execute(text('UPDATE detections SET detections_json = :value WHERE id = :id'), params)
+        conn.commit()
+        rewritten += len(params)
+    if rewritten:
+        logger.info(f'[OK] Rewrote {rewritten} legacy detections_json values as JSON ({unrecoverable} unreadable set to NULL)')
+    return rewritten
+
+
+def _convert_detections_json_to_jsonb(conn) -> bool:
+    """
+    Convert detections.detections_json from TEXT to JSONB (PostgreSQL only).
+    
+    Legacy values are normalized first so the cast can't fail on them and
+    the table rewrite (under an ACCESS EXCLUSIVE lock) happens once, not on
+    every startup.
+    
+    Returns:
+        True if the column is JSONB now
+    """
+    try:
+        _normalize_detections_json(conn)
+        conn.execute(text(
+            'ALTER TABLE detections ALTER COLUMN detections_json TYPE JSONB '
+            'USING detections_json::jsonb'
+        ))
+        conn.commit()
+        logger.info('[OK] Converted detections_json column to JSONB')
+        return True
+    except Exception as e:
+        logger.warning(f'Could not convert detections_json to JSONB: {e}')
+        conn.rollback()
+        return False
+
+
 def check_and_run_migrations(engine: Engine):
     """
     Check and run database migrations to ensure schema is up to date.
@@ -12,65 +191,55 @@ def check_and_run_migrations(engine: Engine):
     
     try:
         insp = inspect(engine)
+        is_postgres = engine.dialect.name == 'postgresql'
         
         # 1. Check/Add 'detections' table columns
         detection_columns = {c['name'] for c in insp.get_columns('detections')}
         
         with engine.connect() as conn:
-            # Add file_hash (already present in most envs, but good to check)
-            if 'file_hash' not in detection_columns:
-                conn.execute(text('ALTER TABLE detections ADD COLUMN file_hash VARCHAR'))
-                logger.info('[OK] Added file_hash column to detections table')
-
-            # Add audio/video/sensor columns
-            columns_to_add = [
+            _add_missing_columns(conn, 'detections', detection_columns, [
+                # file_hash is already present in most envs, but good to check
+                ('file_hash', 'VARCHAR'),
+                # Audio/video/sensor columns
                 ('audio_path', 'VARCHAR'),
                 ('video_path', 'VARCHAR'),
                 ('temperature', 'DOUBLE PRECISION'),
                 ('humidity', 'DOUBLE PRECISION'),
                 ('pressure', 'DOUBLE PRECISION'),
-                ('detections_json', 'TEXT')
-            ]
-            
-            for col_name, col_type in columns_to_add:
-                if col_name not in detection_columns:
-                    conn.execute(text(f'ALTER TABLE detections ADD COLUMN {col_name} {col_type}'))
-                    logger.info(f'[OK] Added {col_name} column to detections table')
-            
+                ('detections_json', 'JSONB' if is_postgres else 'TEXT')
+            ])
             conn.commit()
 
+        # On PostgreSQL store detections_json as JSONB so it can be GIN-indexed
+        detections_json_is_jsonb = False
+        if is_postgres:
+            json_column = next((c for c in insp.get_columns('detections') if c['name'] == 'detections_json'), None)
+            if json_column is None or isinstance(json_column['type'], JSONB):
+                # Missing from the reflected columns means it was just added as JSONB
+                detections_json_is_jsonb = True
+            else:
+                with engine.connect() as conn:
+                    detections_json_is_jsonb = _convert_detections_json_to_jsonb(conn)
+
         # 2. Check/Add 'cameras' table columns
         camera_columns = {c['name'] for c in insp.get_columns('cameras')}
         
         with engine.connect() as conn:
-            # Location fields
-            if 'latitude' not in camera_columns:
-                conn.execute(text('ALTER TABLE cameras ADD COLUMN latitude DOUBLE PRECISION'))
-                logger.info('[OK] Added latitude column to cameras table')
-            if 'longitude' not in camera_columns:
-                conn.execute(text('ALTER TABLE cameras ADD COLUMN longitude DOUBLE PRECISION'))
-                logger.info('[OK] Added longitude column to cameras table')
-            if 'address' not in camera_columns:
-                conn.execute(text('ALTER TABLE cameras ADD COLUMN address VARCHAR'))
-                logger.info('[OK] Added address column to cameras table')
-                
-            # Geofence fields
-            geofence_cols = [
-                ('geofence_enabled', 'BOOLEAN DEFAULT FALSE NOT NULL'),
-                ('geofence_type', 'VARCHAR'),
-                ('geofence_data', 'TEXT')
-            ]
-            
-            for col_name, col_def in geofence_cols:
-                if col_name not in camera_columns:
-                    try:
-                        conn.execute(text(f'ALTER TABLE cameras ADD COLUMN {col_name} {col_def}'))
-                        logger.info(f'[OK] Added {col_name} column to cameras table')
-                    except Exception as e:
-                        logger.warning(f'Error adding {col_name}: {e}')
-                        conn.rollback()
-            
-            conn.commit()
+            try:
+                _add_missing_columns(conn, 'cameras', camera_columns, [
+                    # Location fields
+                    ('latitude', 'DOUBLE PRECISION'),
+                    ('longitude', 'DOUBLE PRECISION'),
+                    ('address', 'VARCHAR'),
+                    # Geofence fields
+                    ('geofence_enabled', 'BOOLEAN DEFAULT FALSE NOT NULL'),
+                    ('geofence_type', 'VARCHAR'),
+                    ('geofence_data', 'TEXT')
+                ])
+                conn.commit()
+            except Exception as e:
+                logger.warning(f'Error adding cameras columns: {e}')
+                conn.rollback()
 
         # 3. Create Indexes for Performance
         # Only attempt if table exists (it should by now)
@@ -81,19 +250,34 @@ def check_and_run_migrations(engine: Engine):
                 ('idx_detection_video_path', 'detections(video_path)', 'video_path IS NOT NULL'),
                 ('idx_detection_audio_path', 'detections(audio_path)', 'audio_path IS NOT NULL'),
                 ('idx_detection_date_range', 'detections(timestamp DESC, camera_id)', None),
-                ('idx_detection_confidence', 'detections(confidence)', None)
+                ('idx_detection_confidence', 'detections(confidence)', None),
+                # Video webhooks link to the camera's latest detection still without a video;
+                # (camera_id, timestamp) from the model already covers the audio lookup
+                ('idx_detection_camera_ts_no_video', 'detections(camera_id, timestamp DESC)', 'video_path IS NULL')
             ]
+            if detections_json_is_jsonb:
+                indexes_to_create.append(
+                    ('idx_detections_json_gin', 'detections USING GIN (detections_json)', None)
+                )
+            
+            # On PostgreSQL build indexes CONCURRENTLY so ingestion writes aren't
+            # blocked; that can't run inside a transaction, hence AUTOCOMMIT
+            concurrent = is_postgres
+            create_index = 'CREATE INDEX CONCURRENTLY IF NOT EXISTS' if concurrent else 'CREATE INDEX IF NOT EXISTS'
             
             with engine.connect() as conn:
+                if concurrent:
+                    conn = conn.execution_options(isolation_level='AUTOCOMMIT')
                 for idx_name, idx_def, idx_where in indexes_to_create:
                     if idx_name not in existing_indexes:
                         try:
                             where_clause = f" WHERE {idx_where}" if idx_where else ""
-                            conn.execute(text(f'CREATE INDEX IF NOT EXISTS {idx_name} ON {idx_def}{where_clause}'))
+                            conn.execute(text(f'{create_index} {idx_name} ON {idx_def}{where_clause}'))
                             logger.info(f'[OK] Added index {idx_name}')
                         except Exception as e:
                             logger.warning(f'Error creating index {idx_name}: {e}')
-                conn.commit()
+                if not concurrent:
+                    conn.commit()
                 
         except Exception as e:
             logger.warning(f'Index creation warning: {e}')
@@ -103,19 +287,78 @@ def check_and_run_migrations(engine: Engine):
             known_faces_columns = {c['name'] for c in insp.get_columns('known_faces')}
             
             with engine.connect() as conn:
-                # Add tolerance column for per-face recognition threshold
-                if 'tolerance' not in known_faces_columns:
-                    try:
-                        conn.execute(text('ALTER TABLE known_faces ADD COLUMN tolerance DOUBLE PRECISION DEFAULT 0.6'))
-                        logger.info('[OK] Added tolerance column to known_faces table')
-                    except Exception as e:
-                        logger.warning(f'Error adding tolerance column: {e}')
-                        conn.rollback()
-                
-                conn.commit()
+                try:
+                    _add_missing_columns(conn, 'known_faces', known_faces_columns, [
+                        # Per-face recognition threshold
+                        ('tolerance', 'DOUBLE PRECISION DEFAULT 0.6')
+                    ])
+                    conn.commit()
+                except Exception as e:
+                    logger.warning(f'Error adding known_faces columns: {e}')
+                    conn.rollback()
         except Exception as e:
             logger.warning(f'Known faces migration warning: {e}')
 
+        # 5. Convert legacy JSON face encodings to float32 bytes
+        # (table, NOT NULL); detected faces may have no encoding.
+        # Known faces without a usable encoding (NULL or an empty list) can never
+        # match and would make SET NOT NULL fail on every startup, so they are
+        # deleted (after unlinking their face detections) and logged. SQLite
+        # can't add constraints to an existing column, so there face_encoding
+        # stays nullable; that is only the dev/test database, and the ORM always
+        # writes an encoding for known faces.
+        for table, not_null in (('known_faces', True), ('face_detections', False)):
+            try:
+                encoding_column = next(
+                    (c for c in insp.get_columns(table) if c['name'] == 'face_encoding'), None
+                )
+                if encoding_column is not None and not isinstance(encoding_column['type'], LargeBinary):
+                    binary_type = LargeBinary().compile(dialect=engine.dialect)
+                    with engine.connect() as conn:
+                        try:
+                            conn.execute(text(f'ALTER TABLE {table} ADD COLUMN face_encoding_bin {binary_type}'))
+                            rows = conn.execute(
+                                text(f'SELECT id, face_encoding FROM {table} WHERE face_encoding IS NOT NULL')
+                            ).fetchall()
+                            loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+                            params = []
+                            for row_id, encoding_json in rows:
+                                encoding = np.asarray(loads(encoding_json), dtype=np.float32)
+                                if encoding.size:
+                                    params.append({'enc': encoding.tobytes(), 'id': row_id})
+                            if params:
+                                # One executemany instead of a round trip per row
+                                conn.execute(
+                                    text(f'UPDATE {table} SET face_encoding_bin = :enc WHERE id = :id'), params
+                                )
+                            if not_null:
+                                empty_ids = [row_id for (row_id,) in conn.execute(
+                                    text(f'SELECT id FROM {table} WHERE face_encoding_bin IS NULL')
+                                )]
+                                if empty_ids:
+                                    conn.execute(
+                                        text('UPDATE face_detections SET known_face_id = NULL WHERE known_face_id IN :ids')
+                                        .bindparams(bindparam('ids', expanding=True)),
+                                        {'ids': empty_ids}
+                                    )
+                                    conn.execute(
+                                        text(f'DELETE FROM {table} WHERE id IN :ids')
+                                        .bindparams(bindparam('ids', expanding=True)),
+                                        {'ids': empty_ids}
+                                    )
+                                    logger.warning(f'Deleted {len(empty_ids)} {table} rows without a face encoding: {empty_ids}')
+                            conn.execute(text(f'ALTER TABLE {table} DROP COLUMN face_encoding'))
+                            conn.execute(text(f'ALTER TABLE {table} RENAME COLUMN face_encoding_bin TO face_encoding'))
+                            if not_null and engine.dialect.name == 'postgresql':
+                                conn.execute(text(f'ALTER TABLE {table} ALTER COLUMN face_encoding SET NOT NULL'))
+                            conn.commit()
+                            logger.info(f'[OK] Converted {len(params)} {table} face encodings to binary')
+                        except Exception as e:
+                            logger.warning(f'Error converting {table} face encodings to binary: {e}')
+                            conn.rollback()
+            except Exception as e:
+                logger.warning(f'Face encoding migration warning ({table}): {e}')
+
         logger.info("[OK] Database migration check completed")
         
     except Exception as e:
@@ -1,57 +1,408 @@
 """MotionEye integration service"""
+import asyncio
+import gzip
+import ipaddress
+import json
 import logging
+import os
+import random
+import secrets
+import socket
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
 import requests
-from typing import List, Optional, Dict, Any
+import urllib3.connection
+import urllib3.connectionpool
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+from typing import List, Optional, Dict, Any, Tuple
 
 try:
-    from ..config import MOTIONEYE_URL
+    from ..config import (
+        MOTIONEYE_URL, MOTIONEYE_PARTIAL_UPDATES, MOTIONEYE_GZIP_REQUESTS,
+        MOTIONEYE_CONNECT_TIMEOUT, MOTIONEYE_READ_TIMEOUT, MOTIONEYE_STREAM_HOST, MOTIONEYE_STREAM_PORT
+    )
 except ImportError:
-    from config import MOTIONEYE_URL
+    from config import (
+        MOTIONEYE_URL, MOTIONEYE_PARTIAL_UPDATES, MOTIONEYE_GZIP_REQUESTS,
+        MOTIONEYE_CONNECT_TIMEOUT, MOTIONEYE_READ_TIMEOUT, MOTIONEYE_STREAM_HOST, MOTIONEYE_STREAM_PORT
+    )
+
+# Try to import orjson for faster config (de)serialization
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Try to import ijson to stream-parse large MotionEye config responses
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Try to import httpx for concurrent settings updates across cameras
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+
+# Bounded retries for idempotent reads and the login flow: MotionEye briefly
+# refuses connections or answers 5xx while it reloads its configuration
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF_BASE = 0.2  # seconds; full jitter up to base * 2**attempt
+RETRY_BACKOFF_CAP = 2.0
+
+# Circuit breaker: after this many consecutive timeouts/connection errors
+# every call fails fast for the cooldown, then a single probe call is let
+# through to test whether MotionEye is back
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_COOLDOWN = 10.0  # seconds
+
+# Login cookies are shared between processes so short-lived workers skip the
+# login request; stale or rejected cookies trigger a fresh login. They live in
+# a private (0700) per-user cache directory, and only on platforms where file
+# ownership and O_NOFOLLOW can be checked; elsewhere every process logs in.
+COOKIE_CACHE_DIR = os.path.join(
+    os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "wildlife"
+)
+COOKIE_CACHE_PATH = os.path.join(COOKIE_CACHE_DIR, "motioneye.cookies")
+COOKIE_CACHE_MAX_AGE = 3600  # seconds
+COOKIE_CACHE_SUPPORTED = hasattr(os, "getuid") and hasattr(os, "O_NOFOLLOW")
+
+
+def _is_private(st: os.stat_result) -> bool:
+    """True if the file/directory belongs to this user and has no group/other permissions"""
+    return st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+
+def _private_cache_dir() -> Optional[str]:
+    """Create (0700) and validate the cookie cache directory; None if it isn't safe to use"""
+    try:
+        os.makedirs(COOKIE_CACHE_DIR, mode=0o700, exist_ok=True)
+        st = os.lstat(COOKIE_CACHE_DIR)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(st.st_mode) or not _is_private(st):
+        logging.warning(f"Not caching MotionEye cookies: {COOKIE_CACHE_DIR} is not a private directory")
+        return None
+    return COOKIE_CACHE_DIR
+
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+# Request bodies from this size up are gzipped when gzip_requests is on
+GZIP_MIN_BODY_BYTES = 4096
+
+
+def _json_loads(content: bytes) -> Any:
+    """Parse a JSON response body"""
+    return orjson.loads(content) if ORJSON_AVAILABLE else json.loads(content)
+
+
+def _json_dumps(payload: Any) -> bytes:
+    """Serialize a JSON request body"""
+    return orjson.dumps(payload) if ORJSON_AVAILABLE else json.dumps(payload).encode("utf-8")
+
+
+# How long a resolved MotionEye IP is reused before resolving the hostname again
+DNS_CACHE_TTL = 60.0
+
+
+class _PinnedDNSAdapter(requests.adapters.HTTPAdapter):
+    """HTTPAdapter whose plain-HTTP connections get their IP from a resolver callable
+    
+    Requests still address the hostname, so the Host header, cookie domain
+    and redirects stay as for any other request; only the socket connect
+    uses the resolved IP.
+    """
+    
+    def __init__(self, resolve, *args, **kwargs):
+        # Set before HTTPAdapter.__init__, which calls init_poolmanager
+        self._resolve = resolve
+        super().__init__(*args, **kwargs)
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        resolve = self._resolve
+        
+        class _PinnedHTTPConnection(urllib3.connection.HTTPConnection):
+            # urllib3 opens the socket to _dns_host and derives host (used for
+            # the Host header) from it; keep host on the name, connect to the IP
+            @property
+            def host(self):
+                return self._pinned_host.rstrip(".")
+            
+            @host.setter
+            def host(self, value):
+                self._pinned_host = value
+            
+            @property
+            def _dns_host(self):
+                return resolve(self.host)
+            
+            @_dns_host.setter
+            def _dns_host(self, value):
+                self._pinned_host = value
+        
+        class _PinnedHTTPConnectionPool(urllib3.connectionpool.HTTPConnectionPool):
+            ConnectionCls = _PinnedHTTPConnection
+        
+        self.poolmanager.pool_classes_by_scheme = {
+            **self.poolmanager.pool_classes_by_scheme, "http": _PinnedHTTPConnectionPool
+        }
+
+
+def _timeout(connect: float, read: float) -> Tuple[float, float]:
+    """(connect, read) timeout, with MOTIONEYE_CONNECT_TIMEOUT/MOTIONEYE_READ_TIMEOUT overriding when set"""
+    return (
+        MOTIONEYE_CONNECT_TIMEOUT if MOTIONEYE_CONNECT_TIMEOUT is not None else connect,
+        MOTIONEYE_READ_TIMEOUT if MOTIONEYE_READ_TIMEOUT is not None else read
+    )
+
+
+class MotionEyeUnavailableError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request while the circuit breaker is open"""
+    
+    def __init__(self, status: str):
+        super().__init__(f"MotionEye unavailable ({status}), failing fast")
+        self.status = status
 
 
 class MotionEyeClient:
     """Client for interacting with MotionEye API"""
     
+    STREAM_HOST = MOTIONEYE_STREAM_HOST
+    STREAM_PORT = MOTIONEYE_STREAM_PORT
+    _STREAM_URL_TEMPLATE = f"http://{STREAM_HOST}:{STREAM_PORT}/picture/%d/current/"
+    
+    # Per-endpoint (connect, read) timeouts, in seconds; MotionEye is a LAN service
+    _T_FAST = _timeout(1.0, 2.0)     # liveness probe
+    _T_NORMAL = _timeout(2.0, 5.0)   # camera list, login, add/update/delete
+    _T_SLOW = _timeout(5.0, 15.0)    # full camera config reads and writes
+    
     def __init__(self, base_url: str = MOTIONEYE_URL, username: str = None, password: str = None):
         self.base_url = base_url
+        self.partial_updates = MOTIONEYE_PARTIAL_UPDATES
+        self.gzip_requests = MOTIONEYE_GZIP_REQUESTS
         self.session = requests.Session()
-        adapter = requests.adapters.HTTPAdapter(
-            pool_connections=10,
-            pool_maxsize=20,
-            max_retries=0  # No retries, fail fast
+        # MotionEye is a single host, so few pools suffice; pool_maxsize covers the
+        # default executor's worker threads, and pool_block makes bursts wait for a
+        # pooled connection instead of opening (and discarding) extra sockets
+        pool_maxsize = max(32, 2 * min(32, (os.cpu_count() or 1) + 4))
+        adapter = _PinnedDNSAdapter(
+            self._resolve,
+            pool_connections=4,
+            pool_maxsize=pool_maxsize,
+            pool_block=True,
+            max_retries=Retry(total=0, connect=0, read=0, status=0, respect_retry_after_header=False)  # No retries, fail fast
         )
         self.session.mount('http://', adapter)
         self.session.mount('https://', adapter)
+        # Threads for the a_* coroutines: one per pooled connection, so async
+        # callers never queue behind unrelated work in the loop's default executor
+        # (threads are only started as calls come in)
+        self._executor = ThreadPoolExecutor(max_workers=pool_maxsize, thread_name_prefix="motioneye")
+        
+        # Plain-HTTP MotionEye addressed by DNS name: resolve once per DNS_CACHE_TTL
+        # instead of on every new pooled connection (see _resolve)
+        parts = urlsplit(base_url)
+        self._resolve_host = parts.hostname if parts.scheme == "http" and self._is_dns_name(parts.hostname) else None
+        self._resolved_ip: Optional[str] = None
+        self._resolved_at = 0.0
+        self.session.headers["Connection"] = "keep-alive"
+        # Every encoding urllib3 can decode here (adds br/zstd when their decoders are installed)
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        
+        # Short-lived per-camera config cache: {camera_id: (fetched_at, config)}
+        self._config_cache: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+        self._config_ttl = 3.0
+        self._cache_lock = threading.Lock()
+        
+        # /config/list results, so bursts of dashboard polls share one request
+        self._list_ttl = 2.0
+        self._list_cache: Optional[Tuple[float, str, List[Dict[str, Any]]]] = None  # (fetched_at, status, cameras)
+        self._status_cache: Optional[Tuple[float, str]] = None  # (checked_at, status) from the HEAD probe
+        # Circuit breaker state while MotionEye is down (see _breaker_call)
+        self._failure_count = 0
+        self._open_until = 0.0
+        self._open_status = "not_available"  # "timeout" | "not_available", reported while open
+        self._probe_in_flight = False
         
-        # Try to authenticate if credentials provided
+        # Try to authenticate if credentials provided, reusing a recent login if possible
+        self._credentials: Optional[Tuple[str, str]] = None
+        # Set once a request succeeds with the current login cookies (see _with_reauth)
+        self._auth_verified = False
         if username and password:
-            self._authenticate(username, password)
+            self._credentials = (username, password)
+            if self._load_cookies(username):
+                self._auth_verified = True  # only verified cookies are saved
+            else:
+                self._authenticate(username, password)
+    
+    @staticmethod
+    def _is_dns_name(host: Optional[str]) -> bool:
+        """True for hostnames that need a DNS lookup (not IP literals or localhost)"""
+        if not host or host == "localhost":
+            return False
+        try:
+            ipaddress.ip_address(host)
+            return False
+        except ValueError:
+            return True
+    
+    def _resolve(self, host: str) -> str:
+        """Address to connect to for host: the cached IP of the MotionEye host, else host itself"""
+        if host != self._resolve_host:
+            return host
+        if self._resolved_ip is None or time.monotonic() - self._resolved_at > DNS_CACHE_TTL:
+            try:
+                self._resolved_ip = socket.gethostbyname(host)
+            except OSError as e:
+                logging.warning(f"Could not resolve MotionEye host {host}: {e}")
+                return host
+            self._resolved_at = time.monotonic()
+        return self._resolved_ip
+    
+    def _json_body(self, payload: Any) -> Tuple[bytes, Dict[str, str]]:
+        """Serialize a config for POSTing, gzipped if large and gzip_requests is on
+        
+        Returns:
+            (body, headers) to send
+        """
+        body = _json_dumps(payload)
+        if self.gzip_requests and len(body) >= GZIP_MIN_BODY_BYTES:
+            # Fastest level: on a LAN the bytes saved beyond it aren't worth the CPU
+            return gzip.compress(body, compresslevel=1), {**JSON_HEADERS, "Content-Encoding": "gzip"}
+        return body, JSON_HEADERS
+    
+    def _load_cookies(self, username: str) -> bool:
+        """Restore login cookies saved by a recent process for the same server and user
+        
+        The file is only trusted if it is a regular file owned by this user
+        with no group/other permissions, inside the private cache directory.
+        """
+        if not COOKIE_CACHE_SUPPORTED or _private_cache_dir() is None:
+            return False
+        try:
+            fd = os.open(COOKIE_CACHE_PATH, os.O_RDONLY | os.O_NOFOLLOW)
+            with os.fdopen(fd, "r") as f:
+                st = os.fstat(f.fileno())
+                if not stat.S_ISREG(st.st_mode) or not _is_private(st):
+                    logging.warning(f"Ignoring MotionEye cookie cache with unsafe ownership or permissions: {COOKIE_CACHE_PATH}")
+                    return False
+                if time.time() - st.st_mtime > COOKIE_CACHE_MAX_AGE:
+                    return False
+                saved = json.load(f)
+            if saved.get("base_url") != self.base_url or saved.get("username") != username:
+                return False
+            self.session.cookies.update(saved.get("cookies", {}))
+            return bool(saved.get("cookies"))
+        except (OSError, ValueError):
+            return False
+    
+    def _save_cookies(self, username: str):
+        """Persist login cookies (owner-only file) for other processes to reuse
+        
+        Written to a freshly created temp file (O_EXCL|O_NOFOLLOW, 0600) and
+        renamed into place, so an existing file or symlink is never written through.
+        """
+        if not COOKIE_CACHE_SUPPORTED:
+            return
+        cache_dir = _private_cache_dir()
+        if cache_dir is None:
+            return
+        tmp_path = os.path.join(cache_dir, f".motioneye.cookies.{secrets.token_hex(8)}")
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o600)
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump({
+                        "base_url": self.base_url,
+                        "username": username,
+                        "cookies": self.session.cookies.get_dict()
+                    }, f)
+                os.replace(tmp_path, COOKIE_CACHE_PATH)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logging.debug(f"Could not save MotionEye cookies: {e}")
+    
+    def _with_reauth(self, request) -> requests.Response:
+        """Run an HTTP call; on 401/403 log in again once and repeat it
+        
+        The first call to succeed after a login also verifies it, and only
+        then are the cookies saved for other processes.
+        """
+        response = self._breaker_call(request)
+        if response.status_code in (401, 403) and self._credentials:
+            response.close()
+            self.session.cookies.clear()
+            if self._authenticate(*self._credentials):
+                response = self._breaker_call(request)
+                if response.status_code in (401, 403):
+                    logging.warning(f"MotionEye auth verification failed: {response.status_code}")
+        if not self._auth_verified and self._credentials and response.status_code < 400:
+            self._auth_verified = True
+            self._save_cookies(self._credentials[0])
+        return response
+    
+    def _with_backoff(self, request, attempts: int = RETRY_ATTEMPTS, reauth: bool = True) -> requests.Response:
+        """Run an HTTP call, retrying connection errors and 5xx answers with jittered backoff
+        
+        Timeouts are not retried (each already waited the full read timeout),
+        and neither are 4xx answers. The last attempt's response or error is
+        returned/raised, so failures are only cached once retries are spent.
+        
+        Args:
+            request: Zero-argument callable performing the request
+            attempts: Total number of tries
+            reauth: Log in again on 401/403 (off for the login flow itself)
+        """
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            try:
+                response = self._with_reauth(request) if reauth else self._breaker_call(request)
+            except (requests.exceptions.Timeout, MotionEyeUnavailableError):
+                raise
+            except requests.exceptions.ConnectionError:
+                if last_attempt:
+                    raise
+            else:
+                if response.status_code < 500 or last_attempt:
+                    return response
+                response.close()
+            time.sleep(random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * 2 ** attempt)))
     
     def _authenticate(self, username: str, password: str) -> bool:
-        """Authenticate with MotionEye to get session cookie"""
+        """Authenticate with MotionEye to get session cookie
+        
+        A single form POST to /login. The login is verified lazily by the next
+        real request, which logs in again once if it gets a 401/403.
+        """
         try:
             # MotionEye uses /login endpoint with form data
-            # First, get the main page to establish session
-            self.session.get(f"{self.base_url}/", timeout=(10, 15))
-            
-            # Then login with form data
-            response = self.session.post(
+            response = self._with_backoff(lambda: self.session.post(
                 f"{self.base_url}/login",
                 data={"username": username, "password": password},
                 headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=(10, 15),
+                timeout=self._T_NORMAL,
                 allow_redirects=True
-            )
+            ), reauth=False)
             
             # Check if we got a successful response or redirect
             if response.status_code in [200, 302]:
-                # Verify by trying to access a protected endpoint
-                test_response = self.session.get(f"{self.base_url}/config/list", timeout=(10, 15))
-                if test_response.status_code == 200:
-                    logging.info("MotionEye authentication successful")
-                    return True
-                else:
-                    logging.warning(f"MotionEye auth verification failed: {test_response.status_code}")
+                logging.info("MotionEye login accepted")
+                self._auth_verified = False
+                return True
             else:
                 logging.warning(f"MotionEye authentication failed: {response.status_code} - {response.text[:200]}")
             return False
@@ -59,70 +410,257 @@ class MotionEyeClient:
             logging.warning(f"MotionEye authentication error: {e}")
             return False
     
-    def get_cameras(self) -> List[Dict[str, Any]]:
-        """Get list of cameras from MotionEye"""
+    def _open_circuit_status(self) -> Optional[str]:
+        """Return "timeout"/"not_available" while the circuit breaker is open
+        
+        Public methods check this first and return their neutral value
+        without logging; once the cooldown is over this returns None and the
+        next request becomes the half-open probe.
+        """
+        with self._cache_lock:
+            if self._failure_count >= BREAKER_FAILURE_THRESHOLD and time.monotonic() < self._open_until:
+                return self._open_status
+        return None
+    
+    def _breaker_enter(self):
+        """Raise MotionEyeUnavailableError while the breaker is open, else admit one attempt
+        
+        Once the cooldown is over the first caller becomes the half-open
+        probe; others fail fast until its outcome is recorded.
+        """
+        with self._cache_lock:
+            if self._failure_count >= BREAKER_FAILURE_THRESHOLD:
+                if time.monotonic() < self._open_until or self._probe_in_flight:
+                    raise MotionEyeUnavailableError(self._open_status)
+                self._probe_in_flight = True
+    
+    def _breaker_record(self, failure_status: Optional[str] = None):
+        """Record an attempt's outcome: "timeout"/"not_available" on failure, None on any HTTP answer"""
+        with self._cache_lock:
+            self._probe_in_flight = False
+            if failure_status is None:
+                self._failure_count = 0
+                return
+            self._failure_count += 1
+            if self._failure_count >= BREAKER_FAILURE_THRESHOLD:
+                if self._failure_count == BREAKER_FAILURE_THRESHOLD:
+                    logging.warning(f"MotionEye unreachable ({failure_status}), failing fast for {BREAKER_COOLDOWN:.0f}s")
+                self._open_until = time.monotonic() + BREAKER_COOLDOWN
+                self._open_status = failure_status
+    
+    def _breaker_call(self, request) -> requests.Response:
+        """Run a single HTTP attempt through the circuit breaker
+        
+        Timeouts and connection errors count as failures; any HTTP answer
+        closes the breaker again. While open, or while another thread's
+        half-open probe is in flight, MotionEyeUnavailableError is raised
+        without touching the network.
+        """
+        self._breaker_enter()
         try:
-            # Increased timeout to handle slow responses (10s connect, 15s read)
-            response = self.session.get(f"{self.base_url}/config/list", timeout=(10, 15))
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("cameras", [])
-            return []
-        except requests.exceptions.Timeout:
+            response = request()
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            self._breaker_record("timeout" if isinstance(e, requests.exceptions.Timeout) else "not_available")
+            raise
+        except BaseException:
+            with self._cache_lock:
+                self._probe_in_flight = False
+            raise
+        self._breaker_record()
+        return response
+    
+    async def _abreaker_call(self, request) -> "httpx.Response":
+        """Async counterpart of _breaker_call for httpx requests
+        
+        Args:
+            request: Zero-argument callable returning an httpx request awaitable
+        """
+        self._breaker_enter()
+        try:
+            response = await request()
+        except httpx.TransportError as e:
+            self._breaker_record("timeout" if isinstance(e, httpx.TimeoutException) else "not_available")
+            raise
+        except BaseException:
+            with self._cache_lock:
+                self._probe_in_flight = False
+            raise
+        self._breaker_record()
+        return response
+    
+    def _invalidate_cameras(self):
+        """Drop the cached camera list after cameras were added, changed or removed"""
+        with self._cache_lock:
+            self._list_cache = None
+    
+    def _fetch_config_list(self) -> Tuple[str, List[Dict[str, Any]]]:
+        """Fetch /config/list once for both the server status and the camera list
+        
+        Results are cached for a couple of seconds, and timeouts/connection
+        errors for longer, so status and camera polls share one request.
+        
+        Returns:
+            (status, cameras) where status is "running", "error", "timeout"
+            or "not_available" and cameras is empty unless running
+        """
+        with self._cache_lock:
+            cached = self._list_cache
+        if cached is not None and time.monotonic() - cached[0] < self._list_ttl:
+            return cached[1], cached[2]
+        status = self._open_circuit_status()
+        if status:
+            return status, []
+        
+        try:
+            with self._with_backoff(
+                lambda: self.session.get(f"{self.base_url}/config/list", timeout=self._T_NORMAL, stream=IJSON_AVAILABLE)
+            ) as response:
+                if response.status_code != 200:
+                    status, cameras = "error", []
+                elif IJSON_AVAILABLE:
+                    # Parse only the cameras array, skipping everything else in the body
+                    response.raw.decode_content = True
+                    status, cameras = "running", list(ijson.items(response.raw, 'cameras.item', use_float=True))
+                else:
+                    status, cameras = "running", _json_loads(response.content).get("cameras", [])
+        except MotionEyeUnavailableError as e:
+            return e.status, []
+        except (requests.exceptions.Timeout, ReadTimeoutError):
             # MotionEye not responding - log at warning level
             logging.warning(f"MotionEye timeout (may be slow or not responding): {self.base_url}")
-            return []
+            return "timeout", []
         except requests.exceptions.ConnectionError:
             # MotionEye not accessible - log at warning level
             logging.warning(f"MotionEye connection error (may not be running): {self.base_url}")
-            return []
+            return "not_available", []
         except Exception as e:
             # Only log actual errors at error level
             logging.warning(f"Error getting cameras from MotionEye: {e}")
-            return []
+            return "error", []
+        
+        with self._cache_lock:
+            self._list_cache = (time.monotonic(), status, cameras)
+        return status, cameras
+    
+    def get_cameras(self) -> List[Dict[str, Any]]:
+        """Get list of cameras from MotionEye"""
+        _, cameras = self._fetch_config_list()
+        return list(cameras)
     
     def add_camera(self, camera_config: Dict[str, Any]) -> bool:
         """Add a camera to MotionEye"""
+        if self._open_circuit_status():
+            return False
         try:
-            response = self.session.post(f"{self.base_url}/config/add", json=camera_config)
-            return response.status_code == 200
+            body, headers = self._json_body(camera_config)
+            response = self._with_reauth(lambda: self.session.post(
+                f"{self.base_url}/config/add", data=body, headers=headers, timeout=self._T_NORMAL
+            ))
+            if response.status_code == 200:
+                self._invalidate_cameras()
+                return True
+            return False
         except Exception as e:
             logging.error(f"Error adding camera to MotionEye: {e}")
             return False
     
     def update_camera(self, camera_id: int, camera_config: Dict[str, Any]) -> bool:
         """Update a camera in MotionEye"""
+        if self._open_circuit_status():
+            return False
         try:
-            response = self.session.post(f"{self.base_url}/config/{camera_id}/set", json=camera_config)
-            return response.status_code == 200
+            body, headers = self._json_body(camera_config)
+            response = self._with_reauth(
+                lambda: self.session.post(
+                    f"{self.base_url}/config/{camera_id}/set", data=body, headers=headers, timeout=self._T_NORMAL
+                )
+            )
+            if response.status_code == 200:
+                self._invalidate_config(camera_id)
+                return True
+            return False
         except Exception as e:
             logging.error(f"Error updating camera in MotionEye: {e}")
             return False
     
     def delete_camera(self, camera_id: int) -> bool:
         """Delete a camera from MotionEye"""
+        if self._open_circuit_status():
+            return False
         try:
-            response = self.session.post(f"{self.base_url}/config/{camera_id}/remove")
-            return response.status_code == 200
+            response = self._with_reauth(
+                lambda: self.session.post(f"{self.base_url}/config/{camera_id}/remove", timeout=self._T_NORMAL)
+            )
+            if response.status_code == 200:
+                self._invalidate_config(camera_id)
+                return True
+            return False
         except Exception as e:
             logging.error(f"Error deleting camera from MotionEye: {e}")
             return False
     
     def get_camera_stream_url(self, camera_id: int) -> str:
         """Get the stream URL for a camera"""
-        return f"http://localhost:8765/picture/{camera_id}/current/"
+        return self._STREAM_URL_TEMPLATE % camera_id
+    
+    # The MJPEG stream is served from the same URL
+    get_camera_mjpeg_url = get_camera_stream_url
     
-    def get_camera_mjpeg_url(self, camera_id: int) -> str:
-        """Get the MJPEG stream URL for a camera"""
-        return f"http://localhost:8765/picture/{camera_id}/current/"
+    def _invalidate_config(self, camera_id: int):
+        """Drop a camera's cached config (and the camera list) after it changed on the server"""
+        with self._cache_lock:
+            self._config_cache.pop(camera_id, None)
+            self._list_cache = None
     
-    def get_camera_config(self, camera_id: int) -> Optional[Dict[str, Any]]:
-        """Get full camera configuration from MotionEye"""
+    def _cached_config(self, camera_id: int) -> Optional[Dict[str, Any]]:
+        """Return a copy of the camera's cached config if still fresh"""
+        with self._cache_lock:
+            cached = self._config_cache.get(camera_id)
+        if cached and time.monotonic() - cached[0] < self._config_ttl:
+            # Copy so callers can modify the result without touching the cache
+            return dict(cached[1])
+        return None
+    
+    def get_camera_config(
+        self,
+        camera_id: int,
+        force_refresh: bool = False,
+        fields: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Get full camera configuration from MotionEye
+        
+        Configs are cached for a few seconds so successive settings updates
+        don't each pay a GET round trip.
+        
+        Args:
+            camera_id: MotionEye camera ID
+            force_refresh: Bypass the cache and fetch the current config
+            fields: Only return these top-level keys; with ijson installed the
+                response is stream-parsed and reading stops once all are seen
+        """
+        if not force_refresh:
+            cached = self._cached_config(camera_id)
+            if cached is not None:
+                if fields is not None:
+                    return {key: cached[key] for key in fields if key in cached}
+                return cached
+        
+        if self._open_circuit_status():
+            return None
+        if fields is not None and IJSON_AVAILABLE:
+            return self._get_camera_config_fields(camera_id, fields)
+        
         try:
-            # Increased timeout for config retrieval (10s connect, 15s read)
-            response = self.session.get(f"{self.base_url}/config/{camera_id}/get", timeout=(10, 15))
+            response = self._with_backoff(
+                lambda: self.session.get(f"{self.base_url}/config/{camera_id}/get", timeout=self._T_SLOW)
+            )
             if response.status_code == 200:
-                return response.json()
+                config = _json_loads(response.content)
+                with self._cache_lock:
+                    self._config_cache[camera_id] = (time.monotonic(), config)
+                if fields is not None:
+                    return {key: config[key] for key in fields if key in config}
+                return dict(config)
             else:
                 logging.warning(f"MotionEye API returned status {response.status_code} for camera {camera_id}: {response.text[:200]}")
             return None
@@ -130,41 +668,265 @@ class MotionEyeClient:
             logging.error(f"Error getting camera config from MotionEye: {e}", exc_info=True)
             return None
     
+    def _get_camera_config_fields(self, camera_id: int, fields: List[str]) -> Optional[Dict[str, Any]]:
+        """Stream-parse a camera config, stopping once all requested fields are read (not cached)"""
+        wanted = set(fields)
+        try:
+            with self._with_backoff(
+                lambda: self.session.get(f"{self.base_url}/config/{camera_id}/get", timeout=self._T_SLOW, stream=True)
+            ) as response:
+                if response.status_code != 200:
+                    logging.warning(f"MotionEye API returned status {response.status_code} for camera {camera_id}: {response.text[:200]}")
+                    return None
+                response.raw.decode_content = True
+                config = {}
+                for key, value in ijson.kvitems(response.raw, '', use_float=True):
+                    if key in wanted:
+                        config[key] = value
+                        if len(config) == len(wanted):
+                            break
+                return config
+        except Exception as e:
+            logging.error(f"Error getting camera config from MotionEye: {e}", exc_info=True)
+            return None
+    
+    @staticmethod
+    def _settings_unchanged(current_config: Dict[str, Any], motion_settings: Dict[str, Any]) -> bool:
+        """True if the config already has every requested motion setting"""
+        return all(key in current_config and current_config[key] == value for key, value in motion_settings.items())
+    
     def set_motion_settings(self, camera_id: int, motion_settings: Dict[str, Any]) -> bool:
-        """Update motion detection settings for a camera"""
+        """Update motion detection settings for a camera
+        
+        With partial_updates only the given settings are posted, skipping the
+        config read; otherwise the full config is read (from cache when fresh),
+        merged and posted back, unless it already matches.
+        """
+        if self._open_circuit_status():
+            return False
         try:
-            # Get current config first
-            current_config = self.get_camera_config(camera_id)
-            if not current_config:
-                return False
-            
-            # Update with motion settings
-            current_config.update(motion_settings)
+            if self.partial_updates:
+                current_config = motion_settings
+            else:
+                # Get current config first
+                current_config = self.get_camera_config(camera_id)
+                if not current_config:
+                    return False
+                if self._settings_unchanged(current_config, motion_settings):
+                    return True
+                
+                # Update with motion settings
+                current_config.update(motion_settings)
             
-            # Send updated config with increased timeout (10s connect, 15s read)
-            response = self.session.post(f"{self.base_url}/config/{camera_id}/set", json=current_config, timeout=(10, 15))
-            return response.status_code == 200
+            # Send updated config
+            body, headers = self._json_body(current_config)
+            response = self._with_reauth(lambda: self.session.post(
+                f"{self.base_url}/config/{camera_id}/set", data=body, headers=headers, timeout=self._T_SLOW
+            ))
+            if response.status_code == 200:
+                self._invalidate_config(camera_id)
+                return True
+            return False
         except Exception as e:
             logging.error(f"Error setting motion settings in MotionEye: {e}")
             return False
     
-    def get_status(self) -> str:
-        """Get MotionEye server status"""
+    def set_motion_settings_many(self, settings_by_id: Dict[int, Dict[str, Any]]) -> Dict[int, bool]:
+        """Update motion detection settings for many cameras concurrently
+        
+        Blocking wrapper around aset_motion_settings_many; from async code
+        await that instead (this can't run inside an event loop).
+        """
+        return asyncio.run(self.aset_motion_settings_many(settings_by_id))
+    
+    async def aset_motion_settings_many(self, settings_by_id: Dict[int, Dict[str, Any]]) -> Dict[int, bool]:
+        """Update motion detection settings for many cameras concurrently
+        
+        Cameras are independent, so all read-modify-write updates run at
+        once and the whole batch takes about as long as the slowest camera.
+        
+        Args:
+            settings_by_id: Motion settings to apply, keyed by MotionEye camera ID
+            
+        Returns:
+            Success flag per camera ID
+        """
+        camera_ids = list(settings_by_id)
+        if self._open_circuit_status():
+            return dict.fromkeys(camera_ids, False)
+        if not HTTPX_AVAILABLE:
+            # Fall back to the blocking client on this client's executor
+            results = await asyncio.gather(*[
+                self.a_set_motion_settings(camera_id, settings_by_id[camera_id])
+                for camera_id in camera_ids
+            ])
+            return dict(zip(camera_ids, results))
+        
+        reauth_lock = asyncio.Lock()
+        login_ok = [True]
+        
+        # One client per batch: an AsyncClient is bound to the event loop it runs on
+        async with httpx.AsyncClient(
+            base_url=self.base_url,
+            cookies=self.session.cookies,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            timeout=httpx.Timeout(self._T_SLOW[1], connect=self._T_SLOW[0])
+        ) as client:
+            async def _reauth(rejected_cookies: Dict[str, str]) -> bool:
+                # Log in once per batch: cameras rejected with the same stale
+                # cookies wait for the first login instead of each starting one.
+                # The client shares the session's cookie jar, so a login on the
+                # executor updates its cookies too.
+                async with reauth_lock:
+                    if self.session.cookies.get_dict() == rejected_cookies:
+                        self.session.cookies.clear()
+                        login_ok[0] = await self._run(self._authenticate, *self._credentials)
+                    return login_ok[0]
+            
+            async def _send(method: str, url: str, **kwargs) -> "httpx.Response":
+                # Same policy as _with_reauth: on 401/403 log in again once and repeat
+                sent_cookies = self.session.cookies.get_dict()
+                response = await self._abreaker_call(lambda: client.request(method, url, **kwargs))
+                if response.status_code in (401, 403) and self._credentials:
+                    if await _reauth(sent_cookies):
+                        response = await self._abreaker_call(lambda: client.request(method, url, **kwargs))
+                        if response.status_code in (401, 403):
+                            logging.warning(f"MotionEye auth verification failed: {response.status_code}")
+                if not self._auth_verified and self._credentials and response.status_code < 400:
+                    self._auth_verified = True
+                    await self._run(self._save_cookies, self._credentials[0])
+                return response
+            
+            async def _aset(camera_id: int, motion_settings: Dict[str, Any]) -> bool:
+                try:
+                    if self.partial_updates:
+                        current_config = motion_settings
+                    else:
+                        current_config = self._cached_config(camera_id)
+                        if current_config is None:
+                            response = await _send("GET", f"/config/{camera_id}/get")
+                            if response.status_code != 200:
+                                logging.warning(f"MotionEye API returned status {response.status_code} for camera {camera_id}: {response.text[:200]}")
+                                return False
+                            current_config = _json_loads(response.content)
+                        if self._settings_unchanged(current_config, motion_settings):
+                            return True
+                        
+                        current_config.update(motion_settings)
+                    body, headers = self._json_body(current_config)
+                    response = await _send("POST", f"/config/{camera_id}/set", content=body, headers=headers)
+                    if response.status_code == 200:
+                        self._invalidate_config(camera_id)
+                        return True
+                    return False
+                except MotionEyeUnavailableError:
+                    return False
+                except Exception as e:
+                    logging.error(f"Error setting motion settings in MotionEye for camera {camera_id}: {e}")
+                    return False
+            
+            results = await asyncio.gather(*[
+                _aset(camera_id, settings_by_id[camera_id]) for camera_id in camera_ids
+            ])
+        return dict(zip(camera_ids, results))
+    
+    def get_status(self, deep: bool = False) -> str:
+        """Get MotionEye server status
+        
+        By default a bodiless HEAD request with short timeouts is enough: any
+        HTTP answer other than a server error (auth failures and 405/501 for
+        an unsupported HEAD included) proves the server is up. deep=True
+        checks /config/list instead, like get_cameras.
+        
+        Returns:
+            "running", "error", "timeout" or "not_available"
+        """
+        if deep:
+            status, _ = self._fetch_config_list()
+            return status
+        
+        with self._cache_lock:
+            cached = self._list_cache if self._list_cache is not None else self._status_cache
+        if cached is not None and time.monotonic() - cached[0] < self._list_ttl:
+            return cached[1]
+        status = self._open_circuit_status()
+        if status:
+            return status
+        
         try:
-            # Increased timeout for status check (10s connect, 15s read)
-            response = self.session.get(f"{self.base_url}/config/list", timeout=(10, 15))
-            if response.status_code == 200:
-                return "running"
-            else:
-                return "error"
+            response = self._breaker_call(
+                lambda: self.session.head(f"{self.base_url}/", timeout=self._T_FAST, allow_redirects=False)
+            )
+            # 501 just means HEAD isn't implemented, which still proves liveness
+            status = "running" if response.status_code < 500 or response.status_code == 501 else "error"
+        except MotionEyeUnavailableError as e:
+            return e.status
         except requests.exceptions.Timeout:
-            return "timeout"
+            status = "timeout"
         except requests.exceptions.ConnectionError:
             return "not_available"
         except Exception:
             return "error"
+        
+        with self._cache_lock:
+            self._status_cache = (time.monotonic(), status)
+        return status
+    
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking client method on this client's executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+    
+    async def a_get_cameras(self) -> List[Dict[str, Any]]:
+        """Async variant of get_cameras"""
+        return await self._run(self.get_cameras)
+    
+    async def a_get_status(self, deep: bool = False) -> str:
+        """Async variant of get_status"""
+        return await self._run(self.get_status, deep)
+    
+    async def a_add_camera(self, camera_config: Dict[str, Any]) -> bool:
+        """Async variant of add_camera"""
+        return await self._run(self.add_camera, camera_config)
+    
+    async def a_update_camera(self, camera_id: int, camera_config: Dict[str, Any]) -> bool:
+        """Async variant of update_camera"""
+        return await self._run(self.update_camera, camera_id, camera_config)
+    
+    async def a_delete_camera(self, camera_id: int) -> bool:
+        """Async variant of delete_camera"""
+        return await self._run(self.delete_camera, camera_id)
+    
+    async def a_get_camera_config(
+        self, camera_id: int, force_refresh: bool = False, fields: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Async variant of get_camera_config"""
+        return await self._run(self.get_camera_config, camera_id, force_refresh=force_refresh, fields=fields)
+    
+    async def a_set_motion_settings(self, camera_id: int, motion_settings: Dict[str, Any]) -> bool:
+        """Async variant of set_motion_settings"""
+        return await self._run(self.set_motion_settings, camera_id, motion_settings)
+
+
+# Global MotionEye client instance, built on first use so importing this
+# module doesn't create a session and connection pools
+_motioneye_client: Optional[MotionEyeClient] = None
+_motioneye_client_lock = threading.Lock()
+
+
+def get_motioneye_client() -> MotionEyeClient:
+    """Return the shared MotionEye client, creating it on first call"""
+    global _motioneye_client
+    if _motioneye_client is None:
+        with _motioneye_client_lock:
+            if _motioneye_client is None:
+                _motioneye_client = MotionEyeClient()
+    return _motioneye_client
 
 
-# Global MotionEye client instance
-motioneye_client = MotionEyeClient()
+def __getattr__(name: str):
+    # Backward compatibility: `from services.motioneye import motioneye_client`
+    if name == "motioneye_client":
+        return get_motioneye_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -3,39 +3,73 @@ import os
 import json
 import logging
 import asyncio
-from datetime import datetime
-from typing import Dict, Any, Optional
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
 
+import aiofiles.os
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from fastapi import Request, HTTPException
 
 try:
-    from ..database import Detection, Camera
-    from ..services.ai_backends import ai_backend_manager
+    from ..config import AI_BACKEND
+    from ..database import Detection, Camera, FaceDetection, SoundDetection
+    from ..routers.settings import get_setting
+    from ..services.ai_batcher import ai_batcher
+    from ..services.face_recognition import face_recognition_service, encode_face_encoding
+    from ..services.sound_detection import sound_detection_service
     from ..services.smart_detection import SmartDetectionProcessor
     from ..services.notifications import notification_service
-    from ..services.events import get_event_manager
+    from ..services.events import get_event_manager, DetectionEvent
     from ..services.webhooks import WebhookService
     from ..utils.audit import log_audit_event
     from ..motioneye_webhook import parse_motioneye_payload
     from ..motioneye_events import should_process_event
 except (ImportError, ValueError):
-    from database import Detection, Camera
-    from services.ai_backends import ai_backend_manager
+    from config import AI_BACKEND
+    from database import Detection, Camera, FaceDetection, SoundDetection
+    from routers.settings import get_setting
+    from services.ai_batcher import ai_batcher
+    from services.face_recognition import face_recognition_service, encode_face_encoding
+    from services.sound_detection import sound_detection_service
     from services.smart_detection import SmartDetectionProcessor
     from services.notifications import notification_service
-    from services.events import get_event_manager
+    from services.events import get_event_manager, DetectionEvent
     from services.webhooks import WebhookService
     from utils.audit import log_audit_event
     from motioneye_webhook import parse_motioneye_payload
     from motioneye_events import should_process_event
 
+# Try to import orjson for faster serialization of face and audio data
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# File types by (lowercased) extension
+_VIDEO_EXT = frozenset({'.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv', '.wmv', '.m4v', '.3gp', '.ogv'})
+_AUDIO_EXT = frozenset({'.wav', '.mp3', '.flac', '.ogg', '.m4a', '.aac', '.wma'})
+_IMAGE_EXT = frozenset({'.jpg', '.jpeg', '.png'})
+
+
+def _to_json(value: Any) -> str:
+    """Serialize to a JSON string for a Text column, with orjson when installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(value)
+
 
 class MotionEyeWebhookHandler:
     """Handler for MotionEye webhook events"""
     
+    # MotionEye's media root inside its container, mapped to motioneye_media locally
+    _MOTIONEYE_MEDIA_ROOT = "/var/lib/motioneye"
+    _MOTIONEYE_MEDIA_PREFIX = _MOTIONEYE_MEDIA_ROOT + "/"
+    _MOTIONEYE_MEDIA_PREFIX_LEN = len(_MOTIONEYE_MEDIA_PREFIX)
+    
     def __init__(self, db: Session):
         self.db = db
         self.event_manager = get_event_manager()
@@ -66,8 +100,8 @@ class MotionEyeWebhookHandler:
             # Resolve local file path
             local_file_path = self._resolve_file_path(file_path, wildlife_app_dir)
             
-            # Validate file existence
-            if not os.path.exists(local_file_path):
+            # Validate file existence (stat off the event loop)
+            if not await aiofiles.os.path.exists(local_file_path):
                 return self._handle_file_not_found(request, local_file_path, file_path, camera_id)
             
             # Check if this is a video file - handle video linking
@@ -88,13 +122,9 @@ class MotionEyeWebhookHandler:
             # Process Face Recognition (if enabled and available)
             face_detections = []
             try:
-                try:
-                    from ..services.face_recognition import face_recognition_service
-                except (ImportError, ValueError):
-                    from services.face_recognition import face_recognition_service
                 if face_recognition_service.is_available():
-                    # Load known faces if not already loaded
-                    if not face_recognition_service.known_faces:
+                    # Load known faces once; an empty result counts as loaded too
+                    if not face_recognition_service.known_faces_loaded:
                         face_recognition_service.load_known_faces(self.db)
                     
                     # Recognize faces in the image
@@ -107,7 +137,7 @@ class MotionEyeWebhookHandler:
                 self.db.rollback()
             
             # Determine camera name and file date for URLs
-            camera_info = self.db.query(Camera).filter(Camera.id == camera_id).first()
+            camera_info = await asyncio.to_thread(self._get_camera, camera_id)
             extracted_camera_name = self._extract_camera_name(local_file_path, camera_id)
             camera_name = camera_info.name if camera_info else extracted_camera_name
             file_date = self._extract_file_date(local_file_path)
@@ -142,26 +172,22 @@ class MotionEyeWebhookHandler:
                 timestamp=datetime.now()
             )
             
-            db_detection = self._save_detection_to_db(detection_data)
+            db_detection = await asyncio.to_thread(self._save_detection_to_db, detection_data)
             
             # Save face detections to database
             if face_detections:
                 try:
-                    try:
-                        from ..database import FaceDetection
-                    except (ImportError, ValueError):
-                        from database import FaceDetection
-                    import json
-                    for face in face_detections:
-                        face_detection = FaceDetection(
-                            detection_id=db_detection.id,
-                            known_face_id=face.get("known_face_id"),
-                            confidence=face.get("recognition_confidence", 0.0),
-                            face_location=json.dumps(face.get("face_location", {})),
-                            face_encoding=json.dumps(face.get("face_encoding", []))
-                        )
-                        self.db.add(face_detection)
-                    self.db.commit()
+                    # One multi-row INSERT instead of one per face
+                    await asyncio.to_thread(self._insert_rows, FaceDetection, [
+                        {
+                            "detection_id": db_detection.id,
+                            "known_face_id": face.get("known_face_id"),
+                            "confidence": face.get("recognition_confidence", 0.0),
+                            "face_location": _to_json(face.get("face_location", {})),
+                            "face_encoding": encode_face_encoding(face["face_encoding_np"]) if face.get("face_encoding_np") is not None else None
+                        }
+                        for face in face_detections
+                    ])
                     logger.info(f"Saved {len(face_detections)} face detection(s) for detection {db_detection.id}")
                 except Exception as e:
                     logger.error(f"Error saving face detections: {e}")
@@ -218,10 +244,10 @@ class MotionEyeWebhookHandler:
 
     def _resolve_file_path(self, file_path: str, wildlife_app_dir: str) -> str:
         """Map MotionEye internal path to local path"""
-        if file_path.startswith("/var/lib/motioneye/"):
-            relative_path = file_path[len("/var/lib/motioneye/"):]
+        if file_path.startswith(self._MOTIONEYE_MEDIA_PREFIX):
+            relative_path = file_path[self._MOTIONEYE_MEDIA_PREFIX_LEN:]
             return os.path.join(wildlife_app_dir, "motioneye_media", relative_path)
-        return file_path.replace("/var/lib/motioneye", os.path.join(wildlife_app_dir, "motioneye_media"))
+        return file_path.replace(self._MOTIONEYE_MEDIA_ROOT, os.path.join(wildlife_app_dir, "motioneye_media"))
 
     def _handle_missing_data(self, request, data, camera_id, file_path):
         log_audit_event(
@@ -250,31 +276,22 @@ class MotionEyeWebhookHandler:
 
     def _is_video_file(self, file_path: str) -> bool:
         """Check if file is a video file"""
-        video_extensions = ('.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv', '.wmv', '.m4v', '.3gp', '.ogv')
-        return file_path.lower().endswith(video_extensions)
+        return os.path.splitext(file_path)[1].lower() in _VIDEO_EXT
     
     def _is_audio_file(self, file_path: str) -> bool:
         """Check if file is an audio file"""
-        audio_extensions = ('.wav', '.mp3', '.flac', '.ogg', '.m4a', '.aac', '.wma')
-        return file_path.lower().endswith(audio_extensions)
+        return os.path.splitext(file_path)[1].lower() in _AUDIO_EXT
     
     def _should_skip_file(self, file_path: str) -> bool:
-        if not file_path.lower().endswith(('.jpg', '.jpeg', '.png')):
-            return True
-        filename = os.path.basename(file_path).lower()
-        if filename.endswith('m.jpg') or filename.endswith('m.jpeg'):
+        if os.path.splitext(file_path)[1].lower() not in _IMAGE_EXT:
             return True
-        return False
+        # MotionEye motion masks end in "m.jpg"
+        return os.path.basename(file_path).lower().endswith(('m.jpg', 'm.jpeg'))
 
     async def _run_ai_processing(self, file_path: str, camera_id: int, request: Request) -> Dict[str, Any]:
         """Run AI prediction with error handling"""
         try:
             # Check if AI processing is enabled
-            try:
-                from ..routers.settings import get_setting
-            except (ImportError, ValueError):
-                from routers.settings import get_setting
-            
             ai_enabled = get_setting(self.db, "ai_enabled", default=True)
             if not ai_enabled:
                 logger.info("AI processing is disabled, skipping AI analysis")
@@ -284,13 +301,9 @@ class MotionEyeWebhookHandler:
                     "confidence": 0.0
                 }
             
-            # Use configured backend or default - pass db_session to check enabled status
-            try:
-                from ..config import AI_BACKEND
-            except (ImportError, ValueError):
-                from config import AI_BACKEND
-            
-            predictions = ai_backend_manager.predict(file_path, backend_name=AI_BACKEND, db_session=self.db)
+            # Use configured backend or default; runs off the event loop, batched with
+            # images from concurrent webhooks (the batch checks enabled models itself)
+            predictions = await ai_batcher.predict(file_path, backend_name=AI_BACKEND)
             if "error" in predictions:
                 logger.warning(f"AI Error: {predictions['error']}")
                 # Log but continue (will result in Unknown/Fallback)
@@ -323,6 +336,45 @@ class MotionEyeWebhookHandler:
         )
         return {"status": "skipped", "message": "Detection filtered (low confidence)"}
 
+    # Blocking DB helpers: the async handlers run these via asyncio.to_thread so
+    # round trips don't stall the event loop. The session is still used by one
+    # thread at a time, since the handler awaits each call.
+    
+    def _get_camera(self, camera_id: int) -> Optional[Camera]:
+        return self.db.query(Camera).filter(Camera.id == camera_id).first()
+    
+    def _link_video_to_recent_detection(self, camera_id: int, window_start: datetime, window_end: datetime, video_path: str) -> Optional[Detection]:
+        """Set video_path on the camera's latest detection in the window that has none"""
+        recent_detection = self.db.query(Detection).filter(
+            Detection.camera_id == camera_id,
+            Detection.timestamp >= window_start,
+            Detection.timestamp <= window_end,
+            Detection.video_path.is_(None)  # Only update detections without videos
+        ).order_by(Detection.timestamp.desc()).first()
+        if recent_detection:
+            recent_detection.video_path = video_path
+            self.db.commit()
+            self.db.refresh(recent_detection)
+        return recent_detection
+    
+    def _find_recent_detection_id(self, camera_id: int, window_start: datetime, window_end: datetime) -> Optional[int]:
+        recent_detection = self.db.query(Detection.id).filter(
+            Detection.camera_id == camera_id,
+            Detection.timestamp >= window_start,
+            Detection.timestamp <= window_end
+        ).order_by(Detection.timestamp.desc()).first()
+        return recent_detection.id if recent_detection else None
+    
+    def _insert_rows(self, model, rows: List[Dict[str, Any]]):
+        self.db.execute(insert(model), rows)
+        self.db.commit()
+    
+    def _save_to_db(self, record):
+        self.db.add(record)
+        self.db.commit()
+        self.db.refresh(record)
+        return record
+    
     def _save_detection_to_db(self, data: Dict[str, Any]) -> Detection:
         try:
             db_detection = Detection(**data)
@@ -335,43 +387,46 @@ class MotionEyeWebhookHandler:
             raise e
 
     async def _handle_post_save_actions(self, db_detection, camera_id, camera_name, analysis, extracted_key, file_date, file_path):
-        # Notifications
+        # Notifications, external webhooks and the broadcast are independent,
+        # so run them concurrently; the blocking ones go to worker threads
+        detection_id = db_detection.id
+        detection_timestamp = db_detection.timestamp
+        actions = {"Broadcast": self._broadcast_detection(detection_id, camera_id, camera_name, analysis, extracted_key, file_date, file_path)}
         if analysis.get("should_notify", False):
-            try:
-                notification_service.send_detection_notification(
-                    species=analysis["species"],
-                    confidence=analysis["confidence"],
-                    camera_id=camera_id,
-                    detection_id=db_detection.id,
-                    timestamp=db_detection.timestamp
-                )
-            except Exception as e:
-                logger.warning(f"Notification error: {e}")
-        
-        # External Webhooks
-        try:
-            webhook_service = WebhookService(self.db)
-            webhook_service.trigger_detection_webhooks(
-                detection_data={"id": db_detection.id, "species": analysis.get("species")},
-                confidence=analysis.get("confidence", 0),
-                species=analysis.get("species", "Unknown")
+            actions["Notification"] = asyncio.to_thread(
+                notification_service.send_detection_notification,
+                species=analysis["species"],
+                confidence=analysis["confidence"],
+                camera_id=camera_id,
+                detection_id=detection_id,
+                timestamp=detection_timestamp
             )
-        except Exception as e:
-            logger.warning(f"External webhook error: {e}")
-            
-        # Broadcast
-        try:
-            media_url = f"/media/{extracted_key}/{file_date}/{os.path.basename(file_path)}"
-            await self.event_manager.broadcast_detection({
-                "id": db_detection.id,
-                "camera_id": camera_id,
-                "camera_name": camera_name,
-                "species": analysis["species"],
-                "confidence": analysis["confidence"],
-                "media_url": media_url
-            })
-        except Exception as e:
-            logger.warning(f"Broadcast error: {e}")
+        # Only this thread uses the session while the actions run
+        actions["External webhook"] = asyncio.to_thread(self._trigger_external_webhooks, detection_id, analysis)
+        
+        results = await asyncio.gather(*actions.values(), return_exceptions=True)
+        for name, result in zip(actions, results):
+            if isinstance(result, Exception):
+                logger.warning(f"{name} error: {result}")
+    
+    def _trigger_external_webhooks(self, detection_id: int, analysis: Dict[str, Any]):
+        webhook_service = WebhookService(self.db)
+        webhook_service.trigger_detection_webhooks(
+            detection_data={"id": detection_id, "species": analysis.get("species")},
+            confidence=analysis.get("confidence", 0),
+            species=analysis.get("species", "Unknown")
+        )
+    
+    async def _broadcast_detection(self, detection_id, camera_id, camera_name, analysis, extracted_key, file_date, file_path):
+        media_url = f"/media/{extracted_key}/{file_date}/{os.path.basename(file_path)}"
+        await self.event_manager.broadcast_detection(DetectionEvent(
+            id=detection_id,
+            camera_id=camera_id,
+            camera_name=camera_name,
+            species=analysis["species"],
+            confidence=analysis["confidence"],
+            media_url=media_url
+        ))
 
     def _extract_camera_name(self, file_path: str, camera_id: int) -> str:
         parts = file_path.split(os.sep)
@@ -389,8 +444,6 @@ class MotionEyeWebhookHandler:
     
     async def _handle_video_webhook(self, request: Request, video_path: str, camera_id: int, timestamp: Optional[str], payload: Dict[str, Any]) -> Dict[str, Any]:
         """Handle video file webhook - link video to most recent detection"""
-        from datetime import timedelta
-        
         try:
             # Parse timestamp if provided
             detection_timestamp = None
@@ -420,20 +473,16 @@ class MotionEyeWebhookHandler:
             # Videos are typically created right after the image detection, so look within last 5 minutes
             time_window_start = detection_timestamp - timedelta(minutes=5)
             
-            # Query for recent detections for this camera
-            recent_detection = self.db.query(Detection).filter(
-                Detection.camera_id == camera_id,
-                Detection.timestamp >= time_window_start,
-                Detection.timestamp <= detection_timestamp + timedelta(minutes=1),  # Allow 1 min after
-                Detection.video_path.is_(None)  # Only update detections without videos
-            ).order_by(Detection.timestamp.desc()).first()
+            # Link the video to the most recent detection for this camera without one
+            recent_detection = await asyncio.to_thread(
+                self._link_video_to_recent_detection,
+                camera_id,
+                time_window_start,
+                detection_timestamp + timedelta(minutes=1),  # Allow 1 min after
+                video_path
+            )
             
             if recent_detection:
-                # Update the detection with video path
-                recent_detection.video_path = video_path
-                self.db.commit()
-                self.db.refresh(recent_detection)
-                
                 logger.info(f"Linked video {video_path} to detection {recent_detection.id} (camera {camera_id})")
                 
                 # Log audit event
@@ -474,17 +523,7 @@ class MotionEyeWebhookHandler:
     
     async def _handle_audio_webhook(self, request: Request, audio_path: str, camera_id: int, timestamp: Optional[str], payload: Dict[str, Any]) -> Dict[str, Any]:
         """Handle audio file webhook - process sound detection"""
-        from datetime import timedelta
-        
         try:
-            # Import sound detection service
-            try:
-                from ..services.sound_detection import sound_detection_service
-                from ..database import SoundDetection
-            except (ImportError, ValueError):
-                from services.sound_detection import sound_detection_service
-                from database import SoundDetection
-            
             # Check if sound detection is available
             if not sound_detection_service.is_available():
                 logger.info(f"Sound detection service not available, skipping audio file: {audio_path}")
@@ -545,20 +584,16 @@ class MotionEyeWebhookHandler:
                 time_window_start = detection_timestamp - timedelta(seconds=30)
                 time_window_end = detection_timestamp + timedelta(seconds=30)
                 
-                recent_detection = self.db.query(Detection).filter(
-                    Detection.camera_id == camera_id,
-                    Detection.timestamp >= time_window_start,
-                    Detection.timestamp <= time_window_end
-                ).order_by(Detection.timestamp.desc()).first()
+                linked_detection_id = await asyncio.to_thread(
+                    self._find_recent_detection_id, camera_id, time_window_start, time_window_end
+                )
                 
-                if recent_detection:
-                    linked_detection_id = recent_detection.id
+                if linked_detection_id:
                     logger.info(f"Linking sound detection to detection {linked_detection_id}")
             except Exception as e:
                 logger.warning(f"Error finding linked detection: {e}")
             
             # Store audio features as JSON
-            import json
             audio_features = {
                 "all_sounds": detected_sounds,
                 "sample_rate": sound_results.get("sample_rate"),
@@ -573,13 +608,11 @@ class MotionEyeWebhookHandler:
                 confidence=confidence,
                 audio_path=audio_path,
                 duration=duration,
-                audio_features=json.dumps(audio_features),
+                audio_features=_to_json(audio_features),
                 timestamp=detection_timestamp
             )
             
-            self.db.add(sound_detection)
-            self.db.commit()
-            self.db.refresh(sound_detection)
+            await asyncio.to_thread(self._save_to_db, sound_detection)
             
             logger.info(f"Created sound detection {sound_detection.id}: {sound_class} (confidence: {confidence:.2f})")
             
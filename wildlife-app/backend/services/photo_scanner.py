@@ -2,6 +2,7 @@
 import os
 import shutil
 import asyncio
+import json
 import logging
 from datetime import datetime
 from hashlib import sha256
@@ -10,11 +11,11 @@ from sqlalchemy.orm import Session
 try:
     from ..database import Detection, Camera
     from ..services.speciesnet import speciesnet_processor
-    from ..services.events import EventManager
+    from ..services.events import EventManager, DetectionEvent
 except ImportError:
     from database import Detection, Camera
     from services.speciesnet import speciesnet_processor
-    from services.events import EventManager
+    from services.events import EventManager, DetectionEvent
 
 logger = logging.getLogger(__name__)
 
@@ -169,7 +170,7 @@ class PhotoScanner:
                 "species": species,
                 "confidence": confidence,
                 "image_path": archived_path,
-                "detections_json": str(speciesnet_response),
+                "detections_json": json.dumps(speciesnet_response, default=str),
                 "file_hash": file_hash
             }
             
@@ -209,16 +210,16 @@ class PhotoScanner:
                             filename = path_parts[idx + 4]
                             media_url = f"/archived_photos/{species_name}/{camera_folder}/{date_folder}/{filename}"
                     
-                    detection_event = {
-                        "id": db_detection.id,
-                        "camera_id": camera_id,
-                        "camera_name": camera_name,
-                        "species": detection_data["species"],
-                        "confidence": detection_data["confidence"],
-                        "image_path": archived_path,
-                        "timestamp": db_detection.timestamp.isoformat(),
-                        "media_url": media_url or f"/media/{camera_name}/{path_parts[-2] if len(path_parts) >= 2 else 'unknown'}/{path_parts[-1]}"
-                    }
+                    detection_event = DetectionEvent(
+                        id=db_detection.id,
+                        camera_id=camera_id,
+                        camera_name=camera_name,
+                        species=detection_data["species"],
+                        confidence=detection_data["confidence"],
+                        image_path=archived_path,
+                        timestamp=db_detection.timestamp.isoformat(),
+                        media_url=media_url or f"/media/{camera_name}/{path_parts[-2] if len(path_parts) >= 2 else 'unknown'}/{path_parts[-1]}"
+                    )
                     
                     try:
                         loop = asyncio.get_event_loop()
@@ -15,7 +15,7 @@ try:
     from ..database import Detection, Camera
     from ..services.ai_backends import ai_backend_manager
     from ..services.notifications import notification_service
-    from ..services.events import get_event_manager
+    from ..services.events import get_event_manager, DetectionEvent
     from ..utils.audit import log_audit_event
     from ..config import THINGINO_CAMERA_USERNAME, THINGINO_CAMERA_PASSWORD
 except ImportError:
@@ -23,7 +23,7 @@ except ImportError:
     from database import Detection, Camera
     from services.ai_backends import ai_backend_manager
     from services.notifications import notification_service
-    from services.events import get_event_manager
+    from services.events import get_event_manager, DetectionEvent
     from utils.audit import log_audit_event
     from config import THINGINO_CAMERA_USERNAME, THINGINO_CAMERA_PASSWORD
 
@@ -193,16 +193,16 @@ class ThinginoService:
                 logger.warning(f"Failed to send notification: {e}")
         
         # Websocket Broadcast
-        detection_event = {
-            "id": detection.id,
-            "camera_id": camera_id,
-            "camera_name": camera_name,
-            "species": detection_data["species"],
-            "confidence": detection_data["confidence"],
-            "image_path": temp_path,
-            "timestamp": detection.timestamp.isoformat(),
-            "media_url": f"/api/thingino/image/{detection.id}"
-        }
+        detection_event = DetectionEvent(
+            id=detection.id,
+            camera_id=camera_id,
+            camera_name=camera_name,
+            species=detection_data["species"],
+            confidence=detection_data["confidence"],
+            image_path=temp_path,
+            timestamp=detection.timestamp.isoformat(),
+            media_url=f"/api/thingino/image/{detection.id}"
+        )
         
         try:
             # We can run this directly if we are in an async context (which we are)
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.services import ai_batcher as ai_batcher_module
+from backend.services.ai_batcher import AIBatcher
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def fake_predict(monkeypatch):
+    """Replace the backend call; records batches and the peak number running at once."""
+    state = {"batches": [], "running": 0, "peak": 0, "error": None}
+    lock = threading.Lock()
+
+    def predict_batch(file_paths, backend_name):
+        with lock:
+            state["batches"].append((backend_name, list(file_paths)))
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        try:
+            time.sleep(0.02)
+            if state["error"] is not None:
+                raise state["error"]
+            return [{"file": path, "backend": backend_name} for path in file_paths]
+        finally:
+            with lock:
+                state["running"] -= 1
+
+    monkeypatch.setattr(ai_batcher_module, "_predict_batch", predict_batch)
+    return state
+
+
+@pytest.mark.anyio
+async def test_concurrent_predictions_share_a_batch(fake_predict):
+    batcher = AIBatcher(max_batch=8, window_ms=50)
+
+    results = await asyncio.gather(*[batcher.predict(f"img{i}.jpg") for i in range(5)])
+
+    assert results == [{"file": f"img{i}.jpg", "backend": None} for i in range(5)]
+    assert fake_predict["batches"] == [(None, [f"img{i}.jpg" for i in range(5)])]
+
+
+@pytest.mark.anyio
+async def test_batches_split_by_size_and_backend(fake_predict):
+    batcher = AIBatcher(max_batch=2, window_ms=50)
+
+    results = await asyncio.gather(
+        batcher.predict("a.jpg"),
+        batcher.predict("b.jpg", backend_name="yolov8"),
+        batcher.predict("c.jpg"),
+    )
+
+    assert [r["backend"] for r in results] == [None, "yolov8", None]
+    assert sorted(fake_predict["batches"], key=str) == sorted([
+        (None, ["a.jpg"]), ("yolov8", ["b.jpg"]), (None, ["c.jpg"]),
+    ], key=str)
+
+
+@pytest.mark.anyio
+async def test_batches_never_run_concurrently(fake_predict):
+    batcher = AIBatcher(max_batch=1, window_ms=50)
+
+    await asyncio.gather(*[batcher.predict(f"img{i}.jpg") for i in range(6)])
+
+    assert len(fake_predict["batches"]) == 6
+    assert fake_predict["peak"] == 1
+
+
+@pytest.mark.anyio
+async def test_batch_failure_is_raised_to_every_waiter(fake_predict):
+    batcher = AIBatcher(max_batch=8, window_ms=50)
+    fake_predict["error"] = RuntimeError("model crashed")
+
+    results = await asyncio.gather(
+        *[batcher.predict(f"img{i}.jpg") for i in range(3)], return_exceptions=True
+    )
+
+    assert [str(r) for r in results] == ["model crashed"] * 3
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    # The batcher keeps serving after a failed batch
+    fake_predict["error"] = None
+    assert await batcher.predict("next.jpg") == {"file": "next.jpg", "backend": None}
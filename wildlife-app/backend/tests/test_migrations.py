@@ -0,0 +1,207 @@
+import json
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+
+from backend.main import Base
+from backend.services import migrations
+from backend.services.migrations import (
+    _add_missing_columns,
+    _convert_detections_json_to_jsonb,
+    _normalize_detections_json,
+    check_and_run_migrations,
+)
+
+
+@pytest.fixture()
+def legacy_engine():
+    """In-memory database with the face tables still storing JSON encodings."""
+    engine = create_engine(
+        "sqlite://",
+        future=True,
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE face_detections"))
+        conn.execute(text("DROP TABLE known_faces"))
+        conn.execute(text(
+            "CREATE TABLE known_faces ("
+            "id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, face_encoding TEXT NOT NULL, "
+            "image_path VARCHAR, is_active BOOLEAN, created_at DATETIME, updated_at DATETIME, "
+            "notes TEXT, tolerance FLOAT)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE face_detections ("
+            "id INTEGER PRIMARY KEY, detection_id INTEGER NOT NULL, "
+            "known_face_id INTEGER REFERENCES known_faces(id), confidence FLOAT NOT NULL, "
+            "face_location TEXT, face_encoding TEXT, created_at DATETIME)"
+        ))
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
+def _encoding_bytes(values):
+    return np.asarray(values, dtype=np.float32).tobytes()
+
+
+def test_face_encodings_are_converted_to_binary(legacy_engine):
+    with legacy_engine.begin() as conn:
+        conn.execute(text("INSERT INTO known_faces (id, name, face_encoding) VALUES (1, 'alice', :enc)"),
+                     {"enc": json.dumps([0.5, 1.5, -2.0])})
+        conn.execute(text("INSERT INTO known_faces (id, name, face_encoding) VALUES (2, 'bob', :enc)"),
+                     {"enc": json.dumps([0.25])})
+        conn.execute(text(
+            "INSERT INTO face_detections (id, detection_id, known_face_id, confidence, face_encoding) "
+            "VALUES (10, 1, 1, 0.9, :enc), (11, 1, NULL, 0.4, NULL)"
+        ), {"enc": json.dumps([3.0, 4.0])})
+
+    check_and_run_migrations(legacy_engine)
+
+    with legacy_engine.connect() as conn:
+        faces = dict(conn.execute(text("SELECT id, face_encoding FROM known_faces")).fetchall())
+        detections = dict(conn.execute(text("SELECT id, face_encoding FROM face_detections")).fetchall())
+
+    assert faces == {1: _encoding_bytes([0.5, 1.5, -2.0]), 2: _encoding_bytes([0.25])}
+    assert detections == {10: _encoding_bytes([3.0, 4.0]), 11: None}
+    column_types = {c["name"]: c["type"] for c in inspect(legacy_engine).get_columns("known_faces")}
+    assert column_types["face_encoding"].python_type is bytes
+
+
+def test_known_faces_without_encoding_are_deleted_and_unlinked(legacy_engine):
+    with legacy_engine.begin() as conn:
+        conn.execute(text("INSERT INTO known_faces (id, name, face_encoding) VALUES (1, 'alice', :enc)"),
+                     {"enc": json.dumps([1.0, 2.0])})
+        conn.execute(text("INSERT INTO known_faces (id, name, face_encoding) VALUES (2, 'empty', '[]')"))
+        conn.execute(text(
+            "INSERT INTO face_detections (id, detection_id, known_face_id, confidence, face_encoding) "
+            "VALUES (10, 1, 2, 0.8, '[]')"
+        ))
+
+    check_and_run_migrations(legacy_engine)
+
+    with legacy_engine.connect() as conn:
+        face_ids = [row[0] for row in conn.execute(text("SELECT id FROM known_faces"))]
+        detection = conn.execute(
+            text("SELECT known_face_id, face_encoding FROM face_detections WHERE id = 10")
+        ).one()
+
+    assert face_ids == [1]
+    # Detected faces keep the row; an empty encoding just becomes NULL
+    assert tuple(detection) == (None, None)
+
+
+def test_migrations_are_idempotent(legacy_engine):
+    with legacy_engine.begin() as conn:
+        conn.execute(text("INSERT INTO known_faces (id, name, face_encoding) VALUES (1, 'alice', :enc)"),
+                     {"enc": json.dumps([1.0])})
+
+    check_and_run_migrations(legacy_engine)
+    check_and_run_migrations(legacy_engine)
+
+    with legacy_engine.connect() as conn:
+        encoding = conn.execute(text("SELECT face_encoding FROM known_faces WHERE id = 1")).scalar_one()
+    assert encoding == _encoding_bytes([1.0])
+
+
+def test_add_missing_columns_keeps_going_after_a_failing_column():
+    engine = create_engine("sqlite://", future=True)
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE things (id INTEGER PRIMARY KEY)"))
+        _add_missing_columns(conn, "things", {"id"}, [
+            ("first", "VARCHAR"),
+            # SQLite rejects adding a PRIMARY KEY column
+            ("broken", "INTEGER PRIMARY KEY"),
+            ("last", "DOUBLE PRECISION"),
+        ])
+        conn.commit()
+    columns = {c["name"] for c in inspect(engine).get_columns("things")}
+    assert columns == {"id", "first", "last"}
+
+
+def test_add_missing_columns_falls_back_to_one_alter_per_column_on_postgres():
+    conn = MagicMock()
+    conn.dialect.name = "postgresql"
+    statements = []
+
+    def execute(statement):
+        sql = str(statement)
+        statements.append(sql)
+        if "broken" in sql:
+            raise RuntimeError("bad column")
+
+    conn.execute.side_effect = execute
+    _add_missing_columns(conn, "things", {"id"}, [("first", "VARCHAR"), ("broken", "BOGUS")])
+
+    assert statements == [
+        "ALTER TABLE things ADD COLUMN first VARCHAR, ADD COLUMN broken BOGUS",
+        "ALTER TABLE things ADD COLUMN first VARCHAR",
+        "ALTER TABLE things ADD COLUMN broken BOGUS",
+    ]
+    # Each attempt runs in its own savepoint
+    assert conn.begin_nested.call_count == 3
+
+
+def test_legacy_detections_json_is_normalized_in_batches(legacy_engine):
+    values = {
+        1: '{"species": "deer"}',
+        2: "{'species': 'fox', 'confidence': 0.9, 'box': (1, 2)}",
+        3: '{"confidence": NaN}',
+        4: "not json at all {",
+        5: None,
+    }
+    with legacy_engine.begin() as conn:
+        for row_id, value in values.items():
+            conn.execute(text("INSERT INTO detections (id, detections_json) VALUES (:id, :value)"),
+                         {"id": row_id, "value": value})
+
+    with legacy_engine.connect() as conn:
+        assert _normalize_detections_json(conn, batch_size=2) == 3
+        rows = dict(conn.execute(text("SELECT id, detections_json FROM detections")).fetchall())
+
+    assert rows == {
+        1: '{"species": "deer"}',
+        2: '{"species": "fox", "confidence": 0.9, "box": [1, 2]}',
+        3: '{"confidence": null}',
+        4: None,
+        5: None,
+    }
+    for value in rows.values():
+        if value is not None:
+            json.loads(value, parse_constant=migrations._reject_constant)
+
+    # A second pass finds nothing left to rewrite
+    with legacy_engine.connect() as conn:
+        assert _normalize_detections_json(conn, batch_size=2) == 0
+
+
+def test_jsonb_conversion_runs_after_normalizing(monkeypatch):
+    calls = []
+    monkeypatch.setattr(migrations, "_normalize_detections_json", lambda conn: calls.append("normalize"))
+    conn = MagicMock()
+    conn.execute.side_effect = lambda statement: calls.append(str(statement))
+
+    assert _convert_detections_json_to_jsonb(conn) is True
+    assert calls == [
+        "normalize",
+        "ALTER TABLE detections ALTER COLUMN detections_json TYPE JSONB USING detections_json::jsonb",
+    ]
+    conn.commit.assert_called_once()
+    conn.rollback.assert_not_called()
+
+
+def test_jsonb_conversion_failure_keeps_text_column(monkeypatch, caplog):
+    monkeypatch.setattr(migrations, "_normalize_detections_json", lambda conn: 0)
+    conn = MagicMock()
+    conn.execute.side_effect = RuntimeError("invalid input syntax for type json")
+
+    assert _convert_detections_json_to_jsonb(conn) is False
+    conn.rollback.assert_called_once()
+    conn.commit.assert_not_called()
+    assert "Could not convert detections_json to JSONB" in caplog.text
@@ -0,0 +1,243 @@
+import io
+import json
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from backend.services import motioneye
+
+
+class _MotionEyeHandler(BaseHTTPRequestHandler):
+    """Minimal MotionEye: /login sets a session cookie, /config/list requires it."""
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/login":
+            self.server.logins += 1
+            self._reply(200, headers={"Set-Cookie": "meye_username=admin; Path=/"})
+        else:
+            self._reply(404)
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("Host"), self.headers.get("Cookie")))
+        if "meye_username=admin" not in (self.headers.get("Cookie") or ""):
+            self._reply(403)
+        elif self.path == "/config/list":
+            self._reply(200, json.dumps({"cameras": [{"id": 1, "name": "Trail"}]}).encode())
+        else:
+            self._reply(404)
+
+
+@pytest.fixture()
+def motioneye_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MotionEyeHandler)
+    server.requests = []
+    server.logins = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def cookie_cache(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(motioneye, "COOKIE_CACHE_DIR", str(cache_dir))
+    monkeypatch.setattr(motioneye, "COOKIE_CACHE_PATH", str(cache_dir / "motioneye.cookies"))
+    return cache_dir
+
+
+def _response(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    response.raw = io.BytesIO(b"")
+    return response
+
+
+@pytest.fixture()
+def client():
+    """Client without credentials whose session.get is a mock."""
+    client = motioneye.MotionEyeClient("http://127.0.0.1:9")
+    client.session.get = MagicMock()
+    return client
+
+
+def _get(client):
+    return client.session.get(f"{client.base_url}/config/list")
+
+
+def _open_breaker(client):
+    client.session.get.side_effect = requests.exceptions.Timeout()
+    for _ in range(motioneye.BREAKER_FAILURE_THRESHOLD):
+        with pytest.raises(requests.exceptions.Timeout):
+            client._breaker_call(lambda: _get(client))
+
+
+def test_authenticated_client_keeps_cookies_with_pinned_dns(motioneye_server, monkeypatch):
+    port = motioneye_server.server_address[1]
+    lookups = []
+    real_gethostbyname = socket.gethostbyname
+
+    def fake_gethostbyname(host):
+        lookups.append(host)
+        return "127.0.0.1" if host == "motioneye.test" else real_gethostbyname(host)
+
+    monkeypatch.setattr(motioneye.socket, "gethostbyname", fake_gethostbyname)
+    client = motioneye.MotionEyeClient(f"http://motioneye.test:{port}", "admin", "pw")
+
+    assert client.get_cameras() == [{"id": 1, "name": "Trail"}]
+    path, host, cookie = motioneye_server.requests[-1]
+    assert (path, host, cookie) == ("/config/list", f"motioneye.test:{port}", "meye_username=admin")
+    # One lookup serves every pooled connection until the cache expires
+    assert lookups == ["motioneye.test"]
+
+
+def test_breaker_opens_after_threshold_and_fails_fast(client):
+    _open_breaker(client)
+
+    with pytest.raises(motioneye.MotionEyeUnavailableError) as excinfo:
+        client._breaker_call(lambda: _get(client))
+    assert excinfo.value.status == "timeout"
+    assert client._open_circuit_status() == "timeout"
+    assert client.session.get.call_count == motioneye.BREAKER_FAILURE_THRESHOLD
+
+
+def test_breaker_lets_a_single_probe_through_after_cooldown(client):
+    _open_breaker(client)
+    client._open_until = time.monotonic() - 1  # cooldown over
+    probe_started = threading.Event()
+    release_probe = threading.Event()
+
+    def slow_answer(*args, **kwargs):
+        probe_started.set()
+        release_probe.wait(5)
+        return _response(200)
+
+    client.session.get.side_effect = slow_answer
+    results = []
+    probe = threading.Thread(target=lambda: results.append(client._breaker_call(lambda: _get(client))))
+    probe.start()
+    assert probe_started.wait(5)
+
+    # Another caller fails fast while the probe is in flight
+    with pytest.raises(motioneye.MotionEyeUnavailableError):
+        client._breaker_call(lambda: _get(client))
+    release_probe.set()
+    probe.join(5)
+
+    assert results[0].status_code == 200
+    assert client.session.get.call_count == motioneye.BREAKER_FAILURE_THRESHOLD + 1
+    assert client._failure_count == 0
+    assert client._open_circuit_status() is None
+
+
+def test_breaker_closes_on_any_http_answer(client):
+    _open_breaker(client)
+    client._open_until = time.monotonic() - 1
+    client.session.get.side_effect = None
+    client.session.get.return_value = _response(503)
+
+    assert client._breaker_call(lambda: _get(client)).status_code == 503
+    assert client._failure_count == 0
+    assert client._breaker_call(lambda: _get(client)).status_code == 503
+
+
+def test_breaker_releases_probe_on_non_network_error(client):
+    _open_breaker(client)
+    client._open_until = time.monotonic() - 1
+    client.session.get.side_effect = ValueError("bad response")
+
+    with pytest.raises(ValueError):
+        client._breaker_call(lambda: _get(client))
+    assert client._probe_in_flight is False
+
+    # The next caller becomes the probe instead of failing fast forever
+    client.session.get.side_effect = None
+    client.session.get.return_value = _response(200)
+    assert client._breaker_call(lambda: _get(client)).status_code == 200
+
+
+def test_backoff_does_not_retry_when_breaker_opens(client, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(motioneye.time, "sleep", sleeps.append)
+    client._failure_count = motioneye.BREAKER_FAILURE_THRESHOLD - 1
+    client.session.get.side_effect = requests.exceptions.ConnectionError()
+
+    # The first connection error opens the breaker; the retry then fails fast
+    with pytest.raises(motioneye.MotionEyeUnavailableError):
+        client._with_backoff(lambda: _get(client))
+    assert client.session.get.call_count == 1
+    assert len(sleeps) == 1
+
+    with pytest.raises(motioneye.MotionEyeUnavailableError):
+        client._with_backoff(lambda: _get(client))
+    assert client.session.get.call_count == 1
+    assert len(sleeps) == 1
+
+
+def test_backoff_retries_server_errors(client, monkeypatch):
+    monkeypatch.setattr(motioneye.time, "sleep", lambda seconds: None)
+    client.session.get.side_effect = [_response(502), _response(503), _response(200)]
+
+    assert client._with_backoff(lambda: _get(client)).status_code == 200
+    assert client.session.get.call_count == 3
+
+
+cookie_cache_only = pytest.mark.skipif(
+    not motioneye.COOKIE_CACHE_SUPPORTED, reason="cookie cache needs POSIX ownership checks"
+)
+
+
+@cookie_cache_only
+def test_cookie_cache_skips_login_on_warm_start(motioneye_server, cookie_cache):
+    base_url = f"http://127.0.0.1:{motioneye_server.server_address[1]}"
+    assert motioneye.MotionEyeClient(base_url, "admin", "pw").get_cameras()
+    assert motioneye_server.logins == 1
+    assert os.stat(motioneye.COOKIE_CACHE_PATH).st_mode & 0o777 == 0o600
+    assert os.stat(cookie_cache).st_mode & 0o777 == 0o700
+
+    assert motioneye.MotionEyeClient(base_url, "admin", "pw").get_cameras()
+    assert motioneye_server.logins == 1
+
+
+@cookie_cache_only
+def test_cookie_cache_ignores_file_readable_by_others(motioneye_server):
+    base_url = f"http://127.0.0.1:{motioneye_server.server_address[1]}"
+    motioneye.MotionEyeClient(base_url, "admin", "pw").get_cameras()
+    os.chmod(motioneye.COOKIE_CACHE_PATH, 0o644)
+
+    motioneye.MotionEyeClient(base_url, "admin", "pw")
+    assert motioneye_server.logins == 2
+
+
+@cookie_cache_only
+def test_cookie_cache_replaces_planted_symlink(motioneye_server, cookie_cache, tmp_path):
+    base_url = f"http://127.0.0.1:{motioneye_server.server_address[1]}"
+    target = tmp_path / "target"
+    target.write_text("untouched")
+    os.makedirs(cookie_cache, mode=0o700)
+    os.symlink(target, motioneye.COOKIE_CACHE_PATH)
+
+    assert motioneye.MotionEyeClient(base_url, "admin", "pw").get_cameras()
+    assert target.read_text() == "untouched"
+    assert not os.path.islink(motioneye.COOKIE_CACHE_PATH)
@@ -138,6 +138,9 @@ export function useDetectionsRealtime(onNewDetection?: (detection: any) => void)
       if (data.type === 'detection') {
         // Format: { type: 'detection', data: detectionObject, timestamp: ... }
         onNewDetection?.(data.data || data.detection || data)
+      } else if (data.type === 'detection_batch') {
+        // Format: { type: 'detection_batch', data: [detectionObject, ...], timestamp: ... }
+        data.data?.forEach((detection: any) => onNewDetection?.(detection))
       } else if (data.id && data.species !== undefined) {
         // Direct detection object format
         onNewDetection?.(data)